@@ -3,34 +3,169 @@
 # TODO:
 # *  - [x] Add suppport for specifying which CPU to query
 
+import array
 import datetime
+import os
 import re
 import subprocess
+import sys
+from dataclasses import dataclass
 
+from . import HWMON, INVENTORY
+from .LOGGER import Column, Logger, RowFormatter
 from .Sensor import Sensor
 
 clock_speed_regex = re.compile(r"(cpu MHz)\s+:\s+([\d.]+)")
-cpu_voltage_regex = re.compile(r"([^+]\d{1,3}\.\d{2,})")
-cpu_temp_regex = re.compile(r"(Core \d+).*(\d\d\.\d).*\(high.*\)")
-name_regex = re.compile(r"Model name:\s+(.*)")
+# hwmon labels of per-core temperatures (coretemp)
+core_label_regex = re.compile(r"^Core \d+$")
+cpu_dir_regex = re.compile(r"^cpu(\d+)$")
+
+CPU_ROOT = "/sys/devices/system/cpu"
+
+# Columns of `CpuData.csv` and `CpuData.logger`, taken from a `CpuSample`
+TIMESTAMP_COLUMN = Column("timestamp", "Time", convert=lambda t: str(t).replace("-", "/"))
+CSV_COLUMNS = (
+    Column("voltage", "Voltage", " V"),
+    Column("average_clock", "Average Clock", " MHz"),
+    Column("max_clock", "Max Clock", " MHz"),
+    Column("average_temp", "Average Temp", " °C"),
+    Column("max_temp", "Max Temp", " °C"),
+)
+
+
+class CpufreqReader:
+    """Per-core clock speeds from cpufreq sysfs, read through file descriptors kept open.
+
+    Each `scaling_cur_freq` file is opened once. A reading re-reads it with `os.pread` at
+    offset 0, which makes sysfs regenerate the value without walking `/proc/cpuinfo`.
+    """
+
+    def __init__(self, root: str = CPU_ROOT):
+        """Open `scaling_cur_freq` of every CPU under `root`.
+
+        Raises
+        ------
+            FileNotFoundError: If no CPU exposes cpufreq.
+        """
+        self._fds = []
+        for entry in os.listdir(root):
+            match = cpu_dir_regex.match(entry)
+            if not match:
+                continue
+            try:
+                fd = os.open(os.path.join(root, entry, "cpufreq", "scaling_cur_freq"), os.O_RDONLY)
+            except OSError:
+                continue
+            self._fds.append((int(match[1]), fd))
+        if not self._fds:
+            raise FileNotFoundError(f"No cpufreq scaling_cur_freq under {root}")
+        self._fds.sort()
+        self.size = self._fds[-1][0] + 1
+
+    def read(self) -> array.array:
+        """
+        Read the current clock of every CPU.
+
+        Returns
+        ------
+            array.array: Clock speeds in MHz indexed by CPU id. CPUs without
+            cpufreq (eg offline) read as 0.
+        """
+        clocks = array.array("I", bytes(4 * self.size))
+        for cpu, fd in self._fds:
+            # scaling_cur_freq is in kHz
+            clocks[cpu] = int(os.pread(fd, 32, 0)) // 1000
+        return clocks
+
+    def close(self) -> None:
+        """Close the file descriptors."""
+        for _, fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+    def __del__(self) -> None:
+        self.close()
+
+
+_cpufreq = None
+
+
+def cpufreq_reader() -> CpufreqReader | None:
+    """Return the shared `CpufreqReader`, or None if cpufreq is not available."""
+    global _cpufreq
+    if _cpufreq is None:
+        try:
+            _cpufreq = CpufreqReader()
+        except OSError:
+            return None
+    return _cpufreq
+
+
+@dataclass(frozen=True, slots=True)
+class CpuSample:
+    """An immutable set of CPU readings taken in one pass.
+
+    Attributes
+    ------
+        timestamp (datetime.datetime): When the sample was taken.
+        voltage (float | None): CPU voltage in volts, None if it could not be read.
+        clocks (tuple[int, ...]): Clock speed of each core in MHz.
+        temps (tuple[int, ...]): Temperature of each core in °C.
+        average_clock (int | None): Average of `clocks`.
+        max_clock (int | None): Highest of `clocks`.
+        average_temp (int | None): Average of `temps`.
+        max_temp (int | None): Highest of `temps`.
+    """
+
+    timestamp: datetime.datetime
+    voltage: float | None
+    clocks: tuple[int, ...]
+    temps: tuple[int, ...]
+    average_clock: int | None
+    max_clock: int | None
+    average_temp: int | None
+    max_temp: int | None
+
+    @classmethod
+    def from_readings(cls, voltage, clocks, temps, timestamp=None) -> "CpuSample":
+        """Build a sample from per-core readings, precomputing the averages and maximums."""
+        clocks = tuple(clocks)
+        temps = tuple(temps)
+        return cls(
+            timestamp=timestamp or datetime.datetime.now(),
+            voltage=voltage,
+            clocks=clocks,
+            temps=temps,
+            average_clock=round(sum(clocks) / len(clocks)) if clocks else None,
+            max_clock=max(clocks, default=None),
+            average_temp=round(sum(temps) / len(temps)) if temps else None,
+            max_temp=max(temps, default=None),
+        )
 
 
 class CpuData(Sensor):
     """The object contains information about the CPU, including its clock speed,
     voltage, temperature and name."""
 
-    def __init__(self):
+    def __init__(self, source: str = "auto", voltage_label: str = "VIN3"):
         """Initialize an instance of `CpuData`.
 
+        Args
+        ------
+            source (str, optional): Where temperatures and voltage are read from.
+                'hwmon' reads sysfs directly, 'sensors' parses lm-sensors output and
+                'auto' prefers hwmon, falling back to lm-sensors. Defaults to 'auto'.
+
+            voltage_label (str, optional): Label of the CPU voltage input.
+                Defaults to 'VIN3'.
+
         Returns
         ------
             CpuData: An instance of a class containing data about the CPU.
         """
         self.type = "CPU"
-        # Regex patterns for parsing output from 'lscpu' and 'sensors' commands
-        # Regex patterns for parsing output from
-        # 'lscpu' and 'sensors' commands
-
+        self.source = source
+        self.voltage_label = voltage_label
         # Initialization of properties for CPU data
         self.name = self.cpu_name(short=True)
         self.temp = self.average_temp
@@ -52,24 +187,73 @@ class CpuData(Sensor):
 
         # return zip(*zip(clocks, temps, strict=False), strict=False)
 
-    def query_cpu_clocks(self) -> dict[str, str]:
+    def sample(self) -> CpuSample:
+        """
+        Read voltage, clocks and temperatures once and return them as one sample.
+
+        Every property and formatter renders from a sample, so a single `print(cpu)`
+        reads each source once and all values come from the same instant.
+
+        Returns
+        ------
+            CpuSample: The current CPU readings.
+        """
+        try:
+            voltage = self.voltage
+        except LookupError:
+            voltage = None
+        return CpuSample.from_readings(voltage, self.cpu_clocks_list(), self.cpu_temp_list())
+
+    async def asample(self) -> CpuSample:
+        """
+        Async counterpart of `sample`.
+
+        If lm-sensors is needed, `sensors -j` is run as an asyncio subprocess to fill the
+        shared snapshot, then the file reads run in the default executor.
+        """
+        import asyncio
+
+        if self._needs_sensors():
+            await HWMON.asensors_snapshot()
+        return await asyncio.to_thread(self.sample)
+
+    def _needs_sensors(self) -> bool:
+        """Return True if reading temperatures or voltage will fall back to lm-sensors."""
+        hwmon = HWMON.select(self.source)
+        return (
+            hwmon is None
+            or not hwmon.search(core_label_regex, kind="temp")
+            or hwmon.find(self.voltage_label, kind="in") is None
+        )
+
+    def query_cpu_clocks(self) -> dict[int, int]:
         """Query the clock speeds of all cores.
 
         The keys are core numbers starting from 1 and the values
         are their corresponding clock frequencies.
 
         """
-        clock_dict = {}
-        with open("/proc/cpuinfo", encoding="utf-8") as f:
-            raw_output = f.read()
+        return dict(enumerate(self.cpu_clocks_array(), 1))
 
-        matches = re.findall(clock_speed_regex, raw_output)
-        count = 1
-        for match in matches:
-            clock_dict[count] = match[1]
-            count += 1
+    def cpu_clocks_array(self) -> array.array:
+        """
+        Queries the clock speeds of all cores as a compact array.
 
-        return clock_dict
+        The clocks are read from cpufreq sysfs when available, and
+        parsed from /proc/cpuinfo otherwise.
+
+        Returns
+        ------
+            array.array: Clock speeds in MHz (ints) indexed by CPU id.
+        """
+        reader = cpufreq_reader()
+        if reader is not None:
+            return reader.read()
+
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            raw_output = f.read()
+        matches = clock_speed_regex.findall(raw_output)
+        return array.array("I", (round(float(match[1])) for match in matches))
 
     def query_cpu_temp(self):
         """Query the temperature of all cores.
@@ -82,17 +266,16 @@ class CpuData(Sensor):
             dict: A dictionary where keys are core numbers (ints) and values
             are temperatures (floats).
         """
-        temp_dict = {}
-        cpu_temperatures = subprocess.run(
-            "sensors | grep Core", shell=True, capture_output=True, text=True, check=False
-        ).stdout.strip()
+        hwmon = HWMON.select(self.source)
+        if hwmon is not None:
+            features = hwmon.search(core_label_regex, kind="temp")
+            if features:
+                return {count: feature.read() for count, feature in enumerate(features, 1)}
+            if self.source == "hwmon":
+                raise LookupError("No per-core temperatures found in hwmon")
 
-        matches = re.findall(cpu_temp_regex, cpu_temperatures)
-        count = 1
-        for match in matches:
-            temp_dict[count] = match[1]
-            count += 1
-        return temp_dict
+        temps = HWMON.sensors_snapshot().search(core_label_regex, kind="temp")
+        return dict(enumerate(temps, 1))
 
     @property
     def voltage(self):
@@ -100,18 +283,18 @@ class CpuData(Sensor):
         Queries the voltage of the CPU and returns it.
         The voltage is rounded to three decimal places.
         """
-        cpu_voltage_subproccess = subprocess.run(
-            ["echo $(sensors | grep VIN3)"], shell=True, stdout=subprocess.PIPE, check=False
-        ).stdout.decode("utf-8")
-        raw_value = cpu_voltage_regex.search(cpu_voltage_subproccess).group(1)
-        cpu_voltage = raw_value.strip()
-        if len(cpu_voltage) == 4:
-            return round(float(cpu_voltage.strip()), 3)
-        if len(cpu_voltage) == 6:
-            return round((float(cpu_voltage) / 1000), 3)
-        raise Exception(
-            "Error: Voltage not found (requires a 4 or 6 digit number eg 1.25v or 600.00mV)"
-        )
+        hwmon = HWMON.select(self.source)
+        if hwmon is not None:
+            feature = hwmon.find(self.voltage_label, kind="in")
+            if feature is not None:
+                return round(feature.read(), 3)
+            if self.source == "hwmon":
+                raise LookupError(f"{self.voltage_label} not found in hwmon")
+
+        cpu_voltage = HWMON.sensors_snapshot().find(self.voltage_label, kind="in")
+        if cpu_voltage is None:
+            raise LookupError(f"Error: Voltage not found ({self.voltage_label} not in sensors)")
+        return round(cpu_voltage, 3)
 
     def cpu_clocks_list(self):
         """
@@ -124,8 +307,8 @@ class CpuData(Sensor):
             List[float]: A list where each element is a core number (int)
             and its corresponding clock frequency (float).
         """
-        self.query_clocks = self.query_cpu_clocks()
-        return [round(float(clock)) for clock in self.query_clocks.values()]
+        # Skip CPUs that have no reading (offline cores in cpufreq)
+        return [clock for clock in self.cpu_clocks_array() if clock]
 
     def cpu_temp_list(self):
         """
@@ -151,7 +334,7 @@ class CpuData(Sensor):
         ------
             float: The average CPU temperature in degrees Celsius (float).
         """
-        return round(sum(self.cpu_temp_list()) / len(self.cpu_temp_list()))
+        return self.sample().average_temp
 
     @property
     def max_temp(self):
@@ -162,7 +345,7 @@ class CpuData(Sensor):
         ------
             float: The maximum CPU temperature in degrees Celsius (float).
         """
-        return max(self.cpu_temp_list())
+        return self.sample().max_temp
 
     @property
     def max_clock(self):
@@ -174,7 +357,7 @@ class CpuData(Sensor):
         ------
             float: The maximum clock speed (float).
         """
-        return max(self.cpu_clocks_list())
+        return self.sample().max_clock
 
     @property
     def average_clock(self):
@@ -186,25 +369,20 @@ class CpuData(Sensor):
         ------
             float: The average clock frequency (float).
         """
-        return round(sum(self.cpu_clocks_list()) / len(self.cpu_clocks_list()))
+        return self.sample().average_clock
 
     def cpu_name(self, short=False):
-        output = subprocess.run(
-            'lscpu | grep "Model name"', shell=True, capture_output=True, text=True, check=False
-        )
-        stderr = output.stderr.strip()
-        stdout = output.stdout.strip()
-
-        if stderr:
-            raise Exception(stderr)
-            return 1
+        """
+        Returns the model name of the CPU from the cached hardware inventory.
 
-        matches = re.findall(name_regex, stdout)
-        for match in matches:
-            full_name = match
-            short_name = match.split(" ")[-1]
+        Args
+        ------
+            short (bool, optional): If True, return only the last word
+            of the model name. Defaults to False.
+        """
+        full_name = INVENTORY.load().cpu_model
         if short:
-            return short_name
+            return full_name.split(" ")[-1]
         return full_name
 
     def csv(self, header=False, units=False, timestamp=False):
@@ -229,55 +407,12 @@ class CpuData(Sensor):
             str: A CSV formatted string representation of the current CPU status.
         """
 
-        DATETIME_REGEX = re.compile(r"\d+(-|/)\d+(-|/)\d+\s\d+:\d+:\d+(\.\d+)?")
-        header_ = ""
-
-        unit_definitions = [" V", " MHz", " MHz", " °C", " °C"]
-        template = f"{self.voltage},{self.average_clock},{self.max_clock},\
-            {self.average_temp},{self.max_temp}"
-
-        if timestamp:
-            timestamp = str(datetime.datetime.now()).replace("-", "/")
-            template = f"{timestamp},{template}"
+        columns = [TIMESTAMP_COLUMN, *CSV_COLUMNS] if timestamp else CSV_COLUMNS
+        formatter = RowFormatter(columns, units=units)
+        row = formatter.csv(self.sample())
         if header:
-            if timestamp:
-                keys = ["Time", "Voltage", "Average Clock", "Max Clock", "Average Temp", "Max Temp"]
-            else:
-                keys = ["Voltage", "Average Clock", "Max Clock", "AVerage Temp", "Max Temp"]
-            header_ = ",".join(keys)
-            template = header_ + "\n" + template
-
-        # Append units to the end of each field
-        if units:
-            # The offset is used to account for the fact that we are adding units
-            # after each field rather than at the end of each field.
-            # Time allows us to skip the timestamp field when adding units.
-            offset = 0
-            # Ignore header when adding units
-            if header_:
-                values = template.replace(header_, "").lstrip().split(",")
-            else:
-                values = template.lstrip().split(",")
-            for i, value in enumerate(values):
-                try:
-                    if not DATETIME_REGEX.match(value):
-                        values[i] = f"{value}{unit_definitions[i - offset]}"
-                    else:
-                        # Dont assign a unit to the timestamp, so subtract one from the units index.
-                        offset = 1
-                except IndexError:
-                    pass
-            # Join back together with commas and add the header back in.
-            template = f'{header_}\n{", ".join(values)}' if header else ", ".join(values)
-
-        # Format the template with the data from this instance of the class.
-        return template.format(
-            voltage=self.voltage,
-            average_clock=self.average_clock,
-            max_clock=self.max_clock,
-            average_temp=self.average_temp,
-            max_temp=self.max_temp,
-        )
+            return f"{formatter.header}\n{row}"
+        return row
 
         # values = ''
         # header_line = ''
@@ -295,6 +430,28 @@ class CpuData(Sensor):
         #     values += f'{self.max_temp},{self.average_temp}'
         # return header_line + values
 
+    def logger(self, target=sys.stdout, timestamp=True, **kwargs) -> Logger:
+        """
+        Returns a logger that writes one `csv` row (or NDJSON object) per sample.
+
+        Args
+        ------
+            target (str | TextIO, optional): Path to append to, or an open
+            text stream. Defaults to stdout.
+
+            timestamp (bool, optional): If True, includes the timestamp
+            column. Defaults to True.
+
+            **kwargs: Passed on to `LOGGER.Logger`, eg fmt='ndjson',
+            units=True or compress=True.
+
+        Returns
+        ------
+            Logger: The logger, see `Logger.write` and `Logger.run`.
+        """
+        columns = [TIMESTAMP_COLUMN, *CSV_COLUMNS] if timestamp else list(CSV_COLUMNS)
+        return Logger(self.sample, columns, target, **kwargs)
+
     def __str__(self):
         """
         Provides a human-readable representation of the CPU status.
@@ -305,19 +462,14 @@ class CpuData(Sensor):
         -------
             str: A string representing the current state of the CPU in a readable format.
         """
-        voltage = self.voltage
-        average_clock = self.average_clock
-        maxiumum_clock = self.max_clock
-
-        maxiumum_temp = self.max_temp
-        average_temp = self.average_temp
+        sample = self.sample()
 
         return (
-            f"Volts: {voltage}v\n"
-            f"Avg clock: {average_clock}MHz\n"
-            f"Max clock: {maxiumum_clock}MHz\n"
-            f"Max temp: {maxiumum_temp}°C\n"
-            f"Avg temp: {average_temp}°C"
+            f"Volts: {sample.voltage}v\n"
+            f"Avg clock: {sample.average_clock}MHz\n"
+            f"Max clock: {sample.max_clock}MHz\n"
+            f"Max temp: {sample.max_temp}°C\n"
+            f"Avg temp: {sample.average_temp}°C"
         ).strip()
 
 
@@ -1,24 +1,491 @@
 #!/usr/bin/env python3
 """Disk.py - Query disk information for HWINFO."""
 
-import psutil
+import errno
+import os
+import re
+import struct
+import time
+from dataclasses import dataclass
 
-from .Sensor import Sensor
+from .Sensor import DaemonCall, Sensor, counter_delta, wait_calls
+
+DISKSTATS_PATH = "/proc/diskstats"
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+
+# /proc/diskstats always counts 512 byte sectors, whatever the device's sector size
+SECTOR_SIZE = 512
+
+# Columns of /proc/diskstats after major, minor and name that the monitor keeps: reads
+# completed, sectors read, ms reading, writes completed, sectors written, ms writing,
+# ms doing I/O
+DISKSTATS_COLUMNS = (0, 2, 3, 4, 6, 7, 9)
+
+# Width of those columns: the kernel prints counts as unsigned long and times in ms as
+# unsigned int, so the times wrap after 49 days of I/O
+_ULONG_BITS = struct.calcsize("L") * 8
+DISKSTATS_BITS = (_ULONG_BITS, _ULONG_BITS, 32, _ULONG_BITS, _ULONG_BITS, 32, 32)
+
+
+def read_diskstats(data: bytes) -> dict[str, tuple[int, ...]]:
+    """Parse /proc/diskstats into device -> counters in `DISKSTATS_COLUMNS` order."""
+    counters = {}
+    for line in data.split(b"\n"):
+        fields = line.split()
+        if len(fields) < 14:
+            continue
+        values = fields[3:]
+        counters[fields[2].decode()] = tuple(int(values[i]) for i in DISKSTATS_COLUMNS)
+    return counters
+
+
+def _unescape(field: str) -> str:
+    """Decode the octal escapes (eg '\\040' for a space) used in /proc/self/mountinfo."""
+    return re.sub(r"\\([0-7]{3})", lambda match: chr(int(match[1], 8)), field)
+
+
+@dataclass(frozen=True, slots=True)
+class Mount:
+    """One line of /proc/self/mountinfo.
+
+    Attributes:
+    ----------
+        mountpoint (str): Where the filesystem is mounted, eg '/mnt/hdd'.
+        device (str): 'major:minor' of the backing device. Major 0 means none (eg tmpfs, btrfs).
+        fstype (str): Filesystem type, eg 'ext4' or 'nfs4'.
+        source (str): Mount source, eg '/dev/nvme0n1p2' or 'server:/export'.
+    """
+
+    mountpoint: str
+    device: str
+    fstype: str
+    source: str
+
+
+def read_mountinfo(path: str = MOUNTINFO_PATH) -> list[Mount]:
+    """Return every mount of this process's mount namespace, in mount order."""
+    mounts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields, _, tail = line.partition(" - ")
+            fields = fields.split()
+            fstype, source = tail.split()[:2]
+            mounts.append(Mount(_unescape(fields[4]), fields[2], fstype, _unescape(source)))
+    return mounts
+
+
+def find_mount(path: str, mounts: list[Mount] | None = None) -> Mount | None:
+    """
+    Return the mount containing the absolute, normalized `path`, by longest prefix.
+
+    Parameters:
+    -----------
+        path (str): Path to look up. It is compared as text, so nothing under it is accessed.
+        mounts (list[Mount]): Mounts to search, defaults to `read_mountinfo()`.
+    """
+    # The last matching mount is the one on top
+    mount = None
+    for candidate in read_mountinfo() if mounts is None else mounts:
+        if path == candidate.mountpoint or path.startswith(candidate.mountpoint.rstrip("/") + "/"):
+            if mount is None or len(candidate.mountpoint) >= len(mount.mountpoint):
+                mount = candidate
+    return mount
+
+
+def device_name(mountpoint: str) -> str | None:
+    """
+    Return the /proc/diskstats name of the device backing `mountpoint`, eg 'nvme0n1p2'.
+
+    Returns:
+    -----------
+        str | None: The device name, or None if the mount has no block device.
+    """
+    mount = find_mount(os.path.realpath(mountpoint))
+    if mount is None:
+        return None
+    try:
+        # /sys/dev/block/<major:minor> links to the device's sysfs directory
+        return os.path.basename(os.readlink(f"/sys/dev/block/{mount.device}"))
+    except OSError:
+        pass
+    # Filesystems such as btrfs report an anonymous device, so fall back to the source
+    if mount.source.startswith("/dev/"):
+        return os.path.basename(os.path.realpath(mount.source))
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class DiskIoRates:
+    """I/O load of one block device between two readings of /proc/diskstats.
+
+    Attributes:
+    ----------
+        device (str): Name of the device, eg 'nvme0n1', 'md0' or 'dm-1'.
+        read_bytes (float): Bytes read per second.
+        write_bytes (float): Bytes written per second.
+        read_iops (float): Reads completed per second.
+        write_iops (float): Writes completed per second.
+        read_await (float | None): Average time per read in ms, None if there were none.
+        write_await (float | None): Average time per write in ms, None if there were none.
+        utilization (float): Percentage of the time the device was busy.
+    """
+
+    device: str
+    read_bytes: float
+    write_bytes: float
+    read_iops: float
+    write_iops: float
+    read_await: float | None
+    write_await: float | None
+    utilization: float
+
+    @classmethod
+    def from_deltas(cls, device: str, deltas: list[int], elapsed: float) -> "DiskIoRates":
+        """Build the rates from counter deltas in `DISKSTATS_COLUMNS` order."""
+        reads, sectors_read, read_ms, writes, sectors_written, write_ms, io_ms = deltas
+        return cls(
+            device=device,
+            read_bytes=sectors_read * SECTOR_SIZE / elapsed,
+            write_bytes=sectors_written * SECTOR_SIZE / elapsed,
+            read_iops=reads / elapsed,
+            write_iops=writes / elapsed,
+            read_await=read_ms / reads if reads else None,
+            write_await=write_ms / writes if writes else None,
+            utilization=min(100.0, io_ms / (elapsed * 10)),
+        )
+
+
+class IoMonitor:
+    """I/O rates of every block device, from one read of /proc/diskstats per call to `rates`.
+
+    The file is opened once and re-read with `os.pread`, so there are no per-device
+    syscalls however many NVMe, md and dm devices there are. Devices that appear are
+    reported from their second reading on.
+    """
+
+    def __init__(self, path: str = DISKSTATS_PATH):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        self._previous = {}
+        self._taken = None
+
+    def read(self) -> dict[str, tuple[int, ...]]:
+        """Return the raw counters of every device, see `read_diskstats`."""
+        chunks = []
+        offset = 0
+        while chunk := os.pread(self._fd, 65536, offset):
+            chunks.append(chunk)
+            offset += len(chunk)
+        return read_diskstats(b"".join(chunks))
+
+    def rates(self) -> dict[str, DiskIoRates]:
+        """Return device -> `DiskIoRates` since the previous call (empty on the first)."""
+        counters = self.read()
+        taken = time.monotonic()
+        rates = {}
+        if self._taken is not None and taken > self._taken:
+            elapsed = taken - self._taken
+            for device, current in counters.items():
+                previous = self._previous.get(device)
+                if previous is None:
+                    continue
+                deltas = [
+                    counter_delta(c, p, bits)
+                    for c, p, bits in zip(current, previous, DISKSTATS_BITS, strict=True)
+                ]
+                rates[device] = DiskIoRates.from_deltas(device, deltas, elapsed)
+        self._previous = counters
+        self._taken = taken
+        return rates
+
+    def close(self) -> None:
+        """Close the file descriptor."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self) -> None:
+        self.close()
+
+
+# Filesystems without meaningful space usage, skipped by `UsageScanner`
+PSEUDO_FILESYSTEMS = frozenset(
+    {
+        "autofs",
+        "binfmt_misc",
+        "bpf",
+        "cgroup",
+        "cgroup2",
+        "configfs",
+        "debugfs",
+        "devpts",
+        "efivarfs",
+        "fusectl",
+        "hugetlbfs",
+        "mqueue",
+        "nsfs",
+        "proc",
+        "pstore",
+        "rpc_pipefs",
+        "securityfs",
+        "selinuxfs",
+        "sysfs",
+        "tracefs",
+    }
+)
+
+
+def _percent(used: int, free: int) -> float:
+    """Usage the way `df` and psutil compute it, relative to what is usable by non-root."""
+    return round(100 * used / (used + free), 1) if used + free else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class MountUsage:
+    """Space and inode usage of one mounted filesystem.
+
+    Attributes:
+    ----------
+        mountpoint (str): Where the filesystem is mounted.
+        fstype (str): Filesystem type, eg 'ext4'.
+        total (int): Size in bytes.
+        used (int): Bytes in use.
+        free (int): Bytes available to unprivileged users.
+        percent (float): Percentage used, as reported by `df`.
+        inodes_total (int): Number of inodes.
+        inodes_used (int): Inodes in use.
+        inodes_free (int): Inodes available to unprivileged users.
+        inodes_percent (float): Percentage of inodes used.
+    """
+
+    mountpoint: str
+    fstype: str
+    total: int
+    used: int
+    free: int
+    percent: float
+    inodes_total: int
+    inodes_used: int
+    inodes_free: int
+    inodes_percent: float
+
+    @classmethod
+    def from_statvfs(cls, mount: Mount, path: str | None = None) -> "MountUsage":
+        """
+        Run `statvfs` on `path` or the mountpoint. May block for as long as the filesystem does.
+
+        Parameters:
+        -----------
+            mount (Mount): The mount containing `path`.
+            path (str): Any path on the mount, defaults to its mountpoint.
+        """
+        st = os.statvfs(mount.mountpoint if path is None else path)
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        free = st.f_bavail * st.f_frsize
+        inodes_used = st.f_files - st.f_ffree
+        return cls(
+            mountpoint=mount.mountpoint,
+            fstype=mount.fstype,
+            total=st.f_blocks * st.f_frsize,
+            used=used,
+            free=free,
+            percent=_percent(used, free),
+            inodes_total=st.f_files,
+            inodes_used=inodes_used,
+            inodes_free=st.f_favail,
+            inodes_percent=_percent(inodes_used, st.f_favail),
+        )
+
+
+def _normalize(path: str) -> str:
+    # Lexical only, resolving symlinks could stat a hung mount
+    return os.path.normpath(os.path.abspath(path))
+
+
+class UsageScanner:
+    """Usage of many mounts at once, in bounded time even when some of them hang.
+
+    `scan` reads /proc/self/mountinfo once and runs `statvfs` for every mount on its
+    own daemon thread, so a call stuck on a dead server never delays interpreter exit.
+    Mounts that have not answered within `timeout` (eg a stale NFS mount) are left out
+    and quarantined: they are skipped for `quarantine` seconds, and after that only
+    retried once their stuck `statvfs` has returned, so hung calls never pile up.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 2.0,
+        quarantine: float = 300.0,
+        exclude: frozenset[str] = PSEUDO_FILESYSTEMS,
+    ):
+        """
+        Parameters:
+        -----------
+            timeout (float): Seconds to wait for the mounts of one scan.
+            quarantine (float): Seconds to skip a mount after it timed out.
+            exclude (frozenset[str]): Filesystem types left out of a scan of every mount.
+        """
+        self.timeout = timeout
+        self.quarantine = quarantine
+        self.exclude = exclude
+        # Mountpoint -> statvfs still running from an earlier scan
+        self._pending = {}
+        # Mountpoint -> time.monotonic() until which it is skipped
+        self._quarantined = {}
+
+    @property
+    def quarantined(self) -> list[str]:
+        """Mountpoints that are currently skipped because they timed out."""
+        now = time.monotonic()
+        return [mountpoint for mountpoint, until in self._quarantined.items() if until > now]
+
+    def _run(self, targets: dict[str, tuple[Mount, str]]) -> dict[str, DaemonCall]:
+        """Run statvfs for key -> (mount, path) and return the calls that finished in time."""
+        now = time.monotonic()
+        calls = {}
+        for key, (mount, path) in targets.items():
+            mountpoint = mount.mountpoint
+            if self._quarantined.get(mountpoint, 0) > now:
+                continue
+            pending = self._pending.get(mountpoint)
+            if pending is not None and not pending.done():
+                self._quarantined[mountpoint] = now + self.quarantine
+                continue
+            calls[key] = (
+                mountpoint,
+                DaemonCall(MountUsage.from_statvfs, mount, path, name="hwutils-statvfs"),
+            )
+
+        wait_calls([call for _, call in calls.values()], timeout=self.timeout)
+        finished = {}
+        for key, (mountpoint, call) in calls.items():
+            if not call.done():
+                self._pending[mountpoint] = call
+                self._quarantined[mountpoint] = time.monotonic() + self.quarantine
+                continue
+            self._pending.pop(mountpoint, None)
+            self._quarantined.pop(mountpoint, None)
+            finished[key] = call
+        return finished
+
+    def scan(self, mountpoints: list[str] | None = None) -> dict[str, MountUsage]:
+        """
+        Return mountpoint -> `MountUsage` of every mount that answered in time.
+
+        Parameters:
+        -----------
+            mountpoints (list[str]): Only scan the mounts containing these paths, which
+                                     are used as the keys of the result. Defaults to
+                                     every mount whose type is not excluded.
+        """
+        mounts = read_mountinfo()
+        if mountpoints is None:
+            targets = {
+                mount.mountpoint: (mount, mount.mountpoint)
+                for mount in mounts
+                if mount.fstype not in self.exclude
+            }
+        else:
+            targets = {}
+            for path in map(_normalize, mountpoints):
+                mount = find_mount(path, mounts)
+                if mount is not None:
+                    targets[path] = (mount, path)
+        return {
+            key: call.result for key, call in self._run(targets).items() if call.error is None
+        }
+
+    def usage(self, path: str) -> MountUsage | None:
+        """
+        Return the usage of the filesystem containing `path`.
+
+        Returns:
+        -----------
+            MountUsage | None: The usage, or None if its mount did not answer in time or
+                               is quarantined.
+
+        Raises:
+        -----------
+            OSError: If `statvfs` failed, eg because `path` does not exist.
+        """
+        path = _normalize(path)
+        mount = find_mount(path)
+        if mount is None:
+            raise FileNotFoundError(errno.ENOENT, "No mount contains the path", path)
+        call = self._run({path: (mount, path)}).get(path)
+        if call is None:
+            return None
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def close(self) -> None:
+        """Forget the calls still running on hung mounts. Their daemon threads end on their own."""
+        self._pending.clear()
+
+
+_scanner = None
+
+
+def usage_scanner() -> UsageScanner:
+    """Return the shared `UsageScanner`, so quarantines carry over between calls."""
+    global _scanner
+    if _scanner is None:
+        _scanner = UsageScanner()
+    return _scanner
 
 
 class Disk(Sensor):
     def __init__(self, mountpoint: str, friendly_name: str | None = None):
         self.mountpoint = mountpoint
         self.friendly_name = friendly_name
+        self._device = None
+        self._monitor = None
         super().__init__("disk")
 
-    def percent_used(self) -> float:
-        return psutil.disk_usage(self.mountpoint).percent
+    def percent_used(self) -> float | None:
+        """Return the percentage of space used, or None if the mount does not answer in time."""
+        usage = self.usage()
+        return None if usage is None else usage.percent
+
+    def usage(self) -> MountUsage | None:
+        """Return space and inode usage of the filesystem containing the mountpoint.
+
+        Returns None instead of blocking if the mount does not answer in time. Goes
+        through the shared `UsageScanner`, see `UsageScanner.usage`.
+        """
+        return usage_scanner().usage(self.mountpoint)
+
+    async def apercent_used(self, timeout: float | None = 5.0) -> float | None:
+        """Async counterpart of `percent_used`; statvfs runs in the default executor."""
+        import asyncio
+
+        return await asyncio.wait_for(asyncio.to_thread(self.percent_used), timeout)
+
+    @property
+    def device(self) -> str | None:
+        """Name of the block device backing the mountpoint, eg 'sda1'. None if it has none."""
+        if self._device is None:
+            self._device = device_name(self.mountpoint) or ""
+        return self._device or None
+
+    def io_rates(self) -> DiskIoRates | None:
+        """Return the I/O rates of the backing device since the previous call, None on the first.
+
+        To monitor many devices, use one `IoMonitor` and read them all per tick.
+        """
+        if self.device is None:
+            return None
+        if self._monitor is None:
+            self._monitor = IoMonitor()
+        return self._monitor.rates().get(self.device)
 
     def __str__(self) -> str:
+        percent = self.percent_used()
+        usage = "not responding" if percent is None else f"{percent}%"
         return str(
             f"""{self.mountpoint}
-    {self.friendly_name} Usage: {self.percent_used()}%\n"""
+    {self.friendly_name} Usage: {usage}\n"""
         )
 
 
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""EXPORTER.py - Serve hardware metrics over HTTP in the OpenMetrics text format."""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psutil
+
+from . import DISK, HWMON
+from .CPU import CpuData
+from .GPU import GpuData
+from .SYS import Ram
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape(value) -> str:
+    """Escape a label value as required by the exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricFamily:
+    """One metric family and its samples, rendered as OpenMetrics text."""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, unit: str = ""):
+        self.name = name
+        self.metric_type = metric_type
+        self.help_text = help_text
+        self.unit = unit
+        self.samples = []
+
+    def add(self, value, **labels) -> None:
+        """Add a sample. None values are skipped."""
+        if value is not None:
+            self.samples.append((labels, float(value)))
+
+    def render(self) -> str:
+        lines = [
+            f"# TYPE {self.name} {self.metric_type}",
+            f"# HELP {self.name} {self.help_text}",
+        ]
+        if self.unit:
+            lines.insert(1, f"# UNIT {self.name} {self.unit}")
+        suffix = "_total" if self.metric_type == "counter" else ""
+        for labels, value in self.samples:
+            label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            label_text = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{self.name}{suffix}{label_text} {value!r}")
+        return "\n".join(lines) + "\n"
+
+
+def collect_cpu(cpu: CpuData) -> list[MetricFamily]:
+    sample = cpu.sample()
+    temperature = MetricFamily(
+        "hwutils_cpu_temperature_celsius", "gauge", "Temperature of each CPU core.", "celsius"
+    )
+    for core, value in enumerate(sample.temps):
+        temperature.add(value, core=core)
+    clock = MetricFamily("hwutils_cpu_clock_mhz", "gauge", "Clock speed of each logical CPU.")
+    for cpu_id, value in enumerate(sample.clocks):
+        clock.add(value, cpu=cpu_id)
+    voltage = MetricFamily("hwutils_cpu_voltage_volts", "gauge", "CPU voltage.", "volts")
+    voltage.add(sample.voltage)
+    return [temperature, clock, voltage]
+
+
+def collect_gpu(gpu: GpuData) -> list[MetricFamily]:
+    snapshot = gpu.snapshot()
+    labels = {"gpu": gpu.index, "name": gpu.name}
+    temperature = MetricFamily(
+        "hwutils_gpu_temperature_celsius", "gauge", "GPU core temperature.", "celsius"
+    )
+    temperature.add(snapshot.core_temp, **labels)
+    clock = MetricFamily("hwutils_gpu_clock_mhz", "gauge", "GPU clock speed.")
+    clock.add(snapshot.core_clock, domain="core", **labels)
+    clock.add(snapshot.memory_clock, domain="memory", **labels)
+    usage = MetricFamily("hwutils_gpu_utilization_percent", "gauge", "GPU utilization.")
+    usage.add(snapshot.core_usage, domain="core", **labels)
+    usage.add(snapshot.memory_usage, domain="memory", **labels)
+    power = MetricFamily("hwutils_gpu_power_watts", "gauge", "GPU power draw.", "watts")
+    power.add(snapshot.power, **labels)
+    fan = MetricFamily("hwutils_gpu_fan_percent", "gauge", "GPU fan speed.")
+    fan.add(snapshot.fan_speed, **labels)
+    memory = MetricFamily(
+        "hwutils_gpu_memory_used_bytes", "gauge", "GPU framebuffer memory in use.", "bytes"
+    )
+    if snapshot.memory_used is not None:
+        memory.add(snapshot.memory_used * 1024**2, **labels)
+    return [temperature, clock, usage, power, fan, memory]
+
+
+def collect_fans() -> list[MetricFamily]:
+    fans = MetricFamily("hwutils_fan_speed_rpm", "gauge", "Speed of each fan.")
+    hwmon = HWMON.select("auto")
+    features = [feature for feature in hwmon.features if feature.kind == "fan"] if hwmon else []
+    if features:
+        for feature in features:
+            try:
+                value = feature.read()
+            except (OSError, ValueError):
+                continue  # Leave out this fan, eg its controller stopped answering
+            fans.add(value, chip=feature.chip, fan=feature.label)
+    else:
+        for chip, label, value in HWMON.sensors_snapshot().items(kind="fan"):
+            fans.add(value, chip=chip, fan=label)
+    return [fans]
+
+
+def collect_ram() -> list[MetricFamily]:
+    memory = Ram().snapshot()
+    ram = MetricFamily("hwutils_memory_bytes", "gauge", "Physical memory.", "bytes")
+    ram.add(memory.total, state="total")
+    ram.add(memory.available, state="available")
+    ram.add(memory.used, state="used")
+    return [ram]
+
+
+def collect_disks(mountpoints: list[str]) -> list[MetricFamily]:
+    used = MetricFamily("hwutils_disk_used_bytes", "gauge", "Used space of each mount.", "bytes")
+    total = MetricFamily("hwutils_disk_size_bytes", "gauge", "Size of each mount.", "bytes")
+    responding = MetricFamily(
+        "hwutils_disk_responding", "gauge", "Whether the mount answered statvfs in time."
+    )
+    # The scanner bounds the time spent on hung mounts such as a stale NFS export
+    usages = DISK.usage_scanner().scan(mountpoints)
+    for mountpoint in mountpoints:
+        usage = usages.get(os.path.normpath(os.path.abspath(mountpoint)))
+        responding.add(usage is not None, mountpoint=mountpoint)
+        if usage is not None:
+            used.add(usage.used, mountpoint=mountpoint)
+            total.add(usage.total, mountpoint=mountpoint)
+    return [used, total, responding]
+
+
+def collect_net() -> list[MetricFamily]:
+    received = MetricFamily(
+        "hwutils_network_received_bytes", "counter", "Bytes received by each interface.", "bytes"
+    )
+    sent = MetricFamily(
+        "hwutils_network_sent_bytes", "counter", "Bytes sent by each interface.", "bytes"
+    )
+    for interface, counters in psutil.net_io_counters(pernic=True).items():
+        received.add(counters.bytes_recv, interface=interface)
+        sent.add(counters.bytes_sent, interface=interface)
+    return [received, sent]
+
+
+class Exporter:
+    """Collect metrics in the background and serve the latest rendering on `/metrics`.
+
+    Collection runs every `interval` seconds on its own thread and renders the payload
+    once. Every scrape in between is served the same cached bytes, so the number of
+    scrapers does not change how often `nvidia-smi` or `sensors` run. Scrapes that
+    arrive before the first rendering get a 503.
+    """
+
+    def __init__(self, interval: float = 5.0, mountpoints: list[str] | None = None):
+        self.interval = interval
+        self.mountpoints = mountpoints or ["/"]
+        self.payload: bytes | None = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._collectors = self._default_collectors()
+
+    def _default_collectors(self) -> dict[str, Callable[[], list[MetricFamily]]]:
+        collectors = {
+            "fan": collect_fans,
+            "ram": collect_ram,
+            "disk": lambda: collect_disks(self.mountpoints),
+            "net": collect_net,
+        }
+        # Skip devices this machine does not have instead of failing every collection
+        try:
+            cpu = CpuData()
+            collectors["cpu"] = lambda: collect_cpu(cpu)
+        except Exception:
+            pass
+        try:
+            gpu = GpuData()
+            collectors["gpu"] = lambda: collect_gpu(gpu)
+        except Exception:
+            pass
+        return collectors
+
+    def collect(self) -> bytes:
+        """Run every collector once and cache the rendered payload."""
+        started = time.monotonic()
+        families = []
+        success = MetricFamily(
+            "hwutils_collector_success", "gauge", "Whether the last collection succeeded."
+        )
+        for name, collector in self._collectors.items():
+            try:
+                families.extend(collector())
+                success.add(1, collector=name)
+            except Exception:
+                success.add(0, collector=name)
+        duration = MetricFamily(
+            "hwutils_collection_duration_seconds", "gauge", "Time taken to collect.", "seconds"
+        )
+        duration.add(time.monotonic() - started)
+        families += [success, duration]
+        payload = ("".join(family.render() for family in families) + "# EOF\n").encode()
+        with self._lock:
+            self.payload = payload
+        return payload
+
+    def run(self) -> None:
+        """Collect every `interval` seconds until `stop` is called."""
+        due = time.monotonic()
+        if self.payload is not None:
+            # `serve` already rendered the first pass
+            due += self.interval
+        while not self._stop.wait(max(0.0, due - time.monotonic())):
+            self.collect()
+            due += self.interval
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def handler(self) -> type[BaseHTTPRequestHandler]:
+        """Return a request handler class serving this exporter's cached payload."""
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                with exporter._lock:
+                    payload = exporter.payload
+                if payload is None:
+                    self.send_error(503, "No collection has finished yet")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *_) -> None:
+                pass
+
+        return MetricsHandler
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9101) -> None:
+        """Render once, then collect in the background and serve `/metrics` until interrupted."""
+        self.collect()
+        threading.Thread(target=self.run, name="hwutils-exporter", daemon=True).start()
+        server = ThreadingHTTPServer((host, port), self.handler())
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            server.server_close()
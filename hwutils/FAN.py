@@ -1,8 +1,7 @@
 #!/usr/bin/env python3
 
-import subprocess
-import re
 
+from . import HWMON
 from .Sensor import Sensor
 # TODO:
 # * Add support for renaming xfans (fan1 becomes CPU fan)
@@ -19,10 +18,10 @@ class Fan(Sensor):
     Methods:
     --------
         speed() -> int: The current speed of the fan in RPMs.
-        query_fans() -> str: The raw output of lm-sensors for this fan.
+        query_fans() -> str: The current speed of this fan as reported by hwmon or lm-sensors.
     """
 
-    def __init__(self, fan_id: str, friendly_name: str | None = None):
+    def __init__(self, fan_id: str, friendly_name: str | None = None, source: str = "auto"):
         """
         Initialize the fan object with the given fan number.
 
@@ -35,6 +34,9 @@ class Fan(Sensor):
                                  For example : Fan('fan1', 'CPU') represents
                                  fan1 in lm-sensors
 
+            source (str): 'hwmon' to read sysfs directly, 'sensors' to parse
+                          lm-sensors output, or 'auto' to prefer hwmon.
+
             fan1:            537 RPM  (min =    0 RPM)
             fan2:            592 RPM  (min =    0 RPM)
             fan3:            576 RPM  (min =    0 RPM)
@@ -56,8 +58,8 @@ class Fan(Sensor):
         else:
             self.name = friendly_name
         self.fan_id = fan_id
+        self.source = source
 
-        self.fan_data_regex = r"^(fan\d+).*([0-9]{3,4})"
         # self.name = self.name
         super().__init__("fan")
 
@@ -83,33 +85,38 @@ class Fan(Sensor):
         Returns:
             fan_data (dict): A dictionary containing the fan speed data
         """
-        # Get the fan speed data from the sensors using a subprocess
-        command_output = subprocess.run(
-            f"sensors | grep {self.fan_id}", shell=True, capture_output=True, text=True, check=False
-        ).stdout.strip()
-
-        # Find all matches in the text {'fan1': '555', 'fan2': '1025'}
-        matches = re.findall(self.fan_data_regex, command_output, re.MULTILINE)
-
-        # Process the matches into dictionary format
-        speed = matches[0][1]
-        matches[0][0]
-        return speed
-        """
-        # Return the dictionary if non-empty
-        if fan_data:
-            speed = fan_data[self.fan_name]
-            return speed
-
-        # If no fan speed is matched, return a default or error value
-        print("Error: Fan speeds are all 0")
-        return "Error: Fan speeds are all 0"
-        """
-        return None
+        hwmon = HWMON.select(self.source)
+        if hwmon is not None:
+            feature = hwmon.find(self.fan_id, kind="fan")
+            if feature is not None:
+                return str(round(feature.read()))
+            if self.source == "hwmon":
+                raise LookupError(f"{self.fan_id} not found in hwmon")
+
+        # Fall back to the shared lm-sensors snapshot
+        speed = HWMON.sensors_snapshot().find(self.fan_id, kind="fan")
+        if speed is None:
+            raise LookupError(f"{self.fan_id} not found in sensors output")
+        return str(round(speed))
 
     @property
     def speed(self) -> int:
-        return int(self.query_fans()[0]) or 0
+        return int(self.query_fans()) or 0
+
+    async def aspeed(self) -> int:
+        """Async counterpart of `speed`, sharing the lm-sensors snapshot through asyncio."""
+        import asyncio
+
+        hwmon = HWMON.select(self.source)
+        feature = hwmon.find(self.fan_id, kind="fan") if hwmon is not None else None
+        if feature is not None:
+            return round(await asyncio.to_thread(feature.read))
+        if self.source == "hwmon":
+            raise LookupError(f"{self.fan_id} not found in hwmon")
+        speed = (await HWMON.asensors_snapshot()).find(self.fan_id, kind="fan")
+        if speed is None:
+            raise LookupError(f"{self.fan_id} not found in sensors output")
+        return round(speed)
 
     def __str__(self) -> str:
         return f"{self.name}: {self.speed} RPM"
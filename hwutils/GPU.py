@@ -1,8 +1,444 @@
 #!/usr/bin/env python3
 
+import atexit
+import datetime
+import queue
 import re
 import subprocess
-from dataclasses import dataclass
+import sys
+import threading
+from dataclasses import dataclass, replace
+
+from . import INVENTORY
+from .LOGGER import Column, Logger, RowFormatter
+from .Sensor import run_command
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+# Fields requested from `nvidia-smi --query-gpu` for a single snapshot, in output order.
+SNAPSHOT_FIELDS = (
+    "timestamp",
+    "temperature.gpu",
+    "temperature.memory",
+    "clocks.current.graphics",
+    "clocks.max.graphics",
+    "clocks.current.memory",
+    "clocks.max.memory",
+    "utilization.gpu",
+    "utilization.memory",
+    "power.draw",
+    "fan.speed",
+    "memory.used",
+    "memory.total",
+)
+
+# Columns of `GpuData.csv` and `GpuData.logger`, taken from a `GpuSnapshot`
+TIMESTAMP_COLUMN = Column("timestamp", "Time")
+CSV_COLUMNS = (
+    Column("core_temp", "Temp", " °C"),
+    Column("voltage", "Voltage", " V"),
+    Column("core_clock", "Core Clock", " MHz"),
+    Column("core_usage", "Core Usage", " %"),
+    Column("power", "Power", " W", round),
+    Column("memory_clock", "Memory Clock", " MHz"),
+    Column("memory_usage", "Memory Usage", " %"),
+)
+
+voltage_regex = re.compile(r"Graphics\s*:\s*(\d+\.?\d*)")
+
+
+def _parse_voltage(output: str) -> float:
+    """Return the graphics voltage in volts from `nvidia-smi -q --display=Voltage` output."""
+    match = voltage_regex.search(output)
+    if not match:
+        raise ValueError(f"Voltage not found in nvidia-smi output: {output.strip()!r}")
+    return round(float(match.group(1)) / 1000, 2)
+
+
+def _parse_int(value: str) -> int | None:
+    """Parse an integer field from nvidia-smi, returning None for `[N/A]` style values."""
+    try:
+        return round(float(value))
+    except ValueError:
+        return None
+
+
+def _parse_float(value: str) -> float | None:
+    """Parse a float field from nvidia-smi, returning None for `[N/A]` style values."""
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class GpuSnapshot:
+    """An immutable set of GPU readings taken at the same instant.
+
+    Attributes:
+    ----------
+        timestamp (str): Time reported by the driver when the snapshot was taken.
+        core_temp (int | None): Temperature of the GPU core in Celsius.
+        memory_temp (int | None): Temperature of the GPU memory in Celsius.
+        core_clock (int | None): Current graphics clock in MHz.
+        max_core_clock (int | None): Maximum graphics clock in MHz.
+        memory_clock (int | None): Current memory clock in MHz.
+        max_memory_clock (int | None): Maximum memory clock in MHz.
+        core_usage (int | None): GPU core utilization as a percentage.
+        memory_usage (int | None): GPU memory utilization as a percentage.
+        power (float | None): Power draw in Watts.
+        fan_speed (int | None): Fan speed as a percentage of its maximum.
+        memory_used (int | None): Framebuffer memory in use, in MiB.
+        memory_total (int | None): Total framebuffer memory, in MiB.
+        voltage (float | None): Graphics voltage in volts, if it was requested.
+    """
+
+    timestamp: str
+    core_temp: int | None
+    memory_temp: int | None
+    core_clock: int | None
+    max_core_clock: int | None
+    memory_clock: int | None
+    max_memory_clock: int | None
+    core_usage: int | None
+    memory_usage: int | None
+    power: float | None
+    fan_speed: int | None
+    memory_used: int | None
+    memory_total: int | None
+    voltage: float | None = None
+
+    @classmethod
+    def from_csv(cls, line: str, voltage: float | None = None) -> "GpuSnapshot":
+        """Build a snapshot from one `--format=csv,noheader,nounits` line of `SNAPSHOT_FIELDS`."""
+        values = [value.strip() for value in line.split(",")]
+        if len(values) != len(SNAPSHOT_FIELDS):
+            raise ValueError(f"Expected {len(SNAPSHOT_FIELDS)} fields, got {len(values)}: {line!r}")
+        (
+            timestamp,
+            core_temp,
+            memory_temp,
+            core_clock,
+            max_core_clock,
+            memory_clock,
+            max_memory_clock,
+            core_usage,
+            memory_usage,
+            power,
+            fan_speed,
+            memory_used,
+            memory_total,
+        ) = values
+        return cls(
+            timestamp=timestamp,
+            core_temp=_parse_int(core_temp),
+            memory_temp=_parse_int(memory_temp),
+            core_clock=_parse_int(core_clock),
+            max_core_clock=_parse_int(max_core_clock),
+            memory_clock=_parse_int(memory_clock),
+            max_memory_clock=_parse_int(max_memory_clock),
+            core_usage=_parse_int(core_usage),
+            memory_usage=_parse_int(memory_usage),
+            power=_parse_float(power),
+            fan_speed=_parse_int(fan_speed),
+            memory_used=_parse_int(memory_used),
+            memory_total=_parse_int(memory_total),
+            voltage=voltage,
+        )
+
+
+class SmiBackend:
+    """Read GPU data by running nvidia-smi once per snapshot."""
+
+    @staticmethod
+    def _command(index: int) -> list[str]:
+        return [
+            "nvidia-smi",
+            f"--id={index}",
+            f"--query-gpu={','.join(SNAPSHOT_FIELDS)}",
+            "--format=csv,noheader,nounits",
+        ]
+
+    def snapshot(self, index: int) -> GpuSnapshot:
+        """Query every field in `SNAPSHOT_FIELDS` for GPU `index` with a single nvidia-smi call."""
+        output = subprocess.run(self._command(index), capture_output=True, text=True, check=False)
+        return GpuSnapshot.from_csv(output.stdout.strip())
+
+    async def asnapshot(self, index: int, timeout: float | None = 5.0) -> GpuSnapshot:
+        """Async counterpart of `snapshot`, running nvidia-smi as an asyncio subprocess."""
+        output = await run_command(*self._command(index), timeout=timeout)
+        return GpuSnapshot.from_csv(output.strip())
+
+    def name(self, index: int) -> str:
+        """Return the full product name of GPU `index`."""
+        return subprocess.run(
+            ["nvidia-smi", f"--id={index}", "--query-gpu=name", "--format=csv,noheader"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout.strip()
+
+
+class NvmlBackend:
+    """Read GPU data through NVML library calls instead of spawning nvidia-smi.
+
+    NVML is initialized once per backend and device handles are cached by index, so a
+    snapshot costs a handful of library calls. Readings the device does not support are
+    reported as None, the same as `[N/A]` from nvidia-smi.
+    """
+
+    def __init__(self, nvml=None):
+        """
+        Initialize NVML.
+
+        Parameters:
+        -----------
+            nvml (module): The `pynvml` module, or a stand-in exposing the same API.
+                           Defaults to the installed `pynvml`.
+
+        Raises:
+        -----------
+            ImportError: If `pynvml` is not installed.
+            pynvml.NVMLError: If the driver library cannot be loaded.
+        """
+        if nvml is None:
+            if pynvml is None:
+                raise ImportError("pynvml is not installed (pip install nvidia-ml-py)")
+            nvml = pynvml
+        self.nvml = nvml
+        self.nvml.nvmlInit()
+        atexit.register(self.nvml.nvmlShutdown)
+        self._handles = {}
+
+    def handle(self, index: int):
+        """Return the cached NVML device handle for GPU `index`."""
+        if index not in self._handles:
+            self._handles[index] = self.nvml.nvmlDeviceGetHandleByIndex(index)
+        return self._handles[index]
+
+    def _call(self, function, *args):
+        """Call an NVML function, returning None if the device does not support it."""
+        try:
+            return function(*args)
+        except self.nvml.NVMLError:
+            return None
+
+    def snapshot(self, index: int) -> GpuSnapshot:
+        """Read the fields of a `GpuSnapshot` for GPU `index` through NVML."""
+        nvml = self.nvml
+        handle = self.handle(index)
+        utilization = self._call(nvml.nvmlDeviceGetUtilizationRates, handle)
+        memory = self._call(nvml.nvmlDeviceGetMemoryInfo, handle)
+        power = self._call(nvml.nvmlDeviceGetPowerUsage, handle)
+        return GpuSnapshot(
+            # Match the `timestamp` format used by nvidia-smi
+            timestamp=datetime.datetime.now().strftime("%Y/%m/%d %H:%M:%S.%f")[:-3],
+            core_temp=self._call(nvml.nvmlDeviceGetTemperature, handle, nvml.NVML_TEMPERATURE_GPU),
+            # NVML has no public call for memory temperature
+            memory_temp=None,
+            core_clock=self._call(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_GRAPHICS),
+            max_core_clock=self._call(
+                nvml.nvmlDeviceGetMaxClockInfo, handle, nvml.NVML_CLOCK_GRAPHICS
+            ),
+            memory_clock=self._call(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_MEM),
+            max_memory_clock=self._call(
+                nvml.nvmlDeviceGetMaxClockInfo, handle, nvml.NVML_CLOCK_MEM
+            ),
+            core_usage=utilization.gpu if utilization is not None else None,
+            memory_usage=utilization.memory if utilization is not None else None,
+            power=power / 1000 if power is not None else None,
+            fan_speed=self._call(nvml.nvmlDeviceGetFanSpeed, handle),
+            memory_used=memory.used // 1024**2 if memory is not None else None,
+            memory_total=memory.total // 1024**2 if memory is not None else None,
+        )
+
+    async def asnapshot(self, index: int, timeout: float | None = None) -> GpuSnapshot:
+        """Async counterpart of `snapshot`. NVML calls take microseconds, so they run inline."""
+        return self.snapshot(index)
+
+    def name(self, index: int) -> str:
+        """Return the full product name of GPU `index`."""
+        name = self.nvml.nvmlDeviceGetName(self.handle(index))
+        # Older releases of nvidia-ml-py return bytes
+        return name.decode() if isinstance(name, bytes) else name
+
+
+class SmiStreamBackend:
+    """Read GPU data from one long-lived `nvidia-smi --loop-ms` process.
+
+    A background thread parses every line nvidia-smi prints into the latest snapshot for
+    that GPU, so reading a snapshot is a lock-protected lookup with no process spawn. If
+    nvidia-smi exits unexpectedly it is restarted after `restart_delay` seconds.
+    """
+
+    def __init__(
+        self,
+        interval_ms: int = 1000,
+        samples: queue.Queue | None = None,
+        command: str = "nvidia-smi",
+        restart_delay: float = 1.0,
+        timeout: float = 5.0,
+    ):
+        """
+        Start the nvidia-smi child and the reader thread.
+
+        Parameters:
+        -----------
+            interval_ms (int): Sampling interval passed to `--loop-ms`.
+            samples (queue.Queue): Optional queue that receives `(index, GpuSnapshot)` for
+                                   every line read. Samples are dropped while it is full.
+            command (str): The nvidia-smi executable to run, e.g. a fake script in tests.
+            restart_delay (float): Seconds to wait before restarting a crashed child.
+            timeout (float): Seconds `snapshot` waits for the first reading of a GPU.
+        """
+        self.interval_ms = interval_ms
+        self.samples = samples
+        self.command = command
+        self.restart_delay = restart_delay
+        self.timeout = timeout
+        self.restarts = 0
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._updated = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._process = None
+        self._thread = threading.Thread(target=self._run, name="nvidia-smi-stream", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Keep an nvidia-smi child running and parse its output until `close` is called."""
+        while True:
+            # Spawn under the lock `close` takes, so a child is never started after it ran
+            with self._lock:
+                if self._stop.is_set():
+                    return
+                try:
+                    process = self._process = subprocess.Popen(
+                        [
+                            self.command,
+                            f"--query-gpu=index,{','.join(SNAPSHOT_FIELDS)}",
+                            "--format=csv,noheader,nounits",
+                            f"--loop-ms={self.interval_ms}",
+                        ],
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL,
+                        text=True,
+                    )
+                except OSError:
+                    process = None
+            if process is None:
+                self._stop.wait(self.restart_delay)
+                continue
+            for line in process.stdout:
+                self._parse(line)
+            process.wait()
+            if not self._stop.wait(self.restart_delay):
+                self.restarts += 1
+
+    def _parse(self, line: str) -> None:
+        """Store one line of `index,SNAPSHOT_FIELDS` output as the latest snapshot."""
+        index, _, fields = line.strip().partition(",")
+        try:
+            index = int(index)
+            snapshot = GpuSnapshot.from_csv(fields)
+        except ValueError:
+            return
+        with self._updated:
+            self._latest[index] = snapshot
+            self._updated.notify_all()
+        if self.samples is not None:
+            try:
+                self.samples.put_nowait((index, snapshot))
+            except queue.Full:
+                pass
+
+    def snapshot(self, index: int) -> GpuSnapshot:
+        """Return the most recent snapshot of GPU `index`, waiting for the first one if needed."""
+        with self._updated:
+            if not self._updated.wait_for(lambda: index in self._latest, self.timeout):
+                raise TimeoutError(f"No reading from {self.command} for GPU {index}")
+            return self._latest[index]
+
+    async def asnapshot(self, index: int, timeout: float | None = None) -> GpuSnapshot:
+        """Async counterpart of `snapshot`, only leaving the loop to wait for a first reading."""
+        import asyncio
+
+        with self._lock:
+            if index in self._latest:
+                return self._latest[index]
+        return await asyncio.to_thread(self.snapshot, index)
+
+    def name(self, index: int) -> str:
+        """Return the full product name of GPU `index`."""
+        return SmiBackend().name(index)
+
+    def close(self) -> None:
+        """Stop the reader thread and terminate the nvidia-smi child."""
+        with self._lock:
+            self._stop.set()
+            process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=self.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._thread.join(self.timeout)
+        if process is not None and process.stdout is not None:
+            process.stdout.close()
+
+    def __enter__(self) -> "SmiStreamBackend":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+_nvml_backend = None
+# Why NVML could not be loaded, so a failed nvmlInit is not retried by every `GpuData`
+_nvml_error = None
+_stream_backend = None
+
+
+def get_backend(backend: str = "auto"):
+    """
+    Return the backend used to read GPU data.
+
+    Parameters:
+    -----------
+        backend (str): 'nvml' for direct NVML calls, 'smi' for nvidia-smi subprocesses,
+                       'stream' for one long-lived `nvidia-smi --loop-ms` process,
+                       or 'auto' to use NVML when it can be loaded and nvidia-smi otherwise.
+
+    Returns:
+    -----------
+        NvmlBackend | SmiStreamBackend | SmiBackend: The selected backend. The NVML and
+                                                     stream backends are shared so they
+                                                     are only started once per process.
+    """
+    global _nvml_backend, _nvml_error, _stream_backend
+    if backend == "smi":
+        return SmiBackend()
+    if backend == "stream":
+        if _stream_backend is None:
+            _stream_backend = SmiStreamBackend()
+        return _stream_backend
+    if backend not in {"auto", "nvml"}:
+        raise ValueError(f"Unknown GPU backend: {backend!r}")
+    if _nvml_backend is None:
+        if _nvml_error is None:
+            try:
+                _nvml_backend = NvmlBackend()
+            except Exception as error:
+                _nvml_error = error
+        if _nvml_error is not None:
+            if backend == "nvml":
+                raise _nvml_error
+            return SmiBackend()
+    return _nvml_backend
 
 
 @dataclass
@@ -14,44 +450,114 @@ class GpuData:
     ----------
         type (str): Type of the device, always 'GPU'.
         name (str): Name of the GPU.
+        index (int): Index of the GPU as reported by nvidia-smi.
+        backend: Where readings come from, see `get_backend`.
 
     Properties:
     -----------
-        temp : str
+        temp : int
             Current temperature of the GPU core.
-        core_temp : str
+        core_temp : int
             Current temperature of the GPU core.
-        memory_temp : str
+        memory_temp : int | None
             Current temperature of the GPU memory.
-        core_clock : str
+        core_clock : int
             Current graphics clock speed of the GPU in MHz.
-        max_core_clock : str
+        max_core_clock : int
             Maximum graphics clock speed of the GPU in MHz.
-        memory_clock : str
+        memory_clock : int
             Current memory clock speed of the GPU in MHz.
-        max_memory_clock : str
+        max_memory_clock : int
             Maximum memory clock speed of the GPU in MHz.
-        memory_usage : str
+        memory_usage : int
             Current utilization of the GPU memory as a percentage.
         voltage : float
             Voltage of the GPU in volts.
         power : int
             Current power draw of the GPU in Watts.
-        core_usage : str
+        core_usage : int
             Current utilization of the GPU cores as a percentage.
         timestamp : str
             The time when nvidia-smi was last run.
 
     Methods:
+        snapshot(voltage=False) -> GpuSnapshot:
+            Return all readings from a single nvidia-smi invocation.
         gpu_name(short=False) -> str:
             Return the name of the GPU. If short is True, return only model number.
 
     """
 
-    def __init__(self):
+    def __init__(self, index: int = 0, backend="auto"):
+        """
+        Parameters:
+        -----------
+            index (int): Index of the GPU to query.
+            backend (str | object): A backend name accepted by `get_backend`, or a backend
+                                    instance such as `SmiStreamBackend(interval_ms=100)`.
+        """
         self.type = "GPU"
+        self.index = index
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
         self.name = self.gpu_name(short=True)
 
+    def snapshot(self, voltage: bool = False) -> GpuSnapshot:
+        """
+        Read every field of a `GpuSnapshot` from the backend in one go.
+
+        Parameters:
+        -----------
+            voltage (bool): Also query the graphics voltage. Neither NVML nor
+                            `nvidia-smi --query-gpu` expose voltage, so this costs an
+                            extra nvidia-smi call.
+
+        Returns:
+        -----------
+            GpuSnapshot: Readings for this GPU, all taken at the same instant.
+        """
+        snapshot = self.backend.snapshot(self.index)
+        if voltage:
+            return replace(snapshot, voltage=self.query_voltage())
+        return snapshot
+
+    async def asnapshot(self, voltage: bool = False, timeout: float | None = 5.0) -> GpuSnapshot:
+        """
+        Async counterpart of `snapshot`.
+
+        Parameters:
+        -----------
+            voltage (bool): Also query the graphics voltage.
+            timeout (float): Seconds to wait for each nvidia-smi call before killing it.
+        """
+        snapshot = await self.backend.asnapshot(self.index, timeout)
+        if voltage:
+            return replace(snapshot, voltage=await self.aquery_voltage(timeout))
+        return snapshot
+
+    def query_voltage(self) -> float:
+        """
+        Query the graphics voltage of the GPU in volts.
+
+        Returns:
+        -----------
+
+            float: Voltage of the GPU in volts.
+        """
+        output = subprocess.run(
+            ["nvidia-smi", f"--id={self.index}", "-q", "--display=Voltage"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout
+        return _parse_voltage(output)
+
+    async def aquery_voltage(self, timeout: float | None = 5.0) -> float:
+        """Async counterpart of `query_voltage`."""
+        output = await run_command(
+            "nvidia-smi", f"--id={self.index}", "-q", "--display=Voltage", timeout=timeout
+        )
+        return _parse_voltage(output)
+
     @property
     def temp(self):
         """
@@ -60,7 +566,7 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current temperature of the GPU core in Celsius.
+            int: Current temperature of the GPU core in Celsius.
         """
         return self.core_temp
 
@@ -72,16 +578,9 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current temperature of the GPU core in Celsius.
+            int: Current temperature of the GPU core in Celsius.
         """
-        # temperature.gpu
-        return subprocess.run(
-            "nvidia-smi --query-gpu=temperature.gpu --format=csv,noheader",
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        ).stdout.strip()
+        return self.snapshot().core_temp
 
     @property
     def memory_temp(self):
@@ -91,16 +590,9 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current temperature of the GPU memory in Celsius.
+            int | None: Current temperature of the GPU memory in Celsius, None if unsupported.
         """
-        # temperature.memory
-        return subprocess.run(
-            "nvidia-smi --query-gpu=temperature.memory --format=csv,noheader",
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        ).stdout.strip()
+        return self.snapshot().memory_temp
 
     @property
     def core_clock(self):
@@ -110,20 +602,9 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current graphics clock speed of the GPU in MHz.
+            int: Current graphics clock speed of the GPU in MHz.
         """
-        # clocks.current.graphics
-        return (
-            subprocess.run(
-                "nvidia-smi  --query-gpu=clocks.current.graphics  --format=csv,noheader",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            .stdout.replace("MHz", "")
-            .strip()
-        )
+        return self.snapshot().core_clock
 
     @property
     def max_core_clock(self):
@@ -133,20 +614,9 @@ class GpuData:
         Returns:
         -----------
 
-            str: Maximum graphics clock speed of the GPU in MHz.
+            int: Maximum graphics clock speed of the GPU in MHz.
         """
-        # clocks.max.graphics
-        return (
-            subprocess.run(
-                "nvidia-smi  --query-gpu=clocks.max.graphics  --format=csv,noheader",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            .stdout.replace("MHz", "")
-            .strip()
-        )
+        return self.snapshot().max_core_clock
 
     @property
     def memory_clock(self):
@@ -156,20 +626,9 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current memory clock speed of the GPU in MHz.
+            int: Current memory clock speed of the GPU in MHz.
         """
-        # clocks.current.memory
-        return (
-            subprocess.run(
-                "nvidia-smi  --query-gpu=clocks.current.memory  --format=csv,noheader",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            .stdout.replace("MHz", "")
-            .strip()
-        )
+        return self.snapshot().memory_clock
 
     @property
     def max_memory_clock(self):
@@ -179,20 +638,9 @@ class GpuData:
         Returns:
         -----------
 
-            str: Maximum memory clock speed of the GPU in MHz.
+            int: Maximum memory clock speed of the GPU in MHz.
         """
-        # clocks.max.memory
-        return (
-            subprocess.run(
-                "nvidia-smi  --query-gpu=clocks.max.memory  --format=csv,noheader",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            .stdout.replace("MHz", "")
-            .strip()
-        )
+        return self.snapshot().max_memory_clock
 
     @property
     def memory_usage(self):
@@ -202,19 +650,9 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current utilization of the GPU memory as a percentage.
+            int: Current utilization of the GPU memory as a percentage.
         """
-        return (
-            subprocess.run(
-                "nvidia-smi  --query-gpu=utilization.memory  --format=csv,noheader",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            .stdout.replace("%", "")
-            .strip()
-        )
+        return self.snapshot().memory_usage
 
     @property
     def voltage(self):
@@ -226,17 +664,7 @@ class GpuData:
 
             float: Voltage of the GPU in volts.
         """
-        voltage_regex = re.compile(r"(\d+.\d+)")
-        voltage_subprocess = subprocess.run(
-            'nvidia-smi  -q  --display=Voltage  |  grep -o -P "Graphics.*"',
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        ).stdout.strip()
-        matches = "  ".join(voltage_regex.findall(voltage_subprocess))
-        volts = round(float(matches) / 1000, 2)
-        return float(volts)
+        return self.query_voltage()
 
     @property
     def power(self):
@@ -246,21 +674,10 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current power draw of the GPU in Watts.
-        """
-        # power.draw
-        power = (
-            subprocess.run(
-                "nvidia-smi  --query-gpu=power.draw  --format=csv,noheader",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            .stdout.replace("W", "")
-            .strip()
-        )
-        return round(float(power))
+            int: Current power draw of the GPU in Watts.
+        """
+        power = self.snapshot().power
+        return round(power) if power is not None else None
 
     @property
     def core_usage(self):
@@ -270,23 +687,13 @@ class GpuData:
         Returns:
         -----------
 
-            str: Current GPU utilization in percentage.
+            int: Current GPU utilization in percentage.
         """
-        return (
-            subprocess.run(
-                "nvidia-smi  --query-gpu=utilization.gpu  --format=csv,noheader",
-                shell=True,
-                capture_output=True,
-                text=True,
-                check=False,
-            )
-            .stdout.replace("%", "")
-            .strip()
-        )
+        return self.snapshot().core_usage
 
     def gpu_name(self, short=False):
         """
-        Get the name of GPU.
+        Get the name of GPU from the cached hardware inventory.
 
         Returns:
         -----------
@@ -296,13 +703,7 @@ class GpuData:
         name_regex = re.compile(
             r"(AMD|NVIDIA|Intel)\s?(\s?GeForce\s?|\s?Radeon\s?)\s?(\sGTX\s?|\s?RTX\s?)(.*)"
         )
-        subout = subprocess.run(
-            "nvidia-smi  --query-gpu=name  --format=csv,noheader",
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        ).stdout.strip()
+        subout = INVENTORY.load().gpus.get(self.index) or self.backend.name(self.index)
         matches = name_regex.findall(subout)
         if short:
             self.name = matches[0][-1]
@@ -320,13 +721,7 @@ class GpuData:
 
             str : GPU timestamp in milliseconds since boot
         """
-        return subprocess.run(
-            "nvidia-smi  --query-gpu=timestamp  --format=csv,noheader",
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        ).stdout.strip()
+        return self.snapshot().timestamp
 
     @property
     def fan_speed(self):
@@ -335,16 +730,9 @@ class GpuData:
 
         Returns:
         -----------
-             str   : Fan speed in percentage
+             int   : Fan speed in percentage
         """
-        fan_speed = subprocess.run(
-            "nvidia-smi --query-gpu=fan.speed --format=csv,noheader",
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        ).stdout.strip()
-        return fan_speed.replace("%", "").strip()
+        return self.snapshot().fan_speed
 
     def csv(self, header=False, timestamp=False, units=False):
         """
@@ -359,69 +747,30 @@ class GpuData:
         --------
             csv (str): CSV string of object properties
         """
-        DATETIME_REGEX = re.compile(r"\d+(-|/)\d+(-|/)\d+\s\d+:\d+:\d+(\.\d+)?")
-        header_ = ""
+        columns = [TIMESTAMP_COLUMN, *CSV_COLUMNS] if timestamp else CSV_COLUMNS
+        formatter = RowFormatter(columns, units=units)
+        row = formatter.csv(self.snapshot(voltage=True))
+        if header:
+            return f"{formatter.header}\n{row}"
+        return row
 
-        unit_definitions = [" °C", " V", " MHz", " %", " W", " MHz", " %"]
-        template = f"{self.temp},{self.voltage},{self.core_clock},{self.core_usage},{self.power},{self.memory_clock},{self.memory_usage}"
+    def logger(self, target=sys.stdout, timestamp=True, voltage=True, **kwargs) -> Logger:
+        """
+        Returns a logger that writes one `csv` row (or NDJSON object) per snapshot.
 
-        if timestamp:
-            template = f"{self.timestamp},{template}"
-        if header:
-            if timestamp:
-                keys = [
-                    "Time",
-                    "Temp",
-                    "Voltage",
-                    "Core Clock",
-                    "Core Usage",
-                    "Power",
-                    "Memory Clock",
-                    "Memory Usage",
-                ]
-            else:
-                keys = [
-                    "Temp",
-                    "Voltage",
-                    "Core Clock",
-                    "Core Usage",
-                    "Power",
-                    "Memory Clock",
-                    "Memory Usage",
-                ]
-            header_ = ",".join(keys)
-            template = header_ + "\n" + template
-        # Append units to the end of each field
-        if units:
-            # The offset is used to account for the fact that we are adding units after each field
-            # rather than at the end of each field. Time allows us to skip the timestamp field when adding units.
-            offset = 0
-            # Ignore header when adding units
-            if header_:
-                values = template.replace(header_, "").lstrip().split(",")
-            else:
-                values = template.lstrip().split(",")
-            for i, value in enumerate(values):
-                try:
-                    if not DATETIME_REGEX.match(value):
-                        values[i] = f"{value}{unit_definitions[i - offset]}"
-                    else:
-                        # Dont assign a unit to the timestamp, so we subtract one from the unit index.
-                        offset = 1
-                except IndexError:
-                    pass
-            # Join back together with commas and add the header back in.
-            template = f'{header_}\n{", ".join(values)}' if header else ", ".join(values)
-        # Format the template with the data from this instance of the class
-        return template.format(
-            temp=self.temp,
-            voltage=self.voltage,
-            core_clock=self.core_clock,
-            core_usage=self.core_usage,
-            power=self.power,
-            memory_clock=self.memory_clock,
-            memory_usage=self.memory_usage,
-        )
+        Paramaters:
+        ---------
+            target (str | TextIO) : Path to append to, or an open text stream
+            timestamp (bool) : If True, include the timestamp column
+            voltage (bool) : If False, log the voltage as None to save one nvidia-smi call per row
+            **kwargs : Passed on to `LOGGER.Logger`, eg fmt='ndjson', units=True, compress=True
+
+        Returns:
+        --------
+            Logger: The logger, see `Logger.write` and `Logger.run`
+        """
+        columns = [TIMESTAMP_COLUMN, *CSV_COLUMNS] if timestamp else list(CSV_COLUMNS)
+        return Logger(lambda: self.snapshot(voltage=voltage), columns, target, **kwargs)
 
     def __str__(self):
         """
@@ -431,16 +780,18 @@ class GpuData:
         -----------
              str   : String representation of GPU object.
         """
+        snapshot = self.snapshot(voltage=True)
+        power = round(snapshot.power) if snapshot.power is not None else None
         return (
             f"GPU: {self.name}\n"
-            f"Core Temp: {self.core_temp} °C\n"
-            f"Core Clock: {self.core_clock} MHz\n"
-            f"Memory Clock: {self.memory_clock} MHz\n"
-            f"Memory Usage: {self.memory_usage}    %\n"
-            f"Core Usage: {self.core_usage}    %\n"
-            f"Power: {self.power} W\n"
-            f"Voltage: {self.voltage} V\n"
-            f"Fan fan_speed {self.fan_speed}%\n"  # Added this line
+            f"Core Temp: {snapshot.core_temp} °C\n"
+            f"Core Clock: {snapshot.core_clock} MHz\n"
+            f"Memory Clock: {snapshot.memory_clock} MHz\n"
+            f"Memory Usage: {snapshot.memory_usage}    %\n"
+            f"Core Usage: {snapshot.core_usage}    %\n"
+            f"Power: {power} W\n"
+            f"Voltage: {snapshot.voltage} V\n"
+            f"Fan fan_speed {snapshot.fan_speed}%\n"  # Added this line
         ).strip()
 
     def __call__(self):
@@ -478,6 +829,7 @@ if __name__ == "__main__":
     print(f"Full GPU Name: {gpu.gpu_name()}")
     print(f"Short GPU Name: {gpu.gpu_name(short=True)}")
     print(str(gpu))
+    print(gpu.snapshot())
     print("\nBASIC")
     print(gpu.csv())
     print("\nHEADER")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""HISTORY.py - Fixed-memory history of sensor readings."""
+
+import array
+import bisect
+import threading
+import time
+
+from .Sensor import SensorReading
+
+# Bytes stored per sample: a float64 value and an int64 timestamp, each written twice
+SAMPLE_BYTES = 2 * (8 + 8)
+
+# Default memory cap per metric (1 MiB, ~32k samples)
+MAX_BYTES = 1024**2
+
+
+class RingBuffer:
+    """Preallocated ring buffer of float64 values and int64 monotonic-ns timestamps.
+
+    Every sample is written twice, at slot `i` and `i + capacity`, so the most recent
+    `capacity` samples are always contiguous in memory. That lets `last` and `since`
+    return `memoryview` slices instead of copying. The views alias the buffer and are
+    overwritten by later appends, so copy them (eg `list(view)`) if you need to keep them.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.count = 0
+        self._next = 0
+        self._values = array.array("d", bytes(8 * 2 * capacity))
+        self._times = array.array("q", bytes(8 * 2 * capacity))
+
+    def append(self, value: float, timestamp_ns: int | None = None) -> None:
+        """Add a sample in O(1), overwriting the oldest once the buffer is full."""
+        if timestamp_ns is None:
+            timestamp_ns = time.monotonic_ns()
+        i = self._next
+        self._values[i] = self._values[i + self.capacity] = value
+        self._times[i] = self._times[i + self.capacity] = timestamp_ns
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last(self, n: int | None = None) -> tuple[memoryview, memoryview]:
+        """
+        Return the last `n` samples (all of them if `n` is None), oldest first.
+
+        Returns:
+        -----------
+            tuple[memoryview, memoryview]: Timestamps (int64 ns) and values (float64).
+        """
+        n = self.count if n is None else max(0, min(n, self.count))
+        end = self._next + self.capacity
+        return (
+            memoryview(self._times)[end - n : end],
+            memoryview(self._values)[end - n : end],
+        )
+
+    def since(self, seconds: float) -> tuple[memoryview, memoryview]:
+        """Return the samples taken in the last `seconds`, see `last`."""
+        times, values = self.last()
+        cutoff = time.monotonic_ns() - int(seconds * 1e9)
+        start = bisect.bisect_left(times, cutoff)
+        return times[start:], values[start:]
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class History:
+    """In-process history with one `RingBuffer` per metric.
+
+    Can be subscribed to a `Scheduler` directly:
+
+        history = History()
+        scheduler.subscribe(history.record)
+        timestamps, values = history["gpu.power"].since(60)
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        """
+        Parameters:
+        -----------
+            max_bytes (int): Hard memory cap for the samples of each metric.
+        """
+        self.capacity = max(1, max_bytes // SAMPLE_BYTES)
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, name: str) -> RingBuffer:
+        """Return the buffer of metric `name`, creating it on first use."""
+        with self._lock:
+            if name not in self._buffers:
+                self._buffers[name] = RingBuffer(self.capacity)
+            return self._buffers[name]
+
+    def append(self, name: str, value: float, timestamp_ns: int | None = None) -> None:
+        """Add one sample to metric `name`."""
+        self.buffer(name).append(value, timestamp_ns)
+
+    def record(self, readings: list[SensorReading]) -> None:
+        """Add a batch of readings, stamped with the current monotonic time."""
+        now = time.monotonic_ns()
+        for reading in readings:
+            self.append(reading.name or str(reading.id), reading.value, now)
+
+    def __getitem__(self, name: str) -> RingBuffer:
+        return self._buffers[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._buffers
+
+    def __iter__(self):
+        return iter(list(self._buffers))
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""HWMON.py - Read temperatures, fan speeds and voltages from hwmon sysfs or lm-sensors."""
+
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+
+from . import INVENTORY
+from .Sensor import run_command
+
+HWMON_ROOT = "/sys/class/hwmon"
+
+# Matches the sysfs attributes we read, eg temp2_input, fan1_input, in3_input
+input_regex = re.compile(r"^(temp|fan|in)(\d+)_input$")
+
+# Divisors converting the raw sysfs integers into °C, RPM and V
+SCALE = {"temp": 1000, "fan": 1, "in": 1000}
+
+SOURCES = ("auto", "hwmon", "sensors")
+
+# Seconds a `sensors -j` snapshot is shared before lm-sensors is run again
+SENSORS_TTL = 1.0
+
+
+def _natural_key(name: str) -> list:
+    """Sort key ordering numbered names by value, so temp2_input comes before temp10_input."""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+@dataclass(frozen=True, slots=True)
+class HwmonFeature:
+    """A single hwmon input file and the names it is known by.
+
+    Attributes:
+    ----------
+        chip (str): Driver name of the chip, from the `name` attribute (eg 'coretemp').
+        name (str): Name of the feature, eg 'temp2' or 'fan1'.
+        label (str): Contents of `<name>_label`, or `name` if the chip provides no label.
+        kind (str): One of 'temp', 'fan' or 'in'.
+        path (str): Path of the `<name>_input` file.
+    """
+
+    chip: str
+    name: str
+    label: str
+    kind: str
+    path: str
+
+    def read(self) -> float:
+        """Read the current value in °C, RPM or volts."""
+        with open(self.path, encoding="utf-8") as f:
+            return int(f.read()) / SCALE[self.kind]
+
+    def matches(self, key: str) -> bool:
+        """Return True if `key` names this feature, as a label or a sysfs name.
+
+        lm-sensors configs commonly label `inN` as `VINN`, so 'VIN3' also matches 'in3'.
+        """
+        return _matches(key, self.label, self.name, self.kind)
+
+
+def _matches(key: str, label: str, name: str, kind: str) -> bool:
+    """Return True if `key` is the label or sysfs name of a feature (see `HwmonFeature.matches`)."""
+    key_lower = key.lower()
+    return key in {label, name} or (
+        kind == "in" and key_lower.startswith("v") and key_lower[1:] == name
+    )
+
+
+class Hwmon:
+    """Index of the hwmon inputs present on this machine.
+
+    Directories and labels are discovered once when the object is created, unless
+    `features` are passed in from the inventory cache. After that every reading is a
+    single read of a small sysfs file.
+    """
+
+    def __init__(self, root: str = HWMON_ROOT, features: list[HwmonFeature] | None = None):
+        self.root = root
+        if features is None:
+            features = self.discover()
+        # Cached inventories may predate numeric ordering, and core numbers follow this order
+        self.features = sorted(features, key=lambda feature: _natural_key(feature.path))
+
+    def discover(self) -> list[HwmonFeature]:
+        """Walk `root` and return every temp, fan and in input found."""
+        features = []
+        for device in sorted(os.listdir(self.root), key=_natural_key):
+            path = os.path.join(self.root, device)
+            try:
+                with open(os.path.join(path, "name"), encoding="utf-8") as f:
+                    chip = f.read().strip()
+                entries = sorted(os.listdir(path), key=_natural_key)
+            except OSError:
+                continue
+            for entry in entries:
+                match = input_regex.match(entry)
+                if not match:
+                    continue
+                kind, number = match.groups()
+                name = f"{kind}{number}"
+                try:
+                    with open(os.path.join(path, f"{name}_label"), encoding="utf-8") as f:
+                        label = f.read().strip()
+                except OSError:
+                    label = name
+                features.append(HwmonFeature(chip, name, label, kind, os.path.join(path, entry)))
+        return features
+
+    def find(self, key: str, kind: str | None = None, chip: str | None = None):
+        """
+        Return the first feature named `key`, or None.
+
+        Parameters:
+        -----------
+            key (str): A label such as 'Core 0' or 'VIN3', or a sysfs name such as 'fan1'.
+            kind (str): Only consider 'temp', 'fan' or 'in' features.
+            chip (str): Only consider features of this chip.
+        """
+        for feature in self.features:
+            if (kind is None or feature.kind == kind) and (chip is None or feature.chip == chip):
+                if feature.matches(key):
+                    return feature
+        return None
+
+    def search(self, pattern: re.Pattern, kind: str | None = None) -> list[HwmonFeature]:
+        """Return all features whose label matches `pattern`."""
+        return [
+            feature
+            for feature in self.features
+            if (kind is None or feature.kind == kind) and pattern.match(feature.label)
+        ]
+
+
+_hwmon = None
+
+
+def select(source: str = "auto") -> Hwmon | None:
+    """
+    Resolve a `source` argument to the shared `Hwmon` index.
+
+    The index is built from the cached hardware inventory (see `INVENTORY.load`), so
+    sysfs is only walked on the first run after each boot.
+
+    Parameters:
+    -----------
+        source (str): 'hwmon' to require sysfs, 'sensors' to always use lm-sensors,
+                      or 'auto' to use sysfs when it is available.
+
+    Returns:
+    -----------
+        Hwmon | None: The shared index, or None if lm-sensors should be used instead.
+
+    Raises:
+    -----------
+        FileNotFoundError: If `source` is 'hwmon' and sysfs hwmon is not available.
+    """
+    global _hwmon
+    if source not in SOURCES:
+        raise ValueError(f"Unknown sensor source: {source!r}, expected one of {SOURCES}")
+    if source == "sensors":
+        return None
+    if _hwmon is None:
+        features = INVENTORY.load().hwmon
+        if not features and source == "hwmon":
+            raise FileNotFoundError(f"No hwmon inputs found under {HWMON_ROOT}")
+        _hwmon = Hwmon(features=features)
+    return _hwmon
+
+
+class SensorsSnapshot:
+    """Parsed output of one `sensors -j` run.
+
+    Attributes:
+    ----------
+        tree (dict): chip -> feature label -> value of the feature's `*_input`.
+        taken (float): `time.monotonic()` when lm-sensors was run.
+    """
+
+    def __init__(self, data: dict, taken: float):
+        self.taken = taken
+        self.tree = {}
+        # (chip, label, sysfs name, kind) of every feature, for name lookups
+        self._features = []
+        for chip, features in data.items():
+            self.tree[chip] = {}
+            for label, subfeatures in features.items():
+                if not isinstance(subfeatures, dict):
+                    continue  # eg "Adapter": "ISA adapter"
+                for subfeature, value in subfeatures.items():
+                    match = input_regex.match(subfeature)
+                    if match:
+                        self.tree[chip][label] = float(value)
+                        self._features.append((chip, label, "".join(match.groups()), match[1]))
+                        break
+
+    @classmethod
+    def query(cls) -> "SensorsSnapshot":
+        """Run `sensors -j` and parse its output. Empty if lm-sensors is not installed."""
+        try:
+            output = subprocess.run(["sensors", "-j"], capture_output=True, text=True, check=False)
+        except FileNotFoundError:
+            return cls({}, time.monotonic())
+        return cls.from_output(output.stdout)
+
+    @classmethod
+    def from_output(cls, output: str) -> "SensorsSnapshot":
+        """Parse the output of `sensors -j`."""
+        return cls(json.loads(output) if output.strip() else {}, time.monotonic())
+
+    def find(self, key: str, kind: str | None = None) -> float | None:
+        """Return the value of the first feature named `key`, see `Hwmon.find`."""
+        for chip, label, name, feature_kind in self._features:
+            if (kind is None or feature_kind == kind) and _matches(key, label, name, feature_kind):
+                return self.tree[chip][label]
+        return None
+
+    def search(self, pattern: re.Pattern, kind: str | None = None) -> list[float]:
+        """Return the values of all features whose label matches `pattern`."""
+        return [
+            self.tree[chip][label]
+            for chip, label, _, feature_kind in self._features
+            if (kind is None or feature_kind == kind) and pattern.match(label)
+        ]
+
+    def items(self, kind: str | None = None) -> list[tuple[str, str, float]]:
+        """Return (chip, label, value) of every feature, optionally only those of `kind`."""
+        return [
+            (chip, label, self.tree[chip][label])
+            for chip, label, _, feature_kind in self._features
+            if kind is None or feature_kind == kind
+        ]
+
+
+_sensors_snapshot = None
+_sensors_lock = threading.Lock()
+
+
+def sensors_snapshot(ttl: float | None = None) -> SensorsSnapshot:
+    """
+    Return the shared `sensors -j` snapshot, running lm-sensors again if it has expired.
+
+    Every `CpuData`, `Fan` and `Temp` reading through lm-sensors goes through here, so
+    polling any number of them costs one subprocess per `ttl` window.
+
+    Parameters:
+    -----------
+        ttl (float): Maximum age of the snapshot in seconds. Defaults to `SENSORS_TTL`.
+    """
+    global _sensors_snapshot
+    ttl = SENSORS_TTL if ttl is None else ttl
+    with _sensors_lock:
+        if _sensors_snapshot is None or time.monotonic() - _sensors_snapshot.taken >= ttl:
+            _sensors_snapshot = SensorsSnapshot.query()
+        return _sensors_snapshot
+
+
+_sensors_refresh = None
+
+
+async def _refresh_sensors(timeout: float | None) -> SensorsSnapshot:
+    """Run `sensors -j` asynchronously and make the result the shared snapshot."""
+    global _sensors_snapshot
+    try:
+        output = await run_command("sensors", "-j", timeout=timeout)
+    except FileNotFoundError:
+        output = ""  # lm-sensors is not installed
+    snapshot = SensorsSnapshot.from_output(output)
+    with _sensors_lock:
+        _sensors_snapshot = snapshot
+    return snapshot
+
+
+async def asensors_snapshot(ttl: float | None = None, timeout: float | None = 5.0):
+    """
+    Async counterpart of `sensors_snapshot` sharing the same cache.
+
+    Concurrent callers on one event loop wait for a single `sensors -j` run.
+    """
+    import asyncio
+
+    global _sensors_refresh
+    ttl = SENSORS_TTL if ttl is None else ttl
+    snapshot = _sensors_snapshot
+    if snapshot is not None and time.monotonic() - snapshot.taken < ttl:
+        return snapshot
+    loop = asyncio.get_running_loop()
+    refresh = _sensors_refresh
+    if refresh is None or refresh.done() or refresh.get_loop() is not loop:
+        _sensors_refresh = loop.create_task(_refresh_sensors(timeout))
+    # Shield the shared run so one cancelled caller does not cancel it for the others
+    return await asyncio.shield(_sensors_refresh)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""INVENTORY.py - Discover static hardware facts once and cache them across runs."""
+
+import json
+import os
+import subprocess
+from dataclasses import asdict, dataclass, field
+
+from . import HWMON
+
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "hwutils", "inventory.json"
+)
+BOOT_ID_PATH = "/proc/sys/kernel/random/boot_id"
+MACHINE_ID_PATH = "/etc/machine-id"
+
+
+@dataclass(frozen=True, slots=True)
+class Inventory:
+    """Facts about the machine that do not change while it is running.
+
+    Attributes:
+    ----------
+        boot_id (str): Kernel boot id the facts were discovered under.
+        machine_id (str): systemd machine id the facts were discovered on.
+        cpu_model (str): Model name of the CPU, eg 'Intel(R) Core(TM) i7-9700K CPU @ 3.60GHz'.
+        cores (int): Number of physical cores.
+        threads (int): Number of logical CPUs.
+        gpus (dict): GPU index -> product name, as reported by nvidia-smi.
+        hwmon (list): Every `HWMON.HwmonFeature`, which maps chip and label to a sysfs path.
+    """
+
+    boot_id: str
+    machine_id: str
+    cpu_model: str = ""
+    cores: int = 0
+    threads: int = 0
+    gpus: dict[int, str] = field(default_factory=dict)
+    hwmon: list = field(default_factory=list)
+
+    @classmethod
+    def discover(cls) -> "Inventory":
+        """Collect every fact from the running system."""
+        cpu_model, cores, threads = _cpu_topology()
+        try:
+            hwmon = HWMON.Hwmon().features
+        except OSError:
+            hwmon = []
+        return cls(
+            boot_id=_read_id(BOOT_ID_PATH),
+            machine_id=_read_id(MACHINE_ID_PATH),
+            cpu_model=cpu_model,
+            cores=cores,
+            threads=threads,
+            gpus=_gpus(),
+            hwmon=hwmon,
+        )
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Inventory":
+        """Rebuild an inventory saved by `to_json`."""
+        return cls(
+            boot_id=data["boot_id"],
+            machine_id=data["machine_id"],
+            cpu_model=data["cpu_model"],
+            cores=data["cores"],
+            threads=data["threads"],
+            # JSON object keys are always strings
+            gpus={int(index): name for index, name in data["gpus"].items()},
+            hwmon=[HWMON.HwmonFeature(**feature) for feature in data["hwmon"]],
+        )
+
+    def to_json(self) -> dict:
+        """Return the inventory as JSON-serializable data."""
+        return asdict(self)
+
+
+def _read_id(path: str) -> str:
+    """Return the contents of an id file such as `/etc/machine-id`, or '' if it is missing."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _cpu_topology() -> tuple[str, int, int]:
+    """Return the CPU model name, physical core count and logical CPU count from /proc/cpuinfo."""
+    model = ""
+    threads = 0
+    cores = set()
+    physical_id = core_id = None
+    with open("/proc/cpuinfo", encoding="utf-8") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            key = key.strip()
+            value = value.strip()
+            if key == "processor":
+                threads += 1
+            elif key == "model name" and not model:
+                model = value
+            elif key == "physical id":
+                physical_id = value
+            elif key == "core id":
+                core_id = value
+            elif not key and core_id is not None:
+                # A blank line ends the block of one logical CPU
+                cores.add((physical_id, core_id))
+                physical_id = core_id = None
+    if core_id is not None:
+        cores.add((physical_id, core_id))
+    return model, len(cores) or threads, threads
+
+
+def _gpus() -> dict[int, str]:
+    """Return GPU index -> name from nvidia-smi, or an empty dict if there are no NVIDIA GPUs."""
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=index,name", "--format=csv,noheader"],
+            capture_output=True,
+            text=True,
+            check=False,
+        ).stdout
+    except OSError:
+        return {}
+    gpus = {}
+    for line in output.splitlines():
+        index, _, name = line.partition(",")
+        if index.strip().isdigit():
+            gpus[int(index)] = name.strip()
+    return gpus
+
+
+_inventory = None
+
+
+def load(path: str = CACHE_PATH, refresh: bool = False) -> Inventory:
+    """
+    Return the inventory, discovering it only if the cache is missing or stale.
+
+    The cache is reused only when its boot id and machine id match the running system,
+    so hwmon paths renumbered by a reboot are never trusted.
+
+    Parameters:
+    -----------
+        path (str): Location of the cache file.
+        refresh (bool): Ignore the cache and discover everything again.
+    """
+    global _inventory
+    if _inventory is not None and not refresh:
+        return _inventory
+
+    boot_id = _read_id(BOOT_ID_PATH)
+    machine_id = _read_id(MACHINE_ID_PATH)
+    if not refresh:
+        try:
+            with open(path, encoding="utf-8") as f:
+                cached = Inventory.from_json(json.load(f))
+            if (cached.boot_id, cached.machine_id) == (boot_id, machine_id):
+                _inventory = cached
+                return _inventory
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    _inventory = Inventory.discover()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial cache
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(_inventory.to_json(), f)
+        os.replace(temporary, path)
+    except OSError:
+        pass
+    return _inventory
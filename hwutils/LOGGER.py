@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""LOGGER.py - Stream snapshots to CSV or NDJSON files, one sample per row."""
+
+import gzip
+import json
+import os
+import sys
+import time
+from collections.abc import Callable
+from typing import NamedTuple, TextIO
+
+FORMATS = ("csv", "ndjson")
+
+
+class Column(NamedTuple):
+    """One column of a log row.
+
+    Attributes:
+    ----------
+        key (str): Attribute of the snapshot holding the value, also the NDJSON key.
+        header (str): Name of the column in the CSV header.
+        unit (str): Suffix appended to CSV values when units are requested, eg ' °C'.
+        convert (Callable): Applied to non-None values before formatting, eg `round`.
+    """
+
+    key: str
+    header: str
+    unit: str = ""
+    convert: Callable | None = None
+
+
+class RowFormatter:
+    """Render snapshots as rows through formatters precomputed from `columns`."""
+
+    def __init__(self, columns: list[Column], units: bool = False):
+        self.columns = list(columns)
+        self.header = ",".join(column.header for column in self.columns)
+        # Rows with units have always been separated by ", "
+        self.separator = ", " if units else ","
+        self._formats = [
+            (column.key, column.convert, column.unit if units else "") for column in self.columns
+        ]
+
+    def values(self, snapshot) -> dict:
+        """Return column key -> converted value for `snapshot`."""
+        values = {}
+        for key, convert, _ in self._formats:
+            value = getattr(snapshot, key)
+            values[key] = convert(value) if convert is not None and value is not None else value
+        return values
+
+    def csv(self, snapshot) -> str:
+        """Return `snapshot` as one CSV row, without a trailing newline."""
+        fields = []
+        for key, convert, unit in self._formats:
+            value = getattr(snapshot, key)
+            if convert is not None and value is not None:
+                value = convert(value)
+            fields.append(f"{value}{unit}")
+        return self.separator.join(fields)
+
+    def ndjson(self, snapshot) -> str:
+        """Return `snapshot` as one JSON object, without a trailing newline."""
+        return json.dumps(self.values(snapshot), default=str, ensure_ascii=False)
+
+
+class Logger:
+    """Write one row per snapshot to a file or stream.
+
+    The header is written once, rows are formatted through a `RowFormatter` and writes
+    go through a buffered (optionally gzip-compressed) file. Usually created through
+    `GpuData.logger` or `CpuData.logger`:
+
+        with GpuData().logger("gpu.csv.gz", compress=True) as log:
+            log.run(interval=1.0)
+    """
+
+    def __init__(
+        self,
+        read: Callable,
+        columns: list[Column],
+        target: str | TextIO = sys.stdout,
+        fmt: str = "csv",
+        units: bool = False,
+        header: bool = True,
+        compress: bool = False,
+        buffer_size: int = 64 * 1024,
+    ):
+        """
+        Parameters:
+        -----------
+            read (Callable): Returns one snapshot per call, eg `cpu.sample`.
+            columns (list[Column]): Columns of every row.
+            target (str | TextIO): Path to append to, or an open text stream.
+            fmt (str): 'csv' or 'ndjson'.
+            units (bool): Append units to CSV values.
+            header (bool): Write the CSV header, unless the file already has content.
+            compress (bool): Gzip the file. Only applies when `target` is a path.
+            buffer_size (int): Size of the write buffer in bytes.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown log format: {fmt!r}, expected one of {FORMATS}")
+        self.read = read
+        self.fmt = fmt
+        self.formatter = RowFormatter(columns, units=units)
+        self._render = self.formatter.csv if fmt == "csv" else self.formatter.ndjson
+        self.rows = 0
+
+        if isinstance(target, str):
+            has_content = os.path.exists(target) and os.path.getsize(target) > 0
+            if compress:
+                self._file = gzip.open(target, "at", encoding="utf-8")
+            else:
+                self._file = open(target, "a", encoding="utf-8", buffering=buffer_size)
+            self._owned = True
+        else:
+            has_content = False
+            self._file = target
+            self._owned = False
+
+        if fmt == "csv" and header and not has_content:
+            self._file.write(self.formatter.header + "\n")
+
+    def write(self, snapshot=None) -> None:
+        """Write one row from `snapshot`, taking a new snapshot if none is given."""
+        self._file.write(self._render(self.read() if snapshot is None else snapshot) + "\n")
+        self.rows += 1
+
+    def run(self, interval: float = 1.0, count: int | None = None) -> None:
+        """
+        Write a row every `interval` seconds.
+
+        Parameters:
+        -----------
+            interval (float): Seconds between rows, kept on a fixed monotonic grid.
+            count (int): Number of rows to write, forever if None.
+        """
+        due = time.monotonic()
+        written = 0
+        while count is None or written < count:
+            self.write()
+            written += 1
+            due += interval
+            time.sleep(max(0.0, due - time.monotonic()))
+
+    def flush(self) -> None:
+        """Flush buffered rows to the target."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flush, and close the file if the logger opened it."""
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> "Logger":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
@@ -2,19 +2,133 @@
 
 # Network.py - Query network information for HWINFO
 
+import os
+import socket
 import subprocess
+import time
+from dataclasses import dataclass
 
 import psutil
 
-from .Sensor import Sensor
+from . import NETLINK
+from .Sensor import Sensor, counter_delta
+
+NET_DEV_PATH = "/proc/net/dev"
+
+# Columns of /proc/net/dev after the interface name that the rate monitor keeps
+# (rx bytes, packets, errs, drop, then tx bytes, packets, errs, drop)
+NET_DEV_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+
+
+def read_net_dev(data: bytes) -> dict[str, tuple[int, ...]]:
+    """Parse /proc/net/dev into interface -> counters in `NET_DEV_COLUMNS` order."""
+    counters = {}
+    # The first two lines are headers
+    for line in data.split(b"\n")[2:]:
+        name, _, values = line.partition(b":")
+        if not values:
+            continue
+        values = values.split()
+        counters[name.strip().decode()] = tuple(int(values[i]) for i in NET_DEV_COLUMNS)
+    return counters
+
+
+@dataclass(frozen=True, slots=True)
+class InterfaceRates:
+    """Per-second rates of one interface between two readings of /proc/net/dev.
+
+    Attributes:
+    ----------
+        interface (str): Name of the interface, eg 'eth0' or 'veth1a2b3c'.
+        rx_bytes (float): Bytes received per second.
+        rx_packets (float): Packets received per second.
+        rx_errors (float): Receive errors per second.
+        rx_drops (float): Received packets dropped per second.
+        tx_bytes (float): Bytes sent per second.
+        tx_packets (float): Packets sent per second.
+        tx_errors (float): Transmit errors per second.
+        tx_drops (float): Outgoing packets dropped per second.
+    """
+
+    interface: str
+    rx_bytes: float
+    rx_packets: float
+    rx_errors: float
+    rx_drops: float
+    tx_bytes: float
+    tx_packets: float
+    tx_errors: float
+    tx_drops: float
+
+
+class RateMonitor:
+    """Rates of every interface, from one read of /proc/net/dev per call to `rates`.
+
+    The file is opened once and re-read with `os.pread`, so a tick costs one read no
+    matter how many interfaces (VLANs, bridges, veths) the host has. Interfaces that
+    appear are reported from their second reading on; interfaces that go away are
+    forgotten.
+    """
+
+    def __init__(self, path: str = NET_DEV_PATH):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        self._previous = {}
+        self._taken = None
+
+    def read(self) -> dict[str, tuple[int, ...]]:
+        """Return the raw counters of every interface, see `read_net_dev`."""
+        chunks = []
+        offset = 0
+        while chunk := os.pread(self._fd, 65536, offset):
+            chunks.append(chunk)
+            offset += len(chunk)
+        return read_net_dev(b"".join(chunks))
+
+    def rates(self) -> dict[str, InterfaceRates]:
+        """Return interface -> `InterfaceRates` since the previous call (empty on the first)."""
+        counters = self.read()
+        taken = time.monotonic()
+        rates = {}
+        if self._taken is not None and taken > self._taken:
+            elapsed = taken - self._taken
+            for interface, current in counters.items():
+                previous = self._previous.get(interface)
+                if previous is None:
+                    continue
+                deltas = (counter_delta(c, p) for c, p in zip(current, previous, strict=True))
+                rates[interface] = InterfaceRates(interface, *(delta / elapsed for delta in deltas))
+        self._previous = counters
+        self._taken = taken
+        return rates
+
+    def close(self) -> None:
+        """Close the file descriptor."""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self) -> None:
+        self.close()
 
 
 class Interface(Sensor):
     def __init__(self, interface="wlan0"):
         self.interface = interface
+        self._monitor = None
         super().__init__("net")
 
+    def _link(self) -> NETLINK.Link | None:
+        """Return this interface from the shared rtnetlink table, None if unavailable."""
+        watcher = NETLINK.link_watcher()
+        return watcher.get(self.interface) if watcher is not None else None
+
     def addresses(self):
+        link = self._link()
+        if link is not None and link.addresses:
+            # IPv4 first, as psutil lists them
+            address = min(link.addresses, key=lambda a: a.family != socket.AF_INET)
+            return (address.address, address.netmask, address.broadcast, link.mac)
         for interface, values in psutil.net_if_addrs().items():
             if self.interface in interface:
                 ip = values[0].address
@@ -26,9 +140,9 @@ class Interface(Sensor):
         return (ip, netmask, broadcast, mac)
 
     def connections(self):
-        all_connections = psutil.net_connections(kind="inet")
+        # TIME_WAIT sockets are filtered out by the kernel
+        all_connections = NETLINK.connections("inet")
         listening_connections = []
-
         established_connections = []
         outgoing_connections = []
         other_connections = []
@@ -37,24 +151,14 @@ class Interface(Sensor):
             # Filter remote addresses. Anything other than 127.0.0.1 is of note.
             # Outgoing is being defined as anything facing the internet
             # In reality, this could be incoming or outgoing
-            try:
-                if conn.raddr[0] != "127.0.0.1" and conn.laddr[0] != "127.0.0.1":
-                    conn.laddr[0].strip("::ffff:")
-                    conn.raddr[0].strip("::ffff:")
-                    outgoing_connections.append(conn)
-            except Exception:
-                pass
-            try:
-                if conn.status == "LISTEN":
-                    listening_connections.append(conn)
-                elif conn.status == "ESTABLISHED":
-                    established_connections.append(conn)
-                elif conn.status == "TIME_WAIT":
-                    pass
-                else:
-                    other_connections.append(conn)
-            except Exception:
-                pass
+            if conn.raddr and "127.0.0.1" not in (conn.raddr[0], conn.laddr[0]):
+                outgoing_connections.append(conn)
+            if conn.status == "LISTEN":
+                listening_connections.append(conn)
+            elif conn.status == "ESTABLISHED":
+                established_connections.append(conn)
+            else:
+                other_connections.append(conn)
 
         return (
             listening_connections,
@@ -63,35 +167,63 @@ class Interface(Sensor):
             other_connections,
         )
 
+    def connection_counts(self) -> tuple[int, int, int]:
+        """Return the number of (listening, established, other) sockets.
+
+        Only the kernel's per-socket state is read, so this stays cheap with many sockets.
+        """
+        counts = NETLINK.counts("inet")
+        listening = counts.pop("LISTEN", 0)
+        established = counts.pop("ESTABLISHED", 0)
+        return listening, established, sum(counts.values())
+
     def byte_io(self, destination):
-        if self.interface not in psutil.net_connections(pernic=True):
+        with open(NET_DEV_PATH, "rb") as f:
+            counters = read_net_dev(f.read()).get(self.interface)
+        if counters is None:
             return 1
-        bytes_sent = psutil.net_io_counters().bytes_sent
-        bytes_recv = psutil.net_io_counters().bytes_recv
+        bytes_recv, bytes_sent = counters[0], counters[4]
         if destination == "sent":
             return bytes_sent
         if destination == "recv":
             return bytes_recv
         return bytes_sent, bytes_recv
 
+    def rates(self) -> InterfaceRates | None:
+        """Return the rates of this interface since the previous call, None on the first.
+
+        To monitor many interfaces, use one `RateMonitor` and read them all per tick.
+        """
+        if self._monitor is None:
+            self._monitor = RateMonitor()
+        return self._monitor.rates().get(self.interface)
+
     def ping(self, destination="1.1.1.1"):
-        ping = subprocess.run(
-            f'ping -c 1 {destination} | sed -u "s/^.*time=//g; s/ ms//g; s/^PING.*//g; s/^---.*//g; s/^.*packets.*//g; s/^rtt.*//g"',
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        if ping.stderr:
-            return ping.stderr.strip()
-        try:
-            return round(float(ping.stdout.strip()))
-        except ValueError:
-            return 0
+        """Return the round trip time to `destination` in ms, or 0 if no reply arrived.
+
+        Blocks without an event loop of its own, so it also works inside async code,
+        where `aping` avoids blocking the loop. To probe many destinations repeatedly,
+        use `PING.Prober`.
+        """
+        # Imported when first needed, as PING pulls in asyncio
+        from . import PING
+
+        return round(PING.probe_blocking(destination) or 0)
+
+    async def aping(self, destination="1.1.1.1", timeout=5.0):
+        """Async counterpart of `ping`.
+
+        Returns the round trip time in ms, or 0 if no reply arrived.
+        """
+        from . import PING
+
+        return round(await PING.probe(destination, timeout=timeout) or 0)
 
     @property
     def online(self) -> str:
-        return "online" if psutil.net_if_stats()[self.interface].isup else "offline"
+        link = self._link()
+        isup = link.up if link is not None else psutil.net_if_stats()[self.interface].isup
+        return "online" if isup else "offline"
 
     """
     def port_info(self, verbose_level=0, host='10.0.0.1', entire_subnet=False):
@@ -126,19 +258,21 @@ class Interface(Sensor):
         subprocess.run('nmap -T4 -sn 10.0.0.0/24 | grep "Nmap"', check=False)
 
     def __str__(self):
+        listening, established, outgoing, other = self.connections()
+        addresses = self.addresses()
         return str(
             f'Interface: {self.interface} : {self.online}\n\n'
             f'Connections:\n'
-            f'Listening connections: {len(self.connections()[0])}\n'
-            f'Established connections: {len(self.connections()[1])}\n'
-            f'Outgoing connections: {len(self.connections()[2])}\n'
-            f'Other connections: {len(self.connections()[3])}\n\n'
+            f'Listening connections: {len(listening)}\n'
+            f'Established connections: {len(established)}\n'
+            f'Outgoing connections: {len(outgoing)}\n'
+            f'Other connections: {len(other)}\n\n'
             f'Ping: {self.ping("1.1.1.1")} ms\n\n'
             f'Addresses:\n'
-            f'  IP: {self.addresses()[0]}\n'
-            f'  Netmask: {self.addresses()[1]}\n'
-            f'  Broadcast: {self.addresses()[2]}\n'
-            f'  MAC: {self.addresses()[3]}'
+            f'  IP: {addresses[0]}\n'
+            f'  Netmask: {addresses[1]}\n'
+            f'  Broadcast: {addresses[2]}\n'
+            f'  MAC: {addresses[3]}'
         )
 
     # TODO: Add more
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""NETLINK.py - Query sockets and interfaces through netlink instead of polling.
+
+`psutil.net_connections` walks the fd table of every process. sock_diag asks the kernel
+for a dump of the socket tables instead, filtered by TCP state on the kernel side, so
+its cost grows with the matching sockets rather than the number of processes.
+
+`LinkWatcher` keeps a table of interfaces and addresses current from rtnetlink
+notifications, so reading it does not enumerate every interface.
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, replace
+
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x01
+NLM_F_DUMP = 0x300
+
+# nlmsghdr: length, type, flags, sequence number, port id
+NLMSG_HEADER = struct.Struct("=IHHII")
+# inet_diag_req_v2 without its socket id: family, protocol, extensions, pad, state mask
+DIAG_REQUEST = struct.Struct("=BBBBI")
+DIAG_SOCKID_SIZE = 48
+# inet_diag_msg up to the socket addresses: family, state, timer, retrans, ports, addresses
+DIAG_MSG_HEADER = struct.Struct(">BBBBHH16s16s")
+# The rest of inet_diag_msg after the socket id: expires, rqueue, wqueue, uid, inode
+DIAG_MSG_TAIL = struct.Struct("=5I")
+DIAG_MSG_TAIL_OFFSET = 4 + DIAG_SOCKID_SIZE
+
+RECV_SIZE = 1 << 20
+
+# Kernel TCP state numbers, named the way psutil names them
+TCP_STATES = {
+    1: "ESTABLISHED",
+    2: "SYN_SENT",
+    3: "SYN_RECV",
+    4: "FIN_WAIT1",
+    5: "FIN_WAIT2",
+    6: "TIME_WAIT",
+    7: "CLOSE",
+    8: "CLOSE_WAIT",
+    9: "LAST_ACK",
+    10: "LISTEN",
+    11: "CLOSING",
+    12: "NEW_SYN_RECV",
+}
+STATE_NUMBERS = {name: number for number, name in TCP_STATES.items()}
+
+# psutil reports UDP sockets without a status
+UDP_STATUS = "NONE"
+
+TCP = (socket.SOCK_STREAM, socket.IPPROTO_TCP, "tcp")
+UDP = (socket.SOCK_DGRAM, socket.IPPROTO_UDP, "udp")
+
+# The `kind` values accepted by psutil.net_connections that cover internet sockets
+KINDS = {
+    "inet": [
+        (socket.AF_INET, TCP),
+        (socket.AF_INET6, TCP),
+        (socket.AF_INET, UDP),
+        (socket.AF_INET6, UDP),
+    ],
+    "inet4": [(socket.AF_INET, TCP), (socket.AF_INET, UDP)],
+    "inet6": [(socket.AF_INET6, TCP), (socket.AF_INET6, UDP)],
+    "tcp": [(socket.AF_INET, TCP), (socket.AF_INET6, TCP)],
+    "tcp4": [(socket.AF_INET, TCP)],
+    "tcp6": [(socket.AF_INET6, TCP)],
+    "udp": [(socket.AF_INET, UDP), (socket.AF_INET6, UDP)],
+    "udp4": [(socket.AF_INET, UDP)],
+    "udp6": [(socket.AF_INET6, UDP)],
+}
+
+
+def state_mask(*states: str) -> int:
+    """Return the kernel state bitmask for TCP state names such as 'LISTEN'."""
+    mask = 0
+    for state in states:
+        mask |= 1 << STATE_NUMBERS[state]
+    return mask
+
+
+ALL_STATES = 0xFFFFFFFF
+# TIME_WAIT sockets can outnumber all others on busy hosts and are rarely of interest
+DEFAULT_STATES = ALL_STATES & ~state_mask("TIME_WAIT")
+
+
+@dataclass(frozen=True, slots=True)
+class Connection:
+    """One internet socket, with the attributes of psutil's `sconn` that do not need a pid.
+
+    Attributes:
+    ----------
+        family (socket.AddressFamily): AF_INET or AF_INET6.
+        type (socket.SocketKind): SOCK_STREAM or SOCK_DGRAM.
+        laddr (tuple): Local (ip, port).
+        raddr (tuple): Remote (ip, port), or () if the socket is not connected.
+        status (str): TCP state such as 'LISTEN', or 'NONE' for UDP.
+        uid (int): Owner of the socket.
+        inode (int): Inode of the socket, to match it with /proc/<pid>/fd.
+    """
+
+    family: socket.AddressFamily
+    type: socket.SocketKind
+    laddr: tuple
+    raddr: tuple
+    status: str
+    uid: int
+    inode: int
+
+
+def _status(kind: tuple, state: int) -> str:
+    return TCP_STATES.get(state, "NONE") if kind is TCP else UDP_STATUS
+
+
+def _address(family: int, packed: bytes, port: int) -> tuple:
+    if family == socket.AF_INET:
+        packed = packed[:4]
+    if not port and not any(packed):
+        return ()
+    return (socket.inet_ntop(family, packed), port)
+
+
+def _request(message_type: int, sequence: int, payload: bytes) -> bytes:
+    """Return a netlink dump request for `message_type` carrying `payload`."""
+    header = NLMSG_HEADER.pack(
+        NLMSG_HEADER.size + len(payload),
+        message_type,
+        NLM_F_REQUEST | NLM_F_DUMP,
+        sequence,
+        0,
+    )
+    return header + payload
+
+
+def _messages(buffer: bytes) -> Iterator[tuple[int, int, int, int]]:
+    """
+    Yield (type, sequence, payload offset, payload end) of every message in `buffer`.
+
+    Raises:
+    -----------
+        OSError: If the kernel answered a request with an error.
+    """
+    offset = 0
+    while offset + NLMSG_HEADER.size <= len(buffer):
+        length, message_type, _, sequence, _ = NLMSG_HEADER.unpack_from(buffer, offset)
+        if length < NLMSG_HEADER.size:
+            return
+        if message_type == NLMSG_ERROR:
+            (error,) = struct.unpack_from("=i", buffer, offset + NLMSG_HEADER.size)
+            if error:
+                raise OSError(-error, os.strerror(-error))
+        else:
+            yield message_type, sequence, offset + NLMSG_HEADER.size, offset + length
+        # Messages are padded to 4 bytes
+        offset += (length + 3) & ~3
+
+
+class SockDiag:
+    """A NETLINK_SOCK_DIAG socket that dumps the kernel's TCP and UDP socket tables."""
+
+    def __init__(self):
+        self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_SOCK_DIAG)
+        self._sequence = 0
+
+    def dump(self, family: int, protocol: int, states: int = DEFAULT_STATES) -> Iterator:
+        """
+        Yield (buffer, offset) of every inet_diag_msg the kernel returns.
+
+        Parameters:
+        -----------
+            family (int): AF_INET or AF_INET6.
+            protocol (int): IPPROTO_TCP or IPPROTO_UDP.
+            states (int): Bitmask of kernel state numbers to dump, see `state_mask`.
+        """
+        self._sequence += 1
+        request = DIAG_REQUEST.pack(family, protocol, 0, 0, states) + bytes(DIAG_SOCKID_SIZE)
+        self._socket.send(_request(SOCK_DIAG_BY_FAMILY, self._sequence, request))
+        while True:
+            buffer = self._socket.recv(RECV_SIZE)
+            for message_type, sequence, offset, _ in _messages(buffer):
+                if sequence != self._sequence:
+                    continue
+                if message_type == NLMSG_DONE:
+                    return
+                yield buffer, offset
+
+    def connections(self, kind: str = "inet", states: int = DEFAULT_STATES) -> list[Connection]:
+        """Return every socket of `kind` (a psutil kind such as 'tcp6') in `states`."""
+        connections = []
+        for family, proto in KINDS[kind]:
+            sock_type, protocol, _ = proto
+            for buffer, offset in self.dump(family, protocol, states):
+                _, state, _, _, sport, dport, src, dst = DIAG_MSG_HEADER.unpack_from(buffer, offset)
+                _, _, _, uid, inode = DIAG_MSG_TAIL.unpack_from(
+                    buffer, offset + DIAG_MSG_TAIL_OFFSET
+                )
+                connections.append(
+                    Connection(
+                        socket.AddressFamily(family),
+                        socket.SocketKind(sock_type),
+                        _address(family, src, sport),
+                        _address(family, dst, dport),
+                        _status(proto, state),
+                        uid,
+                        inode,
+                    )
+                )
+        return connections
+
+    def counts(self, kind: str = "inet", states: int = DEFAULT_STATES) -> Counter:
+        """Return status -> number of sockets, reading only the state byte of each message."""
+        counts = Counter()
+        for family, proto in KINDS[kind]:
+            _, protocol, _ = proto
+            for buffer, offset in self.dump(family, protocol, states):
+                counts[_status(proto, buffer[offset + 1])] += 1
+        return counts
+
+    def close(self) -> None:
+        self._socket.close()
+
+    def __enter__(self) -> "SockDiag":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _proc_address(family: int, field: str) -> tuple:
+    """Decode an 'ADDRESS:PORT' field of /proc/net/tcp, where each 32 bit word is host order."""
+    address, _, port = field.partition(":")
+    raw = bytes.fromhex(address)
+    packed = b"".join(raw[i : i + 4][::-1] for i in range(0, len(raw), 4))
+    return _address(family, packed, int(port, 16))
+
+
+def proc_connections(
+    kind: str = "inet", states: int = DEFAULT_STATES, root: str = "/proc"
+) -> list[Connection]:
+    """Return the same as `SockDiag.connections`, parsed from /proc/net/{tcp,udp}{,6}.
+
+    `root` is the mount point of procfs.
+    """
+    connections = []
+    for family, proto in KINDS[kind]:
+        sock_type, _, name = proto
+        path = f"{root}/net/{name}{'6' if family == socket.AF_INET6 else ''}"
+        try:
+            with open(path, encoding="ascii") as f:
+                lines = f.readlines()[1:]
+        except FileNotFoundError:
+            continue  # eg IPv6 disabled
+        for line in lines:
+            fields = line.split()
+            state = int(fields[3], 16)
+            if not states & (1 << state):
+                continue
+            connections.append(
+                Connection(
+                    socket.AddressFamily(family),
+                    socket.SocketKind(sock_type),
+                    _proc_address(family, fields[1]),
+                    _proc_address(family, fields[2]),
+                    _status(proto, state),
+                    int(fields[7]),
+                    int(fields[9]),
+                )
+            )
+    return connections
+
+
+def connections(kind: str = "inet", states: int = DEFAULT_STATES) -> list[Connection]:
+    """
+    Return every internet socket of `kind` whose state is in `states`.
+
+    Uses sock_diag, falling back to /proc/net if netlink is not available.
+
+    Parameters:
+    -----------
+        kind (str): One of `KINDS`, as for `psutil.net_connections`.
+        states (int): Bitmask of states, see `state_mask`. TIME_WAIT is excluded by default.
+    """
+    try:
+        with SockDiag() as diag:
+            return diag.connections(kind, states)
+    except OSError:
+        return proc_connections(kind, states)
+
+
+def counts(kind: str = "inet", states: int = DEFAULT_STATES) -> Counter:
+    """Return status -> number of sockets without building a `Connection` for each."""
+    try:
+        with SockDiag() as diag:
+            return diag.counts(kind, states)
+    except OSError:
+        return Counter(connection.status for connection in proc_connections(kind, states))
+
+
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+
+# Seconds before retrying a failed resync, doubled after each failure up to the maximum
+RESYNC_DELAY = 0.5
+RESYNC_MAX_DELAY = 30.0
+
+# ifinfomsg: family, device type, index, flags, change mask
+IFINFO = struct.Struct("=BxHiII")
+# ifaddrmsg: family, prefix length, flags, scope, interface index
+IFADDR = struct.Struct("=BBBBI")
+# rtattr: length, type
+RTATTR = struct.Struct("=HH")
+
+IFLA_ADDRESS = 1
+IFLA_IFNAME = 3
+IFLA_MTU = 4
+IFLA_OPERSTATE = 16
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+IFA_LABEL = 3
+IFA_BROADCAST = 4
+
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+
+OPERSTATES = ("unknown", "notpresent", "down", "lowerlayerdown", "testing", "dormant", "up")
+
+
+def _attributes(buffer: bytes, offset: int, end: int) -> dict[int, bytes]:
+    """Return type -> payload of the rtattrs between `offset` and `end`."""
+    attributes = {}
+    while offset + RTATTR.size <= end:
+        length, attribute_type = RTATTR.unpack_from(buffer, offset)
+        if length < RTATTR.size:
+            break
+        attributes[attribute_type] = buffer[offset + RTATTR.size : offset + length]
+        offset += (length + 3) & ~3
+    return attributes
+
+
+@dataclass(frozen=True, slots=True)
+class Address:
+    """One address assigned to an interface.
+
+    Attributes:
+    ----------
+        family (socket.AddressFamily): AF_INET or AF_INET6.
+        address (str): The address, eg '192.168.1.10'.
+        prefixlen (int): Length of the network prefix, eg 24.
+        broadcast (str | None): IPv4 broadcast address, if one is set.
+    """
+
+    family: socket.AddressFamily
+    address: str
+    prefixlen: int
+    broadcast: str | None = None
+
+    @property
+    def netmask(self) -> str:
+        """The prefix length as a netmask, eg '255.255.255.0'."""
+        bits = 32 if self.family == socket.AF_INET else 128
+        mask = ((1 << self.prefixlen) - 1) << (bits - self.prefixlen)
+        return socket.inet_ntop(self.family, mask.to_bytes(bits // 8, "big"))
+
+
+@dataclass(frozen=True, slots=True)
+class Link:
+    """The state of one network interface.
+
+    Attributes:
+    ----------
+        index (int): Kernel interface index.
+        name (str): Interface name, eg 'eth0'.
+        flags (int): IFF_* flags.
+        mtu (int): MTU in bytes.
+        mac (str): Hardware address, '' if the interface has none.
+        operstate (str): RFC 2863 operational state, eg 'up' or 'down'.
+        addresses (tuple[Address, ...]): Addresses assigned to the interface.
+    """
+
+    index: int
+    name: str
+    flags: int
+    mtu: int
+    mac: str
+    operstate: str
+    addresses: tuple[Address, ...] = ()
+
+    @property
+    def up(self) -> bool:
+        """True if the interface is administratively up and running."""
+        return self.flags & (IFF_UP | IFF_RUNNING) == IFF_UP | IFF_RUNNING
+
+
+class LinkWatcher:
+    """A table of interfaces and their addresses, kept current by rtnetlink events.
+
+    The table is filled by one dump when the watcher is created. After `start`, a
+    background thread applies RTM_NEWLINK/DELLINK and RTM_NEWADDR/DELADDR notifications
+    as the kernel sends them, so reading the table never touches the kernel and link
+    flaps reach subscribers immediately.
+
+    Example:
+    --------
+        watcher = LinkWatcher()
+        watcher.subscribe(lambda event, link: print(event, link.name, link.operstate))
+        watcher.start()
+    """
+
+    def __init__(self):
+        self._socket = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_SIZE)
+        # Join the groups before dumping so no change between the two is missed
+        self._socket.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        self._links = {}
+        self._subscribers = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._links = self._load()
+
+    def _load(self) -> dict[int, Link]:
+        """Dump every link and address into a new table of interface index -> `Link`."""
+        links = {}
+        self._dump(links, RTM_GETLINK, IFINFO.pack(socket.AF_UNSPEC, 0, 0, 0, 0))
+        self._dump(links, RTM_GETADDR, IFADDR.pack(socket.AF_UNSPEC, 0, 0, 0, 0))
+        return links
+
+    def _dump(self, links: dict[int, Link], message_type: int, payload: bytes) -> None:
+        """Request a dump and apply everything received to `links` until it is done."""
+        self._sequence += 1
+        self._socket.send(_request(message_type, self._sequence, payload))
+        while not self._receive(links, self._sequence)[0]:
+            pass
+
+    def _receive(self, links: dict[int, Link], sequence: int | None = None) -> tuple:
+        """
+        Apply the messages of one datagram to `links`.
+
+        Returns:
+        -----------
+            tuple: (True if it ended dump `sequence`, list of (event, `Link`) it caused)
+        """
+        buffer = self._socket.recv(RECV_SIZE)
+        done = False
+        events = []
+        for message_type, message_sequence, offset, end in _messages(buffer):
+            event = None
+            if message_type == NLMSG_DONE:
+                done = done or message_sequence == sequence
+            elif message_type in (RTM_NEWLINK, RTM_DELLINK):
+                event = self._apply_link(links, message_type, buffer, offset, end)
+            elif message_type in (RTM_NEWADDR, RTM_DELADDR):
+                event = self._apply_address(links, message_type, buffer, offset, end)
+            if event is not None:
+                events.append(event)
+        return done, events
+
+    def _apply_link(self, links: dict, message_type: int, buffer: bytes, offset: int, end: int):
+        _, _, index, flags, _ = IFINFO.unpack_from(buffer, offset)
+        attributes = _attributes(buffer, offset + IFINFO.size, end)
+        with self._lock:
+            previous = links.get(index)
+            if message_type == RTM_DELLINK:
+                link = links.pop(index, None)
+                event = "removed"
+            else:
+                operstate = attributes.get(IFLA_OPERSTATE, b"\x00")[0]
+                link = Link(
+                    index=index,
+                    name=attributes.get(IFLA_IFNAME, b"").rstrip(b"\x00").decode(),
+                    flags=flags,
+                    mtu=int.from_bytes(attributes.get(IFLA_MTU, b""), sys.byteorder),
+                    mac=attributes.get(IFLA_ADDRESS, b"").hex(":"),
+                    operstate=OPERSTATES[operstate] if operstate < len(OPERSTATES) else "unknown",
+                    addresses=previous.addresses if previous else (),
+                )
+                if link == previous:
+                    return None
+                links[index] = link
+                event = "changed" if previous else "added"
+        return (event, link) if link is not None else None
+
+    def _apply_address(self, links: dict, message_type: int, buffer: bytes, offset: int, end: int):
+        family, prefixlen, _, _, index = IFADDR.unpack_from(buffer, offset)
+        attributes = _attributes(buffer, offset + IFADDR.size, end)
+        # IFA_ADDRESS is the peer on point-to-point links, IFA_LOCAL the address itself
+        packed = attributes.get(IFA_LOCAL) or attributes.get(IFA_ADDRESS)
+        if packed is None or family not in (socket.AF_INET, socket.AF_INET6):
+            return None
+        broadcast = attributes.get(IFA_BROADCAST)
+        address = Address(
+            socket.AddressFamily(family),
+            socket.inet_ntop(family, packed),
+            prefixlen,
+            socket.inet_ntop(family, broadcast) if broadcast else None,
+        )
+        with self._lock:
+            link = links.get(index)
+            if link is None:
+                return None
+            addresses = tuple(a for a in link.addresses if a.address != address.address)
+            if message_type == RTM_NEWADDR:
+                addresses += (address,)
+            if addresses == link.addresses:
+                return None
+            link = replace(link, addresses=addresses)
+            links[index] = link
+        return "changed", link
+
+    def _resync(self) -> bool:
+        """
+        Rebuild the table after notifications were dropped, reporting what changed meanwhile.
+
+        Returns:
+        -----------
+            bool: False if the dump failed and has to be retried.
+        """
+        try:
+            links = self._load()
+        except (OSError, ValueError, struct.error):
+            return False
+        with self._lock:
+            previous, self._links = self._links, links
+        for index, link in previous.items():
+            if index not in links:
+                self._notify("removed", link)
+        for index, link in links.items():
+            if index not in previous:
+                self._notify("added", link)
+            elif link != previous[index]:
+                self._notify("changed", link)
+        return True
+
+    def _notify(self, event: str, link: Link) -> None:
+        for callback in self._subscribers:
+            callback(event, link)
+
+    def subscribe(self, callback: Callable[[str, Link], None]) -> None:
+        """Call `callback(event, link)` on every change, `event` being 'added', 'changed'
+        or 'removed'. Callbacks run on the watcher thread."""
+        self._subscribers.append(callback)
+
+    @property
+    def links(self) -> dict[str, Link]:
+        """Interface name -> `Link` of every interface."""
+        with self._lock:
+            return {link.name: link for link in self._links.values()}
+
+    def get(self, name: str) -> Link | None:
+        """Return the `Link` named `name`, or None."""
+        with self._lock:
+            for link in self._links.values():
+                if link.name == name:
+                    return link
+        return None
+
+    def run(self) -> None:
+        """Apply notifications until `stop` is called.
+
+        If notifications are dropped (ENOBUFS) or cannot be received, the table is
+        rebuilt, retrying failed dumps with a growing delay of up to `RESYNC_MAX_DELAY`.
+        """
+        self._socket.settimeout(0.5)
+        stale = False
+        delay = RESYNC_DELAY
+        while not self._stop.is_set():
+            if stale:
+                stale = not self._resync()
+                if stale:
+                    self._stop.wait(delay)
+                    delay = min(delay * 2, RESYNC_MAX_DELAY)
+                else:
+                    delay = RESYNC_DELAY
+                continue
+            try:
+                _, events = self._receive(self._links)
+            except TimeoutError:
+                continue
+            except (OSError, ValueError, struct.error):
+                # Notifications were dropped or lost, so the table must be rebuilt
+                stale = True
+                continue
+            for event, link in events:
+                self._notify(event, link)
+
+    def start(self) -> None:
+        """Watch for changes in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="hwutils-links", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching and wait for the background thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        self.stop()
+        self._socket.close()
+
+
+_link_watcher = None
+_link_watcher_lock = threading.Lock()
+
+
+def link_watcher() -> LinkWatcher | None:
+    """Return the shared, running `LinkWatcher`, or None if rtnetlink is not available.
+
+    A watcher whose thread died, eg because a subscriber raised, is replaced by a new one.
+    """
+    global _link_watcher
+    with _link_watcher_lock:
+        if _link_watcher is not None:
+            thread = _link_watcher._thread
+            if thread is None or not thread.is_alive():
+                _link_watcher.close()
+                _link_watcher = None
+        if _link_watcher is None:
+            try:
+                _link_watcher = LinkWatcher()
+            except OSError:
+                return None
+            _link_watcher.start()
+    return _link_watcher
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""PING.py - Measure latency to many targets concurrently on one event loop.
+
+Echo requests are sent through unprivileged ICMP datagram sockets where the kernel
+allows them (see `net.ipv4.ping_group_range`). Otherwise the time to complete, or be
+refused, a TCP connection is measured instead. No process is forked per probe.
+"""
+
+import asyncio
+import functools
+import os
+import socket
+import struct
+import time
+from collections import deque
+from dataclasses import dataclass
+
+METHODS = ("auto", "icmp", "tcp")
+
+# ICMP echo request and reply types for each address family
+ECHO_TYPES = {socket.AF_INET: (8, 0), socket.AF_INET6: (128, 129)}
+ICMP_PROTOCOLS = {socket.AF_INET: socket.IPPROTO_ICMP, socket.AF_INET6: socket.IPPROTO_ICMPV6}
+ICMP_HEADER = struct.Struct("!BBHHH")
+PAYLOAD = b"hwutils-ping".ljust(56, b"\x00")
+
+
+@functools.cache
+def icmp_permitted() -> bool:
+    """Return True if this process may open ICMP datagram sockets."""
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP).close()
+    except OSError:
+        return False
+    return True
+
+
+def _checksum(data: bytes) -> int:
+    """Return the internet checksum (RFC 1071) of `data`."""
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _resolve_method(method: str) -> str:
+    """Return 'icmp' or 'tcp' for a `method` argument, see `Prober`."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown probe method: {method!r}, expected one of {METHODS}")
+    return method if method != "auto" else ("icmp" if icmp_permitted() else "tcp")
+
+
+def _echo_request(family: int, sequence: int) -> bytes:
+    # The kernel replaces the identifier with the socket's port on datagram ICMP sockets
+    request_type, _ = ECHO_TYPES[family]
+    header = ICMP_HEADER.pack(request_type, 0, 0, 0, sequence)
+    checksum = _checksum(header + PAYLOAD)
+    return ICMP_HEADER.pack(request_type, 0, checksum, 0, sequence) + PAYLOAD
+
+
+def _is_reply(reply: bytes, reply_type: int, sequence: int) -> bool:
+    return (
+        len(reply) >= ICMP_HEADER.size
+        and reply[0] == reply_type
+        and ICMP_HEADER.unpack_from(reply)[4] == sequence
+    )
+
+
+async def _icmp_probe(family: int, address: tuple, sequence: int, timeout: float):
+    """Return (round trip time of one echo request in ms or None if it was lost, False)."""
+    loop = asyncio.get_running_loop()
+    _, reply_type = ECHO_TYPES[family]
+    with socket.socket(family, socket.SOCK_DGRAM, ICMP_PROTOCOLS[family]) as sock:
+        sock.setblocking(False)
+        sock.connect(address)
+        started = time.perf_counter()
+        deadline = started + timeout
+        try:
+            await loop.sock_sendall(sock, _echo_request(family, sequence))
+            while (remaining := deadline - time.perf_counter()) > 0:
+                reply = await asyncio.wait_for(loop.sock_recv(sock, 2048), remaining)
+                if _is_reply(reply, reply_type, sequence):
+                    return (time.perf_counter() - started) * 1000, False
+        except (TimeoutError, OSError):
+            # OSError covers ICMP errors such as host unreachable
+            pass
+    return None, False
+
+
+async def _tcp_probe(family: int, address: tuple, timeout: float):
+    """
+    Time a TCP connection to `address`.
+
+    Returns:
+    -----------
+        tuple: (ms taken to connect or be refused, None on timeout or error; True if refused)
+    """
+    loop = asyncio.get_running_loop()
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.setblocking(False)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, address), timeout)
+        except ConnectionRefusedError:
+            # The RST took one round trip as well
+            return (time.perf_counter() - started) * 1000, True
+        except (TimeoutError, OSError):
+            return None, False
+        return (time.perf_counter() - started) * 1000, False
+
+
+def _icmp_probe_blocking(family: int, address: tuple, sequence: int, timeout: float):
+    """Blocking counterpart of `_icmp_probe`."""
+    _, reply_type = ECHO_TYPES[family]
+    with socket.socket(family, socket.SOCK_DGRAM, ICMP_PROTOCOLS[family]) as sock:
+        started = time.perf_counter()
+        deadline = started + timeout
+        try:
+            sock.connect(address)
+            sock.send(_echo_request(family, sequence))
+            while (remaining := deadline - time.perf_counter()) > 0:
+                sock.settimeout(remaining)
+                if _is_reply(sock.recv(2048), reply_type, sequence):
+                    return (time.perf_counter() - started) * 1000, False
+        except OSError:
+            pass  # Also raised on timeout
+    return None, False
+
+
+def _tcp_probe_blocking(family: int, address: tuple, timeout: float):
+    """Blocking counterpart of `_tcp_probe`."""
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        started = time.perf_counter()
+        try:
+            sock.connect(address)
+        except ConnectionRefusedError:
+            return (time.perf_counter() - started) * 1000, True
+        except OSError:
+            return None, False
+        return (time.perf_counter() - started) * 1000, False
+
+
+@dataclass(frozen=True, slots=True)
+class LatencyStats:
+    """Latency of one target over the last `window` probes.
+
+    Attributes:
+    ----------
+        target (str | tuple): The target as it was given to the `Prober`.
+        sent (int): Probes in the window.
+        received (int): Probes that were answered.
+        refused (int): Answered TCP probes whose connection was refused (the port is closed).
+        loss (float): Percentage of probes that were not answered.
+        last (float | None): Round trip time of the latest probe in ms, None if it was lost.
+        latency (float | None): Average round trip time in ms.
+        minimum (float | None): Fastest round trip time in ms.
+        maximum (float | None): Slowest round trip time in ms.
+        jitter (float | None): Mean difference between consecutive round trip times in ms.
+    """
+
+    target: str | tuple
+    sent: int
+    received: int
+    refused: int
+    loss: float
+    last: float | None
+    latency: float | None
+    minimum: float | None
+    maximum: float | None
+    jitter: float | None
+
+    @classmethod
+    def from_results(cls, target, results, refused: int = 0) -> "LatencyStats":
+        """Summarize round trip times in ms, with None for lost probes."""
+        times = [result for result in results if result is not None]
+        sent = len(results)
+        jitter = None
+        if len(times) > 1:
+            steps = zip(times, times[1:], strict=False)
+            jitter = sum(abs(b - a) for a, b in steps) / (len(times) - 1)
+        return cls(
+            target=target,
+            sent=sent,
+            received=len(times),
+            refused=refused,
+            loss=100 * (sent - len(times)) / sent if sent else 0.0,
+            last=results[-1] if results else None,
+            latency=sum(times) / len(times) if times else None,
+            minimum=min(times, default=None),
+            maximum=max(times, default=None),
+            jitter=jitter,
+        )
+
+
+class Prober:
+    """Probe many targets concurrently and keep rolling statistics for each.
+
+    Example:
+    --------
+        prober = Prober(["1.1.1.1", ("example.com", 443)])
+        stats = asyncio.run(prober.run(interval=1.0, count=10))
+        print(stats["1.1.1.1"].latency, stats["1.1.1.1"].loss)
+    """
+
+    def __init__(
+        self,
+        targets: list,
+        window: int = 20,
+        timeout: float = 1.0,
+        method: str = "auto",
+        port: int = 443,
+    ):
+        """
+        Parameters:
+        -----------
+            targets (list): Host names or addresses, or (host, port) tuples. The port is
+                            used for TCP probes and defaults to `port`.
+            window (int): Number of recent probes the statistics cover.
+            timeout (float): Seconds to wait for each probe.
+            method (str): 'icmp', 'tcp', or 'auto' to use ICMP when it is permitted.
+            port (int): TCP port to connect to for targets given without one.
+        """
+        self.targets = list(targets)
+        self.timeout = timeout
+        self.port = port
+        self.method = _resolve_method(method)
+        # Target -> (ms or None, refused) of the latest `window` probes
+        self._results = {target: deque(maxlen=window) for target in self.targets}
+        self._addresses = {}
+        # Echo sequence numbers distinguish this round's replies from late ones
+        self._sequence = os.getpid() & 0xFFFF
+
+    async def _resolve(self, target) -> tuple[int, tuple]:
+        """Return (family, sockaddr) of `target`, resolving it only once."""
+        if target not in self._addresses:
+            host, port = target if isinstance(target, tuple) else (target, self.port)
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            family, _, _, _, address = infos[0]
+            self._addresses[target] = (family, address)
+        return self._addresses[target]
+
+    async def _probe(self, target) -> tuple[float | None, bool]:
+        try:
+            family, address = await self._resolve(target)
+        except OSError:
+            return None, False
+        if self.method == "icmp":
+            return await _icmp_probe(family, address, self._sequence, self.timeout)
+        return await _tcp_probe(family, address, self.timeout)
+
+    async def probe(self, target) -> float | None:
+        """Probe `target` once without recording it. Returns ms, or None if it was lost."""
+        return (await self._probe(target))[0]
+
+    async def round(self) -> dict:
+        """Probe every target concurrently once and return target -> `LatencyStats`."""
+        self._sequence = (self._sequence + 1) & 0xFFFF
+        results = await asyncio.gather(*(self._probe(target) for target in self.targets))
+        for target, result in zip(self.targets, results, strict=True):
+            self._results[target].append(result)
+        return self.stats()
+
+    async def run(self, interval: float = 1.0, count: int | None = None) -> dict:
+        """
+        Start a round every `interval` seconds and return the statistics after the last.
+
+        Parameters:
+        -----------
+            interval (float): Seconds between rounds, kept on a fixed monotonic grid.
+            count (int): Number of rounds, forever if None.
+        """
+        due = time.monotonic()
+        rounds = 0
+        while count is None or rounds < count:
+            await self.round()
+            rounds += 1
+            due += interval
+            if count is None or rounds < count:
+                await asyncio.sleep(max(0.0, due - time.monotonic()))
+        return self.stats()
+
+    def stats(self) -> dict:
+        """Return target -> `LatencyStats` over the current window."""
+        return {
+            target: LatencyStats.from_results(
+                target,
+                [rtt for rtt, _ in results],
+                refused=sum(refused for _, refused in results),
+            )
+            for target, results in self._results.items()
+        }
+
+
+async def probe(destination: str, timeout: float = 1.0, method: str = "auto", port: int = 443):
+    """Probe one destination once. Returns the round trip time in ms, or None if it was lost."""
+    prober = Prober([destination], timeout=timeout, method=method, port=port)
+    return await prober.probe(destination)
+
+
+def probe_blocking(
+    destination: str | tuple, timeout: float = 1.0, method: str = "auto", port: int = 443
+) -> float | None:
+    """
+    Blocking counterpart of `probe`, for callers that may already be inside an event loop.
+
+    Returns the round trip time in ms, or None if it was lost.
+    """
+    method = _resolve_method(method)
+    host, port = destination if isinstance(destination, tuple) else (destination, port)
+    try:
+        family, _, _, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0]
+    except OSError:
+        return None
+    if method == "icmp":
+        sequence = os.getpid() & 0xFFFF
+        return _icmp_probe_blocking(family, address, sequence, timeout)[0]
+    return _tcp_probe_blocking(family, address, timeout)[0]
@@ -1,42 +1,397 @@
-#!/usr/bion/env python3
+#!/usr/bin/env python3
 
 # PROC.py - Query process information for HWINFO
 
-import psutil
-from time import sleep
-import threading
+import heapq
+import os
+import re
+import select
+import signal
+import time
 from dataclasses import dataclass
+from operator import itemgetter
 
+import psutil
 
-@dataclass(frozen=True)
-class Proc:
-    def __init__(self, pid=None):
-        self.pid = pid
-        self.t = threading.Thread(target=self.sigterm_wait, args=(self.pid))
+PROC_ROOT = "/proc"
 
-    def info(self):
-        return psutil.Process(self.pid)
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _boot_time() -> float:
+    """Return the boot time in seconds since the epoch, from the btime line of /proc/stat."""
+    with open(os.path.join(PROC_ROOT, "stat"), "rb") as f:
+        for line in f:
+            if line.startswith(b"btime"):
+                return float(line.split()[1])
+    return 0.0
+
+
+def _read(path: str, size: int = 4096) -> bytes:
+    """Read a small /proc file with as few syscalls as possible."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.read(fd, size)
+    finally:
+        os.close(fd)
+
+
+def _read_cmdline(pid: int, root: str = PROC_ROOT) -> tuple[str, ...]:
+    """Return the arguments of `pid`, or () for kernel threads, zombies and exited processes."""
+    try:
+        raw = _read(f"{root}/{pid}/cmdline", 65536)
+    except OSError:
+        return ()
+    return tuple(arg.decode(errors="replace") for arg in raw.split(b"\0") if arg)
+
+
+def _parse_stat(data: bytes) -> tuple:
+    """
+    Parse /proc/[pid]/stat.
+
+    Returns:
+    -----------
+        tuple: (comm, state, cpu ticks, threads, start time in ticks, vsize, rss in pages)
+    """
+    # comm may itself contain spaces and parentheses, so split on the last ")"
+    close = data.rfind(b")")
+    comm = data[data.find(b"(") + 1 : close].decode(errors="replace")
+    fields = data[close + 2 :].split()
+    return (
+        comm,
+        fields[0].decode(),
+        int(fields[11]) + int(fields[12]),
+        int(fields[17]),
+        int(fields[19]),
+        int(fields[20]),
+        int(fields[21]),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessInfo:
+    """One process as seen by a scan.
+
+    Attributes:
+    ----------
+        pid (int): Process id.
+        name (str): Command name from /proc/[pid]/stat, at most 15 characters.
+        cmdline (tuple[str, ...]): Command line, empty for kernel threads and zombies.
+        started (float): Start time in seconds since the epoch.
+        state (str): One letter state, eg 'R' or 'S'.
+        cpu_percent (float): CPU usage since the previous scan, 100 per fully used core.
+        rss (int): Resident memory in bytes.
+        vms (int): Virtual memory in bytes.
+        threads (int): Number of threads.
+    """
+
+    pid: int
+    name: str
+    cmdline: tuple[str, ...]
+    started: float
+    state: str
+    cpu_percent: float
+    rss: int
+    vms: int
+    threads: int
+
+
+@dataclass(frozen=True, slots=True)
+class ProcessSnapshot:
+    """Summary of one scan of the process table.
+
+    Attributes:
+    ----------
+        processes (int): Number of processes.
+        threads (int): Number of threads of all processes.
+        top_cpu (tuple[ProcessInfo, ...]): Processes using the most CPU, highest first.
+        top_memory (tuple[ProcessInfo, ...]): Processes with the largest RSS, highest first.
+    """
+
+    processes: int
+    threads: int
+    top_cpu: tuple[ProcessInfo, ...]
+    top_memory: tuple[ProcessInfo, ...]
+
+
+class ProcessScanner:
+    """Incremental scanner of /proc keeping the top processes by CPU and memory.
+
+    Each scan reads one /proc/[pid]/stat per process, which already holds the CPU
+    times, thread count and memory sizes. Static fields are cached per process (keyed
+    by pid and start time, so reused pids are noticed), and the command line is only
+    read for processes that make it into a top list. The top lists are selected
+    with a bounded heap instead of sorting every process.
+
+    Example:
+    --------
+        scanner = ProcessScanner(top=5)
+        while True:
+            snapshot = scanner.scan()
+            print([(p.name, p.cpu_percent) for p in snapshot.top_cpu])
+            time.sleep(1)
+    """
+
+    def __init__(self, top: int = 10, root: str = PROC_ROOT):
+        """
+        Parameters:
+        -----------
+            top (int): Number of processes in each top list.
+            root (str): Mount point of procfs.
+        """
+        self.top = top
+        self.root = root
+        self.boot_time = _boot_time()
+        # pid -> (start time in ticks, cmdline or None until it is first needed)
+        self._static = {}
+        # pid -> cpu ticks at the previous scan
+        self._ticks = {}
+        self._taken = None
+
+    def _cmdline(self, pid: int) -> tuple[str, ...]:
+        starttime, cmdline = self._static[pid]
+        if cmdline is None:
+            cmdline = _read_cmdline(pid, self.root)
+            self._static[pid] = (starttime, cmdline)
+        return cmdline
 
+    def scan(self) -> ProcessSnapshot:
+        """Read every process once and return the totals and top lists."""
+        taken = time.monotonic()
+        static = {}
+        ticks = {}
+        rows = []
+        threads = 0
+        root = self.root
+        for entry in os.listdir(root):
+            if not entry.isdigit():
+                continue
+            try:
+                data = _read(f"{root}/{entry}/stat")
+            except OSError:
+                continue  # The process exited
+            # Only the fields needed for every process are parsed here, the rest of the
+            # line is parsed by `_info` for the few processes in the top lists
+            fields = data[data.rfind(b")") + 2 :].split(None, 22)
+            cpu = int(fields[11]) + int(fields[12])
+            starttime = int(fields[19])
+            pid = int(entry)
+            cached = self._static.get(pid)
+            if cached is not None and cached[0] == starttime:
+                static[pid] = cached
+                delta = cpu - self._ticks.get(pid, cpu)
+            else:
+                static[pid] = (starttime, None)
+                delta = 0
+            ticks[pid] = cpu
+            threads += int(fields[17])
+            rows.append((delta, int(fields[21]), pid, data))
+        # Forget processes that exited
+        self._static = static
+        self._ticks = ticks
+        elapsed = taken - self._taken if self._taken is not None else None
+        self._taken = taken
+
+        def info(row: tuple) -> ProcessInfo:
+            return self._info(row, elapsed)
+
+        return ProcessSnapshot(
+            processes=len(rows),
+            threads=threads,
+            top_cpu=tuple(map(info, heapq.nlargest(self.top, rows, key=itemgetter(0)))),
+            top_memory=tuple(map(info, heapq.nlargest(self.top, rows, key=itemgetter(1)))),
+        )
+
+    def _info(self, row: tuple, elapsed: float | None) -> ProcessInfo:
+        delta, _, pid, data = row
+        comm, state, _, num_threads, starttime, vsize, rss = _parse_stat(data)
+        return ProcessInfo(
+            pid=pid,
+            name=comm,
+            cmdline=self._cmdline(pid),
+            started=self.boot_time + starttime / CLOCK_TICKS,
+            state=state,
+            cpu_percent=round(delta / CLOCK_TICKS / elapsed * 100, 1) if elapsed else 0.0,
+            rss=rss * PAGE_SIZE,
+            vms=vsize,
+            threads=num_threads,
+        )
+
+
+def _read_comm(pid: int) -> str:
+    data = _read(f"{PROC_ROOT}/{pid}/stat")
+    return data[data.find(b"(") + 1 : data.rfind(b")")].decode(errors="replace")
+
+
+def _matches(pid: int, pattern: str | re.Pattern) -> bool:
+    """
+    Return True if process `pid` matches `pattern`.
+
+    A string matches the process name or any argument, also by basename (eg 'python3'
+    matches '/usr/bin/python3'). A compiled pattern is searched in the process name
+    and in the command line joined with spaces.
     """
-    def terminate_all(self, pname=self.info().name()):
-        for p in psutil.process_iter(["name","exe","cmdline"]):
-            if pname in p.info.name() or pname in p.info.exe() or pname in p.info.cmdline():
-                if p.is_running():
-                    p.terminate()
-        self.t.start()
+    try:
+        comm = _read_comm(pid)
+    except OSError:
+        return False
+    cmdline = _read_cmdline(pid)
+    if isinstance(pattern, re.Pattern):
+        return bool(pattern.search(comm) or pattern.search(" ".join(cmdline)))
+    return pattern == comm or any(pattern in (arg, os.path.basename(arg)) for arg in cmdline)
+
+
+def find(pattern: str | re.Pattern) -> list[int]:
+    """Return the pids of every process matching `pattern` (see `_matches`), except this one."""
+    own = os.getpid()
+    return [
+        int(entry)
+        for entry in os.listdir(PROC_ROOT)
+        if entry.isdigit() and int(entry) != own and _matches(int(entry), pattern)
+    ]
+
+
+@dataclass(frozen=True, slots=True)
+class TerminateResult:
+    """Outcome of `terminate`.
+
+    Attributes:
+    ----------
+        terminated (tuple[int, ...]): Pids that exited within the grace period.
+        killed (tuple[int, ...]): Pids that were still running and received SIGKILL.
+        failed (tuple[int, ...]): Pids that could not be signalled, eg owned by another user.
+    """
+
+    terminated: tuple[int, ...]
+    killed: tuple[int, ...]
+    failed: tuple[int, ...]
+
+
+def _wait_exited(pidfds: list[int], timeout: float) -> set[int]:
+    """Wait until every pidfd is readable (its process exited) or `timeout` expires.
+
+    Returns:
+    -----------
+        set[int]: The pidfds whose process exited.
     """
+    exited = set()
+    if not pidfds:
+        return exited
+    deadline = time.monotonic() + timeout
+    with select.epoll(len(pidfds)) as epoll:
+        for pidfd in pidfds:
+            epoll.register(pidfd, select.EPOLLIN)
+        while len(exited) < len(pidfds):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for pidfd, _ in epoll.poll(remaining):
+                exited.add(pidfd)
+                epoll.unregister(pidfd)
+    return exited
 
-    def sigterm_wait(self) -> None:
-        sleep(7)
-        self.kill_all()
 
+def terminate(
+    pids: list[int], grace: float = 7.0, pattern: str | re.Pattern | None = None
+) -> TerminateResult:
     """
-    def kill_all(self, pname=self.info().name()):
-        for p in psutil.process_iter(["name","exe","cmdline"]):
-            if pname in p.info.name() or pname in p.info.exe() or pname in p.info.cmdline():
-                if p.is_running():
-                    p.terminate()
+    Send SIGTERM to every process in `pids`, then SIGKILL to those alive after `grace` s.
+
+    Each process is pinned with a pidfd before it is signalled, so a pid reused in the
+    meantime is never hit. All pidfds are waited on together through one epoll, so this
+    returns as soon as the last process exits, without a thread per process.
+
+    Parameters:
+    -----------
+        pids (list[int]): Processes to terminate, eg from `find`.
+        grace (float): Seconds to wait after SIGTERM. 0 sends SIGKILL straight away.
+        pattern (str | re.Pattern): Checked again once each process is pinned, so a pid
+                                    reused since `find` returned it is left alone.
     """
+    pidfds = {}
+    failed = []
+    try:
+        for pid in pids:
+            try:
+                pidfd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                continue  # Already gone
+            except OSError:
+                failed.append(pid)
+                continue
+            if pattern is not None and not _matches(pid, pattern):
+                os.close(pidfd)
+                continue
+            pidfds[pidfd] = pid
+
+        first_signal = signal.SIGTERM if grace > 0 else signal.SIGKILL
+        for pidfd, pid in list(pidfds.items()):
+            try:
+                signal.pidfd_send_signal(pidfd, first_signal)
+            except ProcessLookupError:
+                pass  # Exited, the pidfd is readable already
+            except OSError:
+                failed.append(pid)
+                os.close(pidfds.pop(pidfd))
+
+        exited = _wait_exited(list(pidfds), grace) if grace > 0 else set()
+        survivors = [pidfd for pidfd in pidfds if pidfd not in exited]
+        if grace > 0:
+            for pidfd in survivors:
+                try:
+                    signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        return TerminateResult(
+            terminated=tuple(pidfds[pidfd] for pidfd in exited),
+            killed=tuple(pidfds[pidfd] for pidfd in survivors),
+            failed=tuple(failed),
+        )
+    finally:
+        for pidfd in pidfds:
+            os.close(pidfd)
+
+
+class Proc:
+    def __init__(self, pid=None):
+        self.pid = os.getpid() if pid is None else pid
+
+    def info(self):
+        return psutil.Process(self.pid)
+
+    def stat(self) -> ProcessInfo:
+        """Read this process from /proc/[pid]/stat without going through psutil."""
+        comm, state, _, num_threads, starttime, vsize, rss = _parse_stat(
+            _read(f"{PROC_ROOT}/{self.pid}/stat")
+        )
+        return ProcessInfo(
+            pid=self.pid,
+            name=comm,
+            cmdline=_read_cmdline(self.pid),
+            started=_boot_time() + starttime / CLOCK_TICKS,
+            state=state,
+            cpu_percent=0.0,
+            rss=rss * PAGE_SIZE,
+            vms=vsize,
+            threads=num_threads,
+        )
+
+    def terminate_all(self, pattern: str | re.Pattern | None = None, grace: float = 7.0):
+        """
+        Terminate every process matching `pattern`, by default those named like this one.
+
+        See `terminate`. This process itself is never included.
+        """
+        if pattern is None:
+            pattern = _read_comm(self.pid)
+        return terminate(find(pattern), grace, pattern)
+
+    def kill_all(self, pattern: str | re.Pattern | None = None):
+        """Send SIGKILL to every process matching `pattern` without a grace period."""
+        if pattern is None:
+            pattern = _read_comm(self.pid)
+        return terminate(find(pattern), 0.0, pattern)
 
     def __str__(self):
         return self.info().name()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""RECORDING.py - Compact append-only binary recordings of sensor streams.
+
+File layout (all integers little-endian):
+
+    header      64 bytes, see `HEADER`
+    dictionary  metric names, each as u16 length + UTF-8 bytes, padded to 8 bytes
+    records     fixed width: int64 wall-clock ns, then one float64 per metric
+
+Missing values are stored as NaN. The file is grown in chunks of zero bytes, so a
+record whose timestamp is 0 marks the end of the data. The header records how many
+records were committed at the last sync. `Reader` also scans past that count, so
+records written before a crash are recovered up to the first incomplete one.
+"""
+
+import math
+import mmap
+import os
+import struct
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAGIC = b"HWREC\x00\x00\x01"
+VERSION = 1
+
+# magic, version, metric count, record size, data offset, committed records, created ns
+HEADER = struct.Struct("<8sIIIQQq")
+HEADER_SIZE = 64
+COMMITTED_OFFSET = 8 + 4 + 4 + 4 + 8
+
+# Records added to the file each time it runs out of space
+GROW_RECORDS = 4096
+
+
+def _read_header(buffer) -> tuple[list[str], int, int, int]:
+    """Parse header and dictionary, returning metrics, record size, data offset and count."""
+    magic, version, metric_count, record_size, data_offset, committed, _ = HEADER.unpack_from(
+        buffer, 0
+    )
+    if magic != MAGIC:
+        raise ValueError("Not an hwutils recording (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"Unsupported recording version {version}")
+    metrics = []
+    offset = HEADER_SIZE
+    for _ in range(metric_count):
+        (length,) = struct.unpack_from("<H", buffer, offset)
+        metrics.append(bytes(buffer[offset + 2 : offset + 2 + length]).decode())
+        offset += 2 + length
+    return metrics, record_size, data_offset, committed
+
+
+def _count_records(buffer, record_size: int, data_offset: int, committed: int) -> int:
+    """Return how many complete records the file holds, scanning past the committed count."""
+    capacity = (len(buffer) - data_offset) // record_size
+    count = min(committed, capacity)
+    while count < capacity:
+        (timestamp,) = struct.unpack_from("<q", buffer, data_offset + count * record_size)
+        if not timestamp:
+            break
+        count += 1
+    return count
+
+
+class Writer:
+    """Append records to a recording through a writable memory map.
+
+    Example:
+    --------
+        with Writer("capture.hwrec", ["cpu.temp", "gpu.power"]) as writer:
+            writer.append({"cpu.temp": 45.0, "gpu.power": 120.5})
+    """
+
+    def __init__(self, path: str, metrics: list[str], sync_interval: float = 5.0):
+        """
+        Create `path`, or reopen it for appending if it exists with the same metrics.
+
+        Parameters:
+        -----------
+            path (str): File to write.
+            metrics (list[str]): Names of the metrics in every record, in column order.
+            sync_interval (float): Seconds between `msync` calls of the written data.
+        """
+        self.path = path
+        self.metrics = list(metrics)
+        self.sync_interval = sync_interval
+        self._columns = {name: i for i, name in enumerate(self.metrics)}
+        self._record = struct.Struct(f"<q{len(self.metrics)}d")
+        self.record_size = self._record.size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size:
+            try:
+                self._map = mmap.mmap(self._fd, size)
+            except BaseException:
+                os.close(self._fd)
+                raise
+            try:
+                metrics, record_size, self.data_offset, committed = _read_header(self._map)
+                if metrics != self.metrics:
+                    raise ValueError(f"{path} records {metrics}, not {self.metrics}")
+            except BaseException:
+                self._map.close()
+                os.close(self._fd)
+                raise
+            self.count = _count_records(self._map, record_size, self.data_offset, committed)
+        else:
+            dictionary = b"".join(
+                struct.pack("<H", len(name.encode())) + name.encode() for name in self.metrics
+            )
+            self.data_offset = -(-(HEADER_SIZE + len(dictionary)) // 8) * 8
+            os.ftruncate(self._fd, self.data_offset + GROW_RECORDS * self.record_size)
+            self._map = mmap.mmap(self._fd, 0)
+            HEADER.pack_into(
+                self._map,
+                0,
+                MAGIC,
+                VERSION,
+                len(self.metrics),
+                self.record_size,
+                self.data_offset,
+                0,
+                time.time_ns(),
+            )
+            self._map[HEADER_SIZE : HEADER_SIZE + len(dictionary)] = dictionary
+            self.count = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, values: dict[str, float], timestamp_ns: int | None = None) -> None:
+        """
+        Append one record.
+
+        Parameters:
+        -----------
+            values (dict): Metric name -> value. Metrics left out are stored as NaN.
+            timestamp_ns (int): Wall-clock time in ns. Defaults to `time.time_ns()`.
+        """
+        row = [math.nan] * len(self.metrics)
+        for name, value in values.items():
+            row[self._columns[name]] = value
+        offset = self.data_offset + self.count * self.record_size
+        if offset + self.record_size > len(self._map):
+            self._grow()
+        self._record.pack_into(self._map, offset, timestamp_ns or time.time_ns(), *row)
+        self.count += 1
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def _grow(self) -> None:
+        """Extend the file by `GROW_RECORDS` zeroed records and remap it."""
+        self.sync()
+        self._map.close()
+        os.ftruncate(self._fd, os.fstat(self._fd).st_size + GROW_RECORDS * self.record_size)
+        self._map = mmap.mmap(self._fd, 0)
+
+    def sync(self) -> None:
+        """Commit the record count to the header and msync the map to disk."""
+        struct.pack_into("<Q", self._map, COMMITTED_OFFSET, self.count)
+        self._map.flush()
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Sync, trim the unused preallocated space and close the file."""
+        if self._fd is None:
+            return
+        self.sync()
+        self._map.close()
+        os.ftruncate(self._fd, self.data_offset + self.count * self.record_size)
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self) -> "Writer":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class Reader:
+    """Read a recording through a read-only memory map without parsing or copying.
+
+    Columns are returned as views into the map. Release them (or let them go out of
+    scope) before calling `close`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.metrics, self.record_size, self.data_offset, committed = _read_header(self._map)
+        self.count = _count_records(self._map, self.record_size, self.data_offset, committed)
+        self._width = len(self.metrics) + 1
+
+    def _data(self, typecode: str) -> memoryview:
+        """Return the complete records as a flat memoryview of `typecode` items."""
+        end = self.data_offset + self.count * self.record_size
+        return memoryview(self._map)[self.data_offset : end].cast(typecode)
+
+    def timestamps(self):
+        """Return the timestamps (int64 ns) of all records as a strided memoryview."""
+        return self._data("q")[:: self._width]
+
+    def column(self, name: str):
+        """Return the values (float64) of metric `name` as a strided memoryview."""
+        return self._data("d")[self.metrics.index(name) + 1 :: self._width]
+
+    def array(self):
+        """
+        Return all records as a NumPy structured array backed by the map.
+
+        Fields are 'timestamp' plus one per metric, eg `reader.array()["cpu.temp"]`.
+
+        Raises:
+        -----------
+            ImportError: If NumPy is not installed.
+        """
+        if numpy is None:
+            raise ImportError("numpy is required for Reader.array()")
+        dtype = numpy.dtype([("timestamp", "<i8")] + [(name, "<f8") for name in self.metrics])
+        return numpy.frombuffer(self._map, dtype=dtype, count=self.count, offset=self.data_offset)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._map.close()
+
+    def __enter__(self) -> "Reader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
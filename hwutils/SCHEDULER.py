@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""SCHEDULER.py - Poll sensors continuously, each metric at its own rate."""
+
+import heapq
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .Sensor import SensorReading, SensorType
+
+# Metrics due within this many seconds of each other are read in the same tick
+COALESCE_WINDOW = 0.005
+
+
+@dataclass(order=True)
+class Metric:
+    """A value to poll and how often.
+
+    Attributes:
+    ----------
+        due (float): `time.monotonic()` at which the metric is next read.
+        name (str): Name given to its readings, eg 'gpu.power'.
+        read (Callable): Returns the current value.
+        interval (float): Seconds between reads.
+        sensor_type (SensorType): Type given to its readings.
+    """
+
+    due: float
+    name: str = field(compare=False)
+    read: Callable[[], float] = field(compare=False)
+    interval: float = field(compare=False)
+    sensor_type: SensorType = field(compare=False)
+
+
+class Scheduler:
+    """Multi-rate sampler that delivers `SensorReading` batches to subscribers.
+
+    Every metric is read on a fixed grid of `interval` seconds on the monotonic clock,
+    so slow reads or late wakeups do not make the schedule drift. Metrics that are due
+    at the same tick are read together and delivered as one batch.
+
+    Example:
+    --------
+        scheduler = Scheduler()
+        scheduler.add("gpu.power", lambda: gpu.snapshot().power, 0.2, SensorType.POWER)
+        scheduler.add("fan.cpu", lambda: Fan("fan1").speed, 2, SensorType.FAN_SPEED)
+        scheduler.add("disk.root", Disk("/").percent_used, 60, SensorType.USAGE)
+        scheduler.subscribe(print)
+        scheduler.start()
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._subscribers = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add(
+        self,
+        name: str,
+        read: Callable[[], float],
+        interval: float,
+        sensor_type: SensorType = SensorType.USAGE,
+    ) -> None:
+        """
+        Poll `read` every `interval` seconds, starting at the next tick.
+
+        Parameters:
+        -----------
+            name (str): Name given to the readings.
+            read (Callable): Returns the current value. Exceptions skip that reading.
+            interval (float): Seconds between reads.
+            sensor_type (SensorType): Type given to the readings.
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        with self._lock:
+            heapq.heappush(
+                self._metrics, Metric(time.monotonic(), name, read, interval, sensor_type)
+            )
+
+    def subscribe(self, callback: Callable[[list[SensorReading]], None]) -> None:
+        """Call `callback` with the list of readings taken at every tick."""
+        self._subscribers.append(callback)
+
+    def tick(self) -> list[SensorReading]:
+        """Read every metric that is due, reschedule it and notify subscribers."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            while self._metrics and self._metrics[0].due <= now + COALESCE_WINDOW:
+                due.append(heapq.heappop(self._metrics))
+
+        timestamp = datetime.now()
+        readings = []
+        for metric in due:
+            try:
+                value = float(metric.read())
+            except Exception:
+                pass
+            else:
+                reading_id = next(self._ids)
+                readings.append(
+                    SensorReading(reading_id, metric.sensor_type, value, timestamp, metric.name)
+                )
+            # Stay on the original grid, skipping any slots missed while we were busy
+            metric.due += metric.interval
+            if metric.due <= now:
+                missed = (now - metric.due) // metric.interval + 1
+                metric.due += missed * metric.interval
+
+        with self._lock:
+            for metric in due:
+                heapq.heappush(self._metrics, metric)
+
+        if readings:
+            for callback in self._subscribers:
+                callback(readings)
+        return readings
+
+    def run(self, duration: float | None = None) -> None:
+        """Poll in the calling thread until `stop` is called or `duration` seconds pass."""
+        deadline = None if duration is None else time.monotonic() + duration
+        while not self._stop.is_set():
+            self.tick()
+            with self._lock:
+                next_due = self._metrics[0].due if self._metrics else time.monotonic() + 1
+            if deadline is not None and next_due > deadline:
+                break
+            self._stop.wait(max(0.0, next_due - time.monotonic()))
+
+    def start(self) -> None:
+        """Poll in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="hwutils-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and wait for the background thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -1,42 +1,323 @@
+import os
 import re
+import select
 import subprocess
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
 
 import psutil
 
-from .Sensor import Sensor
+from . import HWMON
+from .Sensor import Sensor, run_command
+
+MEMINFO_PATH = "/proc/meminfo"
+MEMORY_PRESSURE_PATH = "/proc/pressure/memory"
+
+
+def _read_meminfo(path: str = MEMINFO_PATH) -> dict[str, int]:
+    """Return /proc/meminfo as field -> value, in bytes for fields reported in kB."""
+    with open(path, "rb") as f:
+        data = f.read()
+    meminfo = {}
+    for line in data.splitlines():
+        key, _, value = line.partition(b":")
+        fields = value.split()
+        if fields:
+            meminfo[key.decode()] = int(fields[0]) * (1024 if len(fields) > 1 else 1)
+    return meminfo
+
+
+@dataclass(frozen=True, slots=True)
+class MemorySnapshot:
+    """Memory usage from a single read of /proc/meminfo. All sizes are in bytes.
+
+    Attributes:
+    ----------
+        total (int): Usable physical memory.
+        available (int): Memory available to new allocations without swapping.
+        used (int): Memory in use, `total - available` as psutil computes it.
+        free (int): Completely unused memory.
+        percent (float): Percentage of `total` that is not available.
+        buffers (int): Block device buffers.
+        cached (int): Page cache and reclaimable slab.
+        shared (int): Shared memory and tmpfs.
+        dirty (int): Page cache waiting to be written back.
+        writeback (int): Page cache being written back.
+        slab (int): Kernel slab, reclaimable and not.
+        slab_reclaimable (int): Part of `slab` that can be reclaimed.
+        swap_total (int): Total swap space.
+        swap_free (int): Unused swap space.
+        hugepages_total (int): Number of preallocated huge pages.
+        hugepages_free (int): Number of huge pages not in use.
+        hugepage_size (int): Size of one huge page.
+    """
+
+    total: int
+    available: int
+    used: int
+    free: int
+    percent: float
+    buffers: int
+    cached: int
+    shared: int
+    dirty: int
+    writeback: int
+    slab: int
+    slab_reclaimable: int
+    swap_total: int
+    swap_free: int
+    hugepages_total: int
+    hugepages_free: int
+    hugepage_size: int
+
+    @classmethod
+    def from_meminfo(cls, meminfo: dict[str, int]) -> "MemorySnapshot":
+        """Build a snapshot from the fields returned by `_read_meminfo`."""
+        total = meminfo["MemTotal"]
+        free = meminfo["MemFree"]
+        buffers = meminfo.get("Buffers", 0)
+        cached = meminfo.get("Cached", 0) + meminfo.get("SReclaimable", 0)
+        available = meminfo.get("MemAvailable", free + buffers + cached)
+        return cls(
+            total=total,
+            available=available,
+            used=total - available,
+            free=free,
+            percent=round(100 * (total - available) / total, 1),
+            buffers=buffers,
+            cached=cached,
+            shared=meminfo.get("Shmem", 0),
+            dirty=meminfo.get("Dirty", 0),
+            writeback=meminfo.get("Writeback", 0),
+            slab=meminfo.get("Slab", 0),
+            slab_reclaimable=meminfo.get("SReclaimable", 0),
+            swap_total=meminfo.get("SwapTotal", 0),
+            swap_free=meminfo.get("SwapFree", 0),
+            hugepages_total=meminfo.get("HugePages_Total", 0),
+            hugepages_free=meminfo.get("HugePages_Free", 0),
+            hugepage_size=meminfo.get("Hugepagesize", 0),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PressureStats:
+    """Pressure stall information for memory, from /proc/pressure/memory.
+
+    'some' is the share of time at least one task was stalled waiting for memory,
+    'full' the share of time all non-idle tasks were stalled at once.
+
+    Attributes:
+    ----------
+        some_avg10 (float): 'some' percentage over the last 10 s.
+        some_avg60 (float): 'some' percentage over the last 60 s.
+        some_avg300 (float): 'some' percentage over the last 300 s.
+        some_total (int): Total 'some' stall time in µs.
+        full_avg10 (float): 'full' percentage over the last 10 s.
+        full_avg60 (float): 'full' percentage over the last 60 s.
+        full_avg300 (float): 'full' percentage over the last 300 s.
+        full_total (int): Total 'full' stall time in µs.
+    """
+
+    some_avg10: float
+    some_avg60: float
+    some_avg300: float
+    some_total: int
+    full_avg10: float
+    full_avg60: float
+    full_avg300: float
+    full_total: int
+
+    @classmethod
+    def from_output(cls, data: str) -> "PressureStats":
+        values = {}
+        for line in data.splitlines():
+            kind, *fields = line.split()
+            for field in fields:
+                key, _, value = field.partition("=")
+                values[f"{kind}_{key}"] = int(value) if key == "total" else float(value)
+        return cls(**values)
+
+
+@dataclass(frozen=True, slots=True)
+class PressureTrigger:
+    """A PSI trigger: fire when tasks stall for `stall_us` within any `window_us`.
+
+    Attributes:
+    ----------
+        kind (str): 'some' or 'full', see `PressureStats`.
+        stall_us (int): Stall time in µs that fires the trigger.
+        window_us (int): Length of the window in µs, from 500 ms to 10 s.
+    """
+
+    kind: str
+    stall_us: int
+    window_us: int
+
+
+class MemoryPressure:
+    """Memory pressure stall information, read on demand or pushed by PSI triggers.
+
+    Each trigger added with `add_trigger` is a file descriptor the kernel marks with
+    POLLPRI when its threshold is crossed. `wait` blocks in a single `poll` on all of
+    them, so callers wake up within the trigger window of a stall without polling.
+    Unprivileged processes may only use windows that are multiples of 2 s.
+
+    Example:
+    --------
+        pressure = MemoryPressure()
+        pressure.add_trigger("some", stall_us=150_000, window_us=1_000_000)
+        while True:
+            for trigger in pressure.wait():
+                print("memory stall", trigger, pressure.read())
+    """
+
+    def __init__(self, path: str = MEMORY_PRESSURE_PATH):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        self._poll = select.poll()
+        self._triggers = {}
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def read(self) -> PressureStats:
+        """Return the current averages and totals."""
+        return PressureStats.from_output(os.pread(self._fd, 4096, 0).decode())
+
+    def add_trigger(
+        self, kind: str = "some", stall_us: int = 150_000, window_us: int = 1_000_000
+    ) -> PressureTrigger:
+        """
+        Register a trigger with the kernel.
+
+        Raises:
+        -----------
+            OSError: If the kernel rejects the trigger, eg an unprivileged window that
+                     is not a multiple of 2 s.
+        """
+        trigger = PressureTrigger(kind, stall_us, window_us)
+        fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+        try:
+            os.write(fd, f"{kind} {stall_us} {window_us}\0".encode())
+        except OSError:
+            os.close(fd)
+            raise
+        self._triggers[fd] = trigger
+        self._poll.register(fd, select.POLLPRI)
+        return trigger
+
+    def wait(self, timeout: float | None = None) -> list[PressureTrigger]:
+        """
+        Block until a trigger fires or `timeout` seconds pass.
+
+        Returns:
+        -----------
+            list[PressureTrigger]: The triggers that fired, empty on timeout.
+
+        Raises:
+        -----------
+            ValueError: If no trigger was added, as there would be nothing to wait for.
+            OSError: If a trigger was invalidated, eg because its cgroup was removed.
+        """
+        if not self._triggers:
+            raise ValueError("No pressure triggers to wait for, see add_trigger")
+        fired = []
+        for fd, events in self._poll.poll(None if timeout is None else timeout * 1000):
+            if events & select.POLLERR:
+                raise OSError(f"PSI trigger {self._triggers[fd]} is no longer valid")
+            if events & select.POLLPRI:
+                fired.append(self._triggers[fd])
+        return fired
+
+    def subscribe(self, callback: Callable[[PressureTrigger, PressureStats], None]) -> None:
+        """Call `callback(trigger, stats)` whenever a trigger fires, once `start` is called."""
+        self._subscribers.append(callback)
+
+    def run(self) -> None:
+        """Deliver fired triggers to subscribers until `stop` is called."""
+        while not self._stop.is_set():
+            # The timeout only bounds how long `stop` takes, stalls still wake us at once
+            fired = self.wait(timeout=0.5)
+            if fired:
+                stats = self.read()
+                for trigger in fired:
+                    for callback in self._subscribers:
+                        callback(trigger, stats)
+
+    def start(self) -> None:
+        """Wait for triggers in a background thread. Raises ValueError if there are none."""
+        if not self._triggers:
+            raise ValueError("No pressure triggers to wait for, see add_trigger")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="hwutils-pressure", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop waiting and wait for the background thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop, and release the triggers."""
+        self.stop()
+        for fd in self._triggers:
+            os.close(fd)
+        self._triggers.clear()
+        os.close(self._fd)
 
 
 class Temp(Sensor):
     """Class for handling temperature sensor data."""
 
-    def __init__(self):
-        """Initialize the temperature sensor data."""
+    def __init__(self, label: str = "Sensor 2", source: str = "auto"):
+        """Initialize the temperature sensor data.
+
+        `label` is the sensor to report and `source` is one of 'hwmon', 'sensors'
+        or 'auto' (hwmon with lm-sensors as the fallback).
+        """
         self.type = "SYS"
-        # Precompile the regex pattern to match two consecutive digits which represent the temperature
-        self.temp_regex = re.compile(r"(\d{2})")
+        self.label = label
+        self.source = source
         self.name = "Sys"
         super().__init__("hw")
 
     @property
     def temp(self):
-        """Get the temperature data from the sensors using a subprocess."""
+        """Get the temperature data from hwmon, or from the shared lm-sensors snapshot."""
+        hwmon = HWMON.select(self.source)
+        if hwmon is not None:
+            feature = hwmon.find(self.label, kind="temp")
+            if feature is not None:
+                return int(feature.read())
+            if self.source == "hwmon":
+                raise LookupError(f"{self.label} not found in hwmon")
 
-        command_output = subprocess.run(
-            "sensors | grep 'Sensor 2' | awk  '{print $3}'",
-            shell=True,
-            capture_output=True,
-            text=True,
-            check=False,
-        ).stdout.strip()
-
-        # Extract the first matching temperature value
-        temperature_match = self.temp_regex.search(command_output)
-        if temperature_match:
-            return int(temperature_match.group())
+        temperature = HWMON.sensors_snapshot().find(self.label, kind="temp")
+        if temperature is not None:
+            return int(temperature)
 
         # If no temperature is matched, return a default or error value
         return "Error: Temperature not found"
 
+    async def atemp(self):
+        """Async counterpart of `temp`, sharing the lm-sensors snapshot through asyncio."""
+        import asyncio
+
+        hwmon = HWMON.select(self.source)
+        feature = hwmon.find(self.label, kind="temp") if hwmon is not None else None
+        if feature is not None:
+            return int(await asyncio.to_thread(feature.read))
+        if self.source == "hwmon":
+            raise LookupError(f"{self.label} not found in hwmon")
+
+        temperature = (await HWMON.asensors_snapshot()).find(self.label, kind="temp")
+        if temperature is not None:
+            return int(temperature)
+        return "Error: Temperature not found"
+
     def __str__(self):
         """Returns a string representation of the temperature data."""
         current_temp = self.temp
@@ -55,21 +336,25 @@ class Ram(Sensor):
     def info(self):
         return psutil.virtual_memory()
 
+    def snapshot(self) -> MemorySnapshot:
+        """Read every memory statistic from one read of /proc/meminfo."""
+        return MemorySnapshot.from_meminfo(_read_meminfo())
+
     @property
     def percent_used(self) -> int:
-        return int(psutil.virtual_memory().percent)
+        return int(self.snapshot().percent)
 
     @property
     def available(self) -> int:
-        return int(psutil.virtual_memory().available)
+        return self.snapshot().available
 
     @property
     def used(self) -> int:
-        return int(psutil.virtual_memory().used)
+        return self.snapshot().used
 
     @property
     def total(self) -> int:
-        return int(psutil.virtual_memory().total)
+        return self.snapshot().total
 
     def __str__(self) -> str:
         return f"Ram: {self.percent_used}%"
@@ -81,12 +366,26 @@ class Misc(Sensor):
 
     def get_uptime(self):
         # Get the uptime data from the sensors using a subprocess
-        command_output = subprocess.run(
-            "uptime -p", shell=True, capture_output=True, text=True, check=False
-        ).stdout.strip()
+        try:
+            command_output = subprocess.run(
+                ["uptime", "-p"], capture_output=True, text=True, check=False
+            ).stdout
+        except OSError:
+            command_output = ""
+        return self._parse_uptime(command_output)
+
+    async def aget_uptime(self):
+        """Async counterpart of `get_uptime`, running `uptime -p` without blocking the loop."""
+        try:
+            command_output = await run_command("uptime", "-p")
+        except (OSError, TimeoutError):
+            command_output = ""
+        return self._parse_uptime(command_output)
 
+    @staticmethod
+    def _parse_uptime(command_output: str) -> str:
         # Extract the first matching uptime value
-        uptime_match = re.search(r"(\d+\s+\w+.*)+", command_output)
+        uptime_match = re.search(r"(\d+\s+\w+.*)+", command_output.strip())
         if uptime_match:
             return uptime_match.group()
 
@@ -1,6 +1,11 @@
 """Contains the classes for sensor readings and system statistic."""
 
-from dataclasses import dataclass
+import functools
+import itertools
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime
 from enum import Enum
 
@@ -11,6 +16,8 @@ class SensorType(Enum):
     CLOCK_SPEED = "CLOCK_SPEED"
     PING = "PING"
     USAGE = "USAGE"
+    POWER = "POWER"
+    FAN_SPEED = "FAN_SPEED"
 
 
 @dataclass
@@ -19,32 +26,216 @@ class SensorReading:
     sensor_type: SensorType
     value: float  # Value of the sensor reading (e.g. temperature in Celsius, voltage in volts)
     timestamp: datetime  # Timestamp when the sensor reading was taken
+    name: str = ""  # Name of the metric the reading belongs to (e.g. "gpu.power")
+    stale: bool = False  # True if the value is left over from an earlier update
+
+
+async def run_command(*argv: str, timeout: float | None = 5.0) -> str:
+    """
+    Run an external tool without a shell and return its stdout, without blocking the loop.
+
+    The child is killed if `timeout` expires (raising `TimeoutError`) or the awaiting
+    task is cancelled.
+    """
+    import asyncio
+
+    process = await asyncio.create_subprocess_exec(
+        *argv, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+    return stdout.decode()
+
+
+def counter_delta(current: int, previous: int, bits: int = 64) -> int:
+    """
+    Return how much a kernel counter advanced since `previous`.
+
+    Parameters:
+    -----------
+        current (int): The counter now.
+        previous (int): The counter at the previous reading.
+        bits (int): Width of the counter. Only counters the caller knows to be narrower
+                    than 64 bits are assumed to have wrapped when they go backwards.
+
+    Returns:
+    -----------
+        int: The increase, or 0 if a 64 bit counter went backwards because it was reset
+             (eg the network interface was recreated).
+    """
+    if current >= previous:
+        return current - previous
+    # A 32 bit counter wraps in seconds at 10 Gbit/s, a 64 bit one never does
+    if bits < 64 and previous < 2**bits:
+        return current + 2**bits - previous
+    return 0
+
+
+class DaemonCall:
+    """Run `function(*args)` once on a daemon thread.
+
+    Unlike a `concurrent.futures` worker, the thread is not joined when the interpreter
+    exits, so a read stuck in the kernel (eg statvfs on a dead NFS server) cannot keep
+    the process alive.
+    """
+
+    def __init__(self, function: Callable, *args, name: str | None = None):
+        self.result = None
+        self.error = None
+        self._done = threading.Event()
+        threading.Thread(target=self._run, args=(function, args), name=name, daemon=True).start()
+
+    def _run(self, function: Callable, args: tuple) -> None:
+        try:
+            self.result = function(*args)
+        except Exception as error:
+            self.error = error
+        finally:
+            self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for the call to finish. Returns False if `timeout` expired first."""
+        return self._done.wait(timeout)
+
+
+def wait_calls(calls, timeout: float | None = None) -> list[DaemonCall]:
+    """Wait until every call in `calls` finished or `timeout` expired. Returns the finished ones."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for call in calls:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not call.wait(remaining):
+            break
+    return [call for call in calls if call.done()]
+
+
+# The hardware modules import this one, so they are imported when first needed.
+@functools.cache
+def _cpu():
+    from .CPU import CpuData
+
+    return CpuData()
+
+
+@functools.cache
+def _gpu():
+    from .GPU import GpuData
+
+    return GpuData()
+
+
+# Collectors return field name -> (sensor type, value) for the `SystemStats` fields they fill.
+def _collect_cpu() -> dict[str, tuple[SensorType, float]]:
+    sample = _cpu().sample()
+    return {
+        "cpu_temp": (SensorType.TEMP, sample.average_temp),
+        "cpu_voltage": (SensorType.VOLTAGE, sample.voltage),
+    }
+
+
+def _collect_gpu() -> dict[str, tuple[SensorType, float]]:
+    snapshot = _gpu().snapshot()
+    return {
+        "gpu_temp": (SensorType.TEMP, snapshot.core_temp),
+        "gpu_memory_clock": (SensorType.CLOCK_SPEED, snapshot.memory_clock),
+        "gpu_power": (SensorType.POWER, snapshot.power),
+    }
+
+
+def _collect_ram() -> dict[str, tuple[SensorType, float]]:
+    from .SYS import Ram
+
+    return {"ram_usage": (SensorType.USAGE, Ram().percent_used)}
+
+
+def _collect_ping() -> dict[str, tuple[SensorType, float | None]]:
+    # None when the probe was lost, so the previous reading is kept and marked stale
+    from .PING import probe_blocking
+
+    return {"ping": (SensorType.PING, probe_blocking("1.1.1.1"))}
+
+
+DEFAULT_COLLECTORS = {
+    "cpu": _collect_cpu,
+    "gpu": _collect_gpu,
+    "ram": _collect_ram,
+    "ping": _collect_ping,
+}
 
 
 @dataclass
 class SystemStats:
+    """Latest system-wide readings, refreshed concurrently by `update`.
+
+    Each collector in `collectors` runs on its own daemon thread. `update` waits at most
+    `deadline` seconds. Fields whose collector is late or fails keep their previous
+    reading with `stale=True`, and a collector that is still running from an earlier
+    update is not started again.
+    """
+
     cpu_temp: SensorReading | None = None
     cpu_voltage: SensorReading | None = None
+    gpu_temp: SensorReading | None = None
     gpu_memory_clock: SensorReading | None = None
+    gpu_power: SensorReading | None = None
+    ram_usage: SensorReading | None = None
     ping: SensorReading | None = None
+    deadline: float = 1.0
+    collectors: dict[str, Callable[[], dict]] = field(
+        default_factory=lambda: dict(DEFAULT_COLLECTORS), repr=False
+    )
+    _pending: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _ids: itertools.count = field(
+        default_factory=lambda: itertools.count(1), init=False, repr=False, compare=False
+    )
 
     def update(self) -> int:
-        return 1
+        """
+        Run every collector concurrently and wait up to `deadline` seconds.
+
+        Returns:
+        -----------
+            int: Number of fields that received a fresh reading.
+        """
+        for name, collector in self.collectors.items():
+            if name not in self._pending:
+                self._pending[name] = DaemonCall(collector, name=f"hwutils-stats-{name}")
+
+        wait_calls(list(self._pending.values()), timeout=self.deadline)
+        timestamp = datetime.now()
+        fresh = set()
+        for name, call in list(self._pending.items()):
+            if not call.done():
+                continue
+            del self._pending[name]
+            if call.error is not None:
+                continue
+            for key, (sensor_type, value) in call.result.items():
+                if value is None:
+                    continue
+                reading = SensorReading(next(self._ids), sensor_type, float(value), timestamp, key)
+                setattr(self, key, reading)
+                fresh.add(key)
+
+        for stat in fields(self):
+            reading = getattr(self, stat.name)
+            if isinstance(reading, SensorReading) and stat.name not in fresh:
+                setattr(self, stat.name, replace(reading, stale=True))
+        return len(fresh)
+
+    def close(self) -> None:
+        """Forget late collectors without waiting for them. Their threads exit on their own."""
+        self._pending.clear()
 
 
+# Shared instance, filled in by calling `system_stats.update()`
 system_stats = SystemStats()
-system_stats.cpu_temp = SensorReading(
-    id=1,
-    sensor_type=SensorType.TEMP,
-    value=40.0,  # Temperature in Celsius
-    timestamp=datetime.now(),
-)
-system_stats.gpu_memory_clock = SensorReading(
-    id=2,
-    sensor_type=SensorType.CLOCK_SPEED,
-    value=1500.0,  # Memory clock speed in MHz
-    timestamp=datetime.now(),
-)
 
 
 class Sensor:
@@ -1,30 +1,52 @@
 #!/usr/bin/env python3
-"""__init__.py - Initializes the hwutils package."""
-
-from .CPU import CpuData
-from .DISK import Disk
-from .FAN import Fan
-from .GPU import GpuData
-from .NET import Interface
-
-# from .PROC import Proc
-from .Sensor import Sensor, SensorReading, SystemStats
-from .SYS import Misc, Ram, Temp
-
-__all__ = [
-    "GpuData",
-    "CpuData",
-    "Fan",
-    "Ram",
-    "Misc",
-    "Interface",
-    "Disk",
-    "Temp",
-    # "Proc",
-    "Sensor",
-    "SensorReading",
-    "SystemStats",
-]
+"""__init__.py - Initializes the hwutils package.
+
+Public names are imported from their submodule on first access, so
+`import hwutils` (and the CLI) only pays for the subsystems it uses.
+"""
+
+import importlib
+
+# Bound eagerly: importing any submodule would otherwise set `hwutils.Sensor` to the
+# module of the same name, and `__getattr__` is never consulted for existing attributes
+from .Sensor import Sensor
+
+# Public name -> submodule that defines it
+_exports = {
+    "GpuData": ".GPU",
+    "GpuSnapshot": ".GPU",
+    "CpuData": ".CPU",
+    "CpuSample": ".CPU",
+    "Fan": ".FAN",
+    "Ram": ".SYS",
+    "Misc": ".SYS",
+    "Interface": ".NET",
+    "Disk": ".DISK",
+    "Temp": ".SYS",
+    "Proc": ".PROC",
+    "ProcessScanner": ".PROC",
+    "SensorReading": ".Sensor",
+    "SystemStats": ".Sensor",
+    "SensorType": ".Sensor",
+    "Scheduler": ".SCHEDULER",
+    "History": ".HISTORY",
+    "Prober": ".PING",
+}
+
+__all__ = ["Sensor", *_exports]
+
+
+def __getattr__(name: str):
+    """Import `name` from its submodule the first time it is accessed."""
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
 
 
 # print(GpuData().__doc__)
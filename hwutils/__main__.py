@@ -1,13 +1,10 @@
 #!/usr/bin/env python3
-"""__main__.py - Command-line interface for HWINFO."""
+"""__main__.py - Command-line interface for HWINFO.
 
-import argparse
+Each subcommand imports only the module it needs to keep startup fast.
+"""
 
-from .CPU import CpuData
-from .DISK import Disk
-from .GPU import GpuData
-from .NET import Interface
-from .SYS import Ram, Temp
+import argparse
 
 
 def main() -> None:
@@ -41,6 +38,22 @@ def main() -> None:
     # Temperature command
     subparsers.add_parser("temp", help="Display temperature information.")
 
+    # Metrics exporter command
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve metrics for Prometheus on /metrics in OpenMetrics format."
+    )
+    serve_parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to bind.")
+    serve_parser.add_argument("--port", type=int, default=9101, help="Port to listen on.")
+    serve_parser.add_argument(
+        "--interval", type=float, default=5.0, help="Seconds between collections."
+    )
+    serve_parser.add_argument(
+        "--mountpoint",
+        action="append",
+        dest="mountpoints",
+        help="Mount point to report disk usage for. May be repeated, defaults to /.",
+    )
+
     # Parse arguments and execute commands
     args = parser.parse_args()
 
@@ -48,26 +61,41 @@ def main() -> None:
         # hwdata_init()  # Ensure the package is initialized
 
         if args.command == "cpu":
+            from .CPU import CpuData
+
             cpu = CpuData()
+            sample = cpu.sample()
             print(f"CPU Name: {cpu.name}")
-            print(f"Max Clock Speed: {cpu.max_clock} MHz")
-            print(f"Average Temperature: {cpu.average_temp}°C")
+            print(f"Max Clock Speed: {sample.max_clock} MHz")
+            print(f"Average Temperature: {sample.average_temp}°C")
 
         elif args.command == "gpu":
+            from .GPU import GpuData
+
             gpu = GpuData()
             print(f"GPU Name: {gpu.name}")
             print(f"Temperature: {gpu.temp}°C")
 
         elif args.command == "disk":
+            from .DISK import Disk
+
             disk = Disk(args.mountpoint)
-            print(f"{disk.friendly_name or args.mountpoint}: {disk.percent_used()}% used")
+            usage = disk.usage()
+            if usage is None:
+                print(f"{disk.friendly_name or args.mountpoint}: not responding")
+            else:
+                print(f"{disk.friendly_name or args.mountpoint}: {usage.percent}% used")
 
         elif args.command == "ram":
-            ram = Ram()
-            print(f"Total RAM: {ram.total / (1024**3)} GB")
-            print(f"Available RAM: {ram.available / (1024**3)} GB")
+            from .SYS import Ram
+
+            snapshot = Ram().snapshot()
+            print(f"Total RAM: {snapshot.total / (1024**3)} GB")
+            print(f"Available RAM: {snapshot.available / (1024**3)} GB")
 
         elif args.command == "net":
+            from .NET import Interface
+
             net = Interface(args.interface)
             print(f"Interface: {net.interface}")
             print(f"Online Status: {net.online}")
@@ -77,6 +105,8 @@ def main() -> None:
                     print(f"IP Address: {ip}, Netmask: {netmask}")
 
         elif args.command == "temp":
+            from .SYS import Temp
+
             temp = Temp()
             print("CPU Temperatures:")
             for core, temperature in temp.cpu_temps().items():
@@ -84,6 +114,13 @@ def main() -> None:
             print("\nGPU Temperature:")
             print(f"Temperature: {temp.gpu_temp()}°C")
 
+        elif args.command == "serve":
+            from .EXPORTER import Exporter
+
+            exporter = Exporter(interval=args.interval, mountpoints=args.mountpoints)
+            print(f"Serving metrics on http://{args.host}:{args.port}/metrics")
+            exporter.serve(args.host, args.port)
+
         else:
             parser.print_help()
     else:
@@ -92,4 +129,3 @@ def main() -> None:
 
 if __name__ == "__main__":
     main()
-t
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+import pytest
+
+from hwutils import DISK
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_path_below_mount_maps_to_its_mount(tmp_path):
+    usage = DISK.UsageScanner().usage(str(tmp_path))
+    assert usage is not None
+    assert usage.mountpoint == DISK.find_mount(str(tmp_path)).mountpoint
+    assert usage.total > 0
+
+
+def test_scan_keys_results_by_requested_path(tmp_path):
+    path = str(tmp_path)
+    assert list(DISK.UsageScanner().scan([path])) == [path]
+
+
+def test_missing_path_raises_instead_of_timing_out(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        DISK.UsageScanner().usage(str(tmp_path / "missing"))
+
+
+def test_find_mount_prefers_longest_prefix():
+    mounts = [
+        DISK.Mount("/", "8:1", "ext4", "/dev/sda1"),
+        DISK.Mount("/mnt/nas", "0:52", "nfs4", "nas:/export"),
+        DISK.Mount("/mnt/nas2", "0:53", "nfs4", "nas:/other"),
+    ]
+    assert DISK.find_mount("/mnt/nas/photos", mounts).mountpoint == "/mnt/nas"
+    assert DISK.find_mount("/mnt/nas2", mounts).mountpoint == "/mnt/nas2"
+    assert DISK.find_mount("/mnt/nasty", mounts).mountpoint == "/"
+
+
+def test_hung_mount_is_quarantined_and_does_not_block_exit(tmp_path):
+    script = textwrap.dedent(
+        f"""
+        import os
+        import time
+
+        from hwutils import DISK
+
+        statvfs = os.statvfs
+
+
+        def hang(path):
+            if path.startswith({str(tmp_path)!r}):
+                time.sleep(30)
+            return statvfs(path)
+
+
+        os.statvfs = hang
+        scanner = DISK.UsageScanner(timeout=0.2)
+        assert scanner.usage({str(tmp_path)!r}) is None
+        assert scanner.quarantined
+        """
+    )
+    started = time.monotonic()
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, timeout=20)
+    assert time.monotonic() - started < 10
+
+
+def test_disk_reports_unresponsive_mount(monkeypatch):
+    class Hung:
+        def usage(self, path):
+            return None
+
+    disk = DISK.Disk("/mnt/nas", "NAS")
+    monkeypatch.setattr(DISK, "usage_scanner", Hung)
+    assert disk.percent_used() is None
+    assert "NAS Usage: not responding" in str(disk)
+
+
+def test_disk_percent_used_matches_usage(tmp_path):
+    disk = DISK.Disk(str(tmp_path))
+    assert disk.percent_used() == disk.usage().percent
+    assert f"Usage: {disk.percent_used()}%" in str(disk)
@@ -0,0 +1,64 @@
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from hwutils.EXPORTER import Exporter, MetricFamily  # noqa: E402
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    calls = []
+
+    def collector():
+        calls.append(None)
+        family = MetricFamily("hwutils_test", "gauge", "Test metric.")
+        family.add(len(calls))
+        return [family]
+
+    monkeypatch.setattr(Exporter, "_default_collectors", lambda self: {"test": collector})
+    exporter = Exporter(interval=0.2)
+    exporter.calls = calls
+    yield exporter
+    exporter.stop()
+
+
+@pytest.fixture
+def scrape(exporter):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), exporter.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get() -> tuple[int, bytes]:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, b""
+
+    yield get
+    server.shutdown()
+    server.server_close()
+
+
+def test_scrape_before_first_collection_is_unavailable(exporter, scrape):
+    assert scrape()[0] == 503
+    exporter.collect()
+    status, body = scrape()
+    assert status == 200
+    assert b"hwutils_test 1.0\n" in body and body.endswith(b"# EOF\n")
+
+
+def test_run_does_not_repeat_the_first_collection(exporter):
+    exporter.collect()
+    thread = threading.Thread(target=exporter.run, daemon=True)
+    thread.start()
+    # The background loop waits one interval before collecting again
+    exporter._stop.wait(0.1)
+    assert len(exporter.calls) == 1
+    exporter.stop()
+    thread.join(5)
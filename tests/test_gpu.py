@@ -0,0 +1,241 @@
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from hwutils import GPU
+from hwutils.GPU import GpuSnapshot, NvmlBackend, SmiBackend, SmiStreamBackend
+
+FAKE_SMI = str(Path(__file__).with_name("fake_nvidia_smi"))
+
+
+def _wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    backends = []
+
+    def start(gpus: int = 1, crash_after: int | None = None, **kwargs) -> SmiStreamBackend:
+        monkeypatch.setenv("FAKE_SMI_GPUS", str(gpus))
+        if crash_after is not None:
+            monkeypatch.setenv("FAKE_SMI_CRASH_AFTER", str(crash_after))
+        backend = SmiStreamBackend(interval_ms=20, command=FAKE_SMI, **kwargs)
+        backends.append(backend)
+        return backend
+
+    yield start
+    for backend in backends:
+        backend.close()
+
+
+def test_from_csv_parses_values_and_na():
+    snapshot = GpuSnapshot.from_csv(
+        "2024/01/01 12:00:00.000, 45, [N/A], 1500, 2100, 7000, 7501, 12, 5, 35.21, 30, 1024, 8192"
+    )
+    assert snapshot.core_temp == 45
+    assert snapshot.memory_temp is None
+    assert snapshot.power == 35.21
+    assert snapshot.max_memory_clock == 7501
+    assert snapshot.memory_total == 8192
+    assert snapshot.voltage is None
+
+
+def test_from_csv_rejects_wrong_field_count():
+    with pytest.raises(ValueError):
+        GpuSnapshot.from_csv("2024/01/01 12:00:00.000, 45")
+
+
+def test_stream_parses_every_gpu(stream):
+    samples = queue.Queue()
+    backend = stream(gpus=2, samples=samples)
+    for index in (0, 1):
+        snapshot = backend.snapshot(index)
+        assert snapshot.core_temp == 45
+        assert snapshot.core_clock == 1500
+        assert snapshot.memory_temp is None
+    index, snapshot = samples.get(timeout=5)
+    assert index in (0, 1)
+    assert isinstance(snapshot, GpuSnapshot)
+
+
+def test_stream_unknown_gpu_times_out(stream):
+    backend = stream(timeout=0.2)
+    with pytest.raises(TimeoutError):
+        backend.snapshot(3)
+
+
+def test_stream_close_stops_child_and_thread(stream):
+    backend = stream()
+    backend.snapshot(0)
+    process = backend._process
+    backend.close()
+    assert process.poll() is not None
+    assert not backend._thread.is_alive()
+
+
+def test_stream_restarts_after_crash(stream):
+    samples = queue.Queue()
+    backend = stream(crash_after=2, restart_delay=0.05, samples=samples)
+    backend.snapshot(0)
+    first = backend._process
+    assert _wait_until(lambda: backend.restarts >= 1)
+    assert _wait_until(lambda: backend._process is not first)
+    # Readings keep arriving from the restarted child
+    while not samples.empty():
+        samples.get_nowait()
+    assert samples.get(timeout=5)[1].core_temp == 45
+    assert first.poll() == 1
+
+
+def test_stream_retries_missing_executable():
+    backend = SmiStreamBackend(command=os.devnull + "-missing", restart_delay=0.05, timeout=0.2)
+    try:
+        with pytest.raises(TimeoutError):
+            backend.snapshot(0)
+        assert backend._thread.is_alive()
+    finally:
+        backend.close()
+    assert not backend._thread.is_alive()
+
+
+class NVMLError(Exception):
+    pass
+
+
+def _stub_nvml(init_error: Exception | None = None) -> SimpleNamespace:
+    """A stand-in for the pynvml module with one GPU that has no fan."""
+    calls = {"init": 0, "handles": 0}
+
+    def init():
+        calls["init"] += 1
+        if init_error is not None:
+            raise init_error
+
+    def handle(index):
+        calls["handles"] += 1
+        return f"handle-{index}"
+
+    def clock(handle, kind):
+        return {"graphics": 1500, "memory": 7000}[kind]
+
+    def max_clock(handle, kind):
+        return {"graphics": 2100, "memory": 7501}[kind]
+
+    def fan(handle):
+        raise NVMLError("not supported")
+
+    return SimpleNamespace(
+        calls=calls,
+        NVMLError=NVMLError,
+        NVML_TEMPERATURE_GPU=0,
+        NVML_CLOCK_GRAPHICS="graphics",
+        NVML_CLOCK_MEM="memory",
+        nvmlInit=init,
+        nvmlShutdown=lambda: None,
+        nvmlDeviceGetHandleByIndex=handle,
+        nvmlDeviceGetTemperature=lambda handle, sensor: 45,
+        nvmlDeviceGetClockInfo=clock,
+        nvmlDeviceGetMaxClockInfo=max_clock,
+        nvmlDeviceGetUtilizationRates=lambda handle: SimpleNamespace(gpu=12, memory=5),
+        nvmlDeviceGetMemoryInfo=lambda handle: SimpleNamespace(used=1024**3, total=8 * 1024**3),
+        nvmlDeviceGetPowerUsage=lambda handle: 35210,
+        nvmlDeviceGetFanSpeed=fan,
+        nvmlDeviceGetName=lambda handle: b"NVIDIA GeForce RTX 3080",
+    )
+
+
+def test_nvml_backend_maps_fields():
+    nvml = _stub_nvml()
+    backend = NvmlBackend(nvml=nvml)
+    snapshot = backend.snapshot(0)
+    assert nvml.calls["init"] == 1
+    assert (snapshot.core_temp, snapshot.memory_temp) == (45, None)
+    assert (snapshot.core_clock, snapshot.max_core_clock) == (1500, 2100)
+    assert (snapshot.memory_clock, snapshot.max_memory_clock) == (7000, 7501)
+    assert (snapshot.core_usage, snapshot.memory_usage) == (12, 5)
+    assert snapshot.power == 35.21
+    assert (snapshot.memory_used, snapshot.memory_total) == (1024, 8192)
+    # Unsupported readings are None, like [N/A] from nvidia-smi
+    assert snapshot.fan_speed is None
+    assert backend.name(0) == "NVIDIA GeForce RTX 3080"
+
+
+def test_nvml_backend_caches_handles():
+    nvml = _stub_nvml()
+    backend = NvmlBackend(nvml=nvml)
+    for _ in range(3):
+        backend.snapshot(0)
+    backend.snapshot(1)
+    assert nvml.calls["handles"] == 2
+
+
+@pytest.fixture
+def failing_nvml(monkeypatch):
+    nvml = _stub_nvml(init_error=NVMLError("driver not loaded"))
+    monkeypatch.setattr(GPU, "pynvml", nvml)
+    monkeypatch.setattr(GPU, "_nvml_backend", None)
+    monkeypatch.setattr(GPU, "_nvml_error", None)
+    return nvml
+
+
+def test_auto_backend_falls_back_to_smi_once(failing_nvml):
+    assert isinstance(GPU.get_backend("auto"), SmiBackend)
+    assert isinstance(GPU.get_backend("auto"), SmiBackend)
+    assert failing_nvml.calls["init"] == 1
+    with pytest.raises(NVMLError):
+        GPU.get_backend("nvml")
+    assert failing_nvml.calls["init"] == 1
+
+
+def _children(command: str) -> list[int]:
+    """Pids of live children of this process running `command`."""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        if fields[0] != b"Z" and int(fields[1]) == os.getpid() and command.encode() in cmdline:
+            pids.append(int(entry))
+    return pids
+
+
+def test_close_during_restart_leaves_no_child(monkeypatch):
+    monkeypatch.setenv("FAKE_SMI_CRASH_AFTER", "1")
+    popen = GPU.subprocess.Popen
+    spawns = []
+    closer = []
+
+    def spawn(*args, **kwargs):
+        spawns.append(None)
+        if len(spawns) == 2:
+            # Close while the reader thread is restarting the crashed child
+            closer.append(threading.Thread(target=backend.close))
+            closer[0].start()
+            time.sleep(0.2)
+            # The restarted child keeps running until it is terminated
+            monkeypatch.delenv("FAKE_SMI_CRASH_AFTER")
+        return popen(*args, **kwargs)
+
+    monkeypatch.setattr(GPU.subprocess, "Popen", spawn)
+    backend = SmiStreamBackend(interval_ms=10, command=FAKE_SMI, restart_delay=0)
+    assert _wait_until(lambda: closer)
+    closer[0].join(10)
+    assert _wait_until(lambda: not _children(FAKE_SMI), timeout=2)
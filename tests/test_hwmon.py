@@ -0,0 +1,57 @@
+import asyncio
+import re
+
+from hwutils import HWMON
+
+CORE = re.compile(r"Core \d+")
+
+
+def _fake_tree(root, cores: int = 12):
+    chip = root / "hwmon2"
+    chip.mkdir(parents=True)
+    (chip / "name").write_text("coretemp\n")
+    (chip / "temp1_input").write_text("50000\n")
+    (chip / "temp1_label").write_text("Package id 0\n")
+    for core in range(cores):
+        # coretemp numbers the inputs of core N as temp(N + 2)
+        (chip / f"temp{core + 2}_input").write_text(f"{40 + core}000\n")
+        (chip / f"temp{core + 2}_label").write_text(f"Core {core}\n")
+    fans = root / "hwmon10"
+    fans.mkdir()
+    (fans / "name").write_text("nct6798\n")
+    (fans / "fan1_input").write_text("900\n")
+    return root
+
+
+def test_cores_keep_numeric_order(tmp_path):
+    hwmon = HWMON.Hwmon(root=str(_fake_tree(tmp_path)))
+    features = hwmon.search(CORE, kind="temp")
+    assert [feature.label for feature in features] == [f"Core {core}" for core in range(12)]
+    assert [feature.read() for feature in features] == [40.0 + core for core in range(12)]
+
+
+def test_devices_keep_numeric_order(tmp_path):
+    hwmon = HWMON.Hwmon(root=str(_fake_tree(tmp_path)))
+    assert [feature.chip for feature in hwmon.features][-1] == "nct6798"
+
+
+def test_cached_features_are_reordered(tmp_path):
+    features = HWMON.Hwmon(root=str(_fake_tree(tmp_path))).features
+    stale = sorted(features, key=lambda feature: feature.path)
+    hwmon = HWMON.Hwmon(features=stale)
+    labels = [feature.label for feature in hwmon.search(CORE, kind="temp")]
+    assert labels == [f"Core {core}" for core in range(12)]
+
+
+def test_missing_lm_sensors_gives_empty_snapshot(monkeypatch):
+    monkeypatch.setenv("PATH", "")
+    snapshot = HWMON.SensorsSnapshot.query()
+    assert snapshot.tree == {}
+    assert snapshot.find("Sensor 2", kind="temp") is None
+
+
+def test_missing_lm_sensors_gives_empty_async_snapshot(monkeypatch):
+    monkeypatch.setenv("PATH", "")
+    monkeypatch.setattr(HWMON, "_sensors_snapshot", None)
+    snapshot = asyncio.run(HWMON.asensors_snapshot())
+    assert snapshot.items() == []
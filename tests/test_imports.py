@@ -0,0 +1,87 @@
+"""Guard the startup cost of `import hwutils` and of each CLI subcommand."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Module imported by each subcommand of `python -m hwutils`
+SUBCOMMAND_MODULES = {
+    "cpu": "hwutils.CPU",
+    "gpu": "hwutils.GPU",
+    "disk": "hwutils.DISK",
+    "ram": "hwutils.SYS",
+    "temp": "hwutils.SYS",
+    "net": "hwutils.NET",
+}
+
+# Only the async and exporter paths may pay for these
+HEAVY_MODULES = {"asyncio", "concurrent.futures", "http.server"}
+
+# Third-party imports are left out of the budget, they cost the same with or without hwutils
+THIRD_PARTY = {"psutil", "pynvml"}
+
+# Cumulative import time allowed for a subcommand's module, best of `RUNS`
+BUDGET_MS = float(os.environ.get("HWUTILS_IMPORT_BUDGET_MS", "80"))
+RUNS = 3
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import `module` in a fresh interpreter and return module -> cumulative µs."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        pytest.skip(f"{module} cannot be imported here: {result.stderr.strip().splitlines()[-1]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_package_import_loads_no_subsystem():
+    loaded = {name for name in import_times("hwutils") if name.startswith("hwutils.")}
+    assert loaded <= {"hwutils.Sensor"}
+
+
+@pytest.mark.parametrize("module", sorted(set(SUBCOMMAND_MODULES.values())))
+def test_subcommand_skips_heavy_modules(module):
+    assert not HEAVY_MODULES & set(import_times(module))
+
+
+@pytest.mark.parametrize("module", sorted(set(SUBCOMMAND_MODULES.values())))
+def test_subcommand_import_budget(module):
+    best = min(
+        times[module] - sum(times.get(name, 0) for name in THIRD_PARTY)
+        for times in (import_times(module) for _ in range(RUNS))
+    )
+    assert best / 1000 <= BUDGET_MS, f"importing {module} took {best / 1000:.1f} ms"
+
+
+def test_sensor_export_is_the_class():
+    script = (
+        "import hwutils.GPU, hwutils\n"
+        "from hwutils import Sensor\n"
+        "assert isinstance(hwutils.Sensor, type) and Sensor is hwutils.Sensor\n"
+        "assert hwutils.Prober.__module__ == 'hwutils.PING'\n"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True)
+
+
+def test_cli_without_command_prints_help():
+    result = subprocess.run(
+        [sys.executable, "-m", "hwutils"], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert "usage:" in result.stdout
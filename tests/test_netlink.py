@@ -0,0 +1,243 @@
+import errno
+import socket
+
+import pytest
+
+from hwutils import NETLINK
+
+
+@pytest.fixture
+def watcher():
+    try:
+        watcher = NETLINK.LinkWatcher()
+    except OSError as error:
+        pytest.skip(f"rtnetlink is not available: {error}")
+    yield watcher
+    watcher.close()
+
+
+def test_table_has_loopback(watcher):
+    link = watcher.get("lo")
+    assert link is not None and link.up
+    assert any(address.address == "127.0.0.1" for address in link.addresses)
+
+
+def test_resync_drops_links_deleted_while_overflowing(watcher):
+    events = []
+    watcher.subscribe(lambda event, link: events.append((event, link.name)))
+    ghost = NETLINK.Link(
+        index=2**31 - 1, name="ghost0", flags=0, mtu=1500, mac="", operstate="up", addresses=()
+    )
+    lo = watcher.get("lo")
+    with watcher._lock:
+        watcher._links[ghost.index] = ghost
+        del watcher._links[lo.index]
+    assert watcher._resync()
+    assert watcher.get("ghost0") is None
+    assert watcher.get("lo") == lo
+    assert sorted(events) == [("added", "lo"), ("removed", "ghost0")]
+
+
+def test_enobufs_triggers_resync(watcher, monkeypatch):
+    receive = watcher._receive
+    calls = []
+
+    def overflow_once(links, sequence=None):
+        if not calls:
+            calls.append(sequence)
+            raise OSError(errno.ENOBUFS, "No buffer space available")
+        return receive(links, sequence)
+
+    def resync():
+        watcher._stop.set()
+        return True
+
+    monkeypatch.setattr(watcher, "_receive", overflow_once)
+    monkeypatch.setattr(watcher, "_resync", resync)
+    watcher.run()
+    assert calls == [None]
+
+
+def test_other_errors_trigger_resync(watcher, monkeypatch):
+    def fail(links, sequence=None):
+        raise OSError(errno.EIO, "Input/output error")
+
+    def resync():
+        watcher._stop.set()
+        return True
+
+    monkeypatch.setattr(watcher, "_receive", fail)
+    monkeypatch.setattr(watcher, "_resync", resync)
+    watcher.run()
+
+
+def test_failed_resyncs_back_off(watcher, monkeypatch):
+    delays = []
+
+    def wait(timeout):
+        delays.append(timeout)
+        if len(delays) == 8:
+            watcher._stop.set()
+        return watcher._stop.is_set()
+
+    def overflow(links, sequence=None):
+        raise OSError(errno.ENOBUFS, "No buffer space available")
+
+    monkeypatch.setattr(watcher, "_receive", overflow)
+    monkeypatch.setattr(watcher, "_resync", lambda: False)
+    monkeypatch.setattr(watcher._stop, "wait", wait)
+    watcher.run()
+    assert delays == [0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 30.0, 30.0]
+
+
+def test_failed_resync_is_retried(watcher, monkeypatch):
+    attempts = []
+
+    def flaky_load():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise socket.timeout("timed out")
+        watcher._stop.set()
+        return {}
+
+    def overflow(links, sequence=None):
+        raise OSError(errno.ENOBUFS, "No buffer space available")
+
+    monkeypatch.setattr(watcher, "_load", flaky_load)
+    monkeypatch.setattr(watcher, "_receive", overflow)
+    watcher.run()
+    assert len(attempts) == 2
+
+
+# inet_diag_msg payloads captured from the kernel, attributes included:
+# a listener on 127.0.0.1:58997 owned by root, inode 40810
+LISTEN_V4 = bytes.fromhex(
+    "020a0000e67500007f00000100000000000000000000000000000000000000000000000000000000"
+    "000000001800000000000000000000000000000080000000000000006a9f0000050008000000000008"
+    "000f00000000000c00150001000000000000000600160052000000"
+)
+# an established connection from [::1]:58864 to [::1]:50343, inode 40861
+ESTABLISHED_V6 = bytes.fromhex(
+    "0a010000e5f0c4a70000000000000000000000000000000100000000000000000000000000000001"
+    "000000001a00000000000000000000000000000000000000000000009d9f0000050008000000000008"
+    "000f00000000000c00150001000000000000000600160012000000"
+)
+
+
+def _message(message_type: int, sequence: int, payload: bytes) -> bytes:
+    length = NETLINK.NLMSG_HEADER.size + len(payload)
+    header = NETLINK.NLMSG_HEADER.pack(length, message_type, 2, sequence, 0)
+    return header + payload + bytes(-length % 4)
+
+
+class CapturedSocket:
+    """Answers each sock_diag dump with the captured messages of the requested family."""
+
+    def __init__(self, replies: dict[int, list[bytes]]):
+        self.replies = replies
+        self.pending = []
+
+    def send(self, request: bytes) -> None:
+        _, _, _, sequence, _ = NETLINK.NLMSG_HEADER.unpack_from(request)
+        family = request[NETLINK.NLMSG_HEADER.size]
+        messages = [
+            _message(NETLINK.SOCK_DIAG_BY_FAMILY, sequence, payload)
+            for payload in self.replies.get(family, [])
+        ]
+        # A stale reply to an earlier request is skipped
+        messages.insert(0, _message(NETLINK.SOCK_DIAG_BY_FAMILY, sequence - 1, LISTEN_V4))
+        self.pending.append(b"".join(messages))
+        self.pending.append(_message(NETLINK.NLMSG_DONE, sequence, bytes(4)))
+
+    def recv(self, size: int) -> bytes:
+        return self.pending.pop(0)
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def captured_diag():
+    diag = NETLINK.SockDiag.__new__(NETLINK.SockDiag)
+    diag._socket = CapturedSocket({socket.AF_INET: [LISTEN_V4], socket.AF_INET6: [ESTABLISHED_V6]})
+    diag._sequence = 0
+    return diag
+
+
+def test_sock_diag_parses_captured_messages(captured_diag):
+    assert captured_diag.connections("tcp") == [
+        NETLINK.Connection(
+            socket.AF_INET, socket.SOCK_STREAM, ("127.0.0.1", 58997), (), "LISTEN", 0, 40810
+        ),
+        NETLINK.Connection(
+            socket.AF_INET6,
+            socket.SOCK_STREAM,
+            ("::1", 58864),
+            ("::1", 50343),
+            "ESTABLISHED",
+            0,
+            40861,
+        ),
+    ]
+
+
+def test_sock_diag_counts_captured_messages(captured_diag):
+    assert captured_diag.counts("tcp") == {"LISTEN": 1, "ESTABLISHED": 1}
+
+
+PROC_TCP = """\
+  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 0100007F:0CEA 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1111 1 0000000000000000 100 0 0 10 0
+   1: 0100007F:0CEA 0100007F:D3C2 01 00000000:00000000 00:00000000 00000000  1000        0 2222 1 0000000000000000 20 4 30 10 -1
+   2: 0100007F:0CEA 0100007F:D3C4 06 00000000:00000000 03:00001770 00000000     0        0 0 3 0000000000000000
+"""
+PROC_TCP6 = """\
+  sl  local_address                         remote_address                        st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode
+   0: 00000000000000000000000001000000:1F90 00000000000000000000000000000000:0000 0A 00000000:00000000 00:00000000 00000000  1000        0 3333 1 0000000000000000 100 0 0 10 0
+   1: 0000000000000000FFFF00000100007F:1F90 0000000000000000FFFF00000100007F:C350 01 00000000:00000000 00:00000000 00000000  1000        0 4444 1 0000000000000000 20 4 30 10 -1
+"""
+PROC_UDP = """\
+   sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode ref pointer drops
+  100: 3500007F:0035 00000000:0000 07 00000000:00000000 00:00000000 00000000   101        0 5555 2 0000000000000000 0
+"""
+
+
+@pytest.fixture
+def proc_net(tmp_path):
+    # No udp6 file, as when IPv6 is disabled
+    (tmp_path / "net").mkdir()
+    for name, text in (("tcp", PROC_TCP), ("tcp6", PROC_TCP6), ("udp", PROC_UDP)):
+        (tmp_path / "net" / name).write_text(text)
+    return str(tmp_path)
+
+
+def test_proc_connections_excludes_time_wait(proc_net):
+    connections = NETLINK.proc_connections("inet", root=proc_net)
+    assert [(c.laddr, c.raddr, c.status, c.uid, c.inode) for c in connections] == [
+        (("127.0.0.1", 3306), (), "LISTEN", 0, 1111),
+        (("127.0.0.1", 3306), ("127.0.0.1", 54210), "ESTABLISHED", 1000, 2222),
+        (("::1", 8080), (), "LISTEN", 1000, 3333),
+        (("::ffff:127.0.0.1", 8080), ("::ffff:127.0.0.1", 50000), "ESTABLISHED", 1000, 4444),
+        (("127.0.0.53", 53), (), "NONE", 101, 5555),
+    ]
+    assert {c.family for c in connections[2:4]} == {socket.AF_INET6}
+    assert connections[4].type == socket.SOCK_DGRAM
+
+
+def test_proc_connections_filters_states(proc_net):
+    connections = NETLINK.proc_connections("tcp4", NETLINK.state_mask("TIME_WAIT"), root=proc_net)
+    assert [(c.raddr, c.status) for c in connections] == [(("127.0.0.1", 54212), "TIME_WAIT")]
+
+
+def test_link_watcher_replaces_a_dead_watcher(monkeypatch):
+    monkeypatch.setattr(NETLINK, "_link_watcher", None)
+    first = NETLINK.link_watcher()
+    if first is None:
+        pytest.skip("rtnetlink is not available")
+    try:
+        assert NETLINK.link_watcher() is first
+        first.stop()
+        second = NETLINK.link_watcher()
+        assert second is not first and second._thread.is_alive()
+    finally:
+        NETLINK._link_watcher.close()
@@ -0,0 +1,73 @@
+import asyncio
+import socket
+
+import pytest
+
+from hwutils import PING
+
+
+@pytest.fixture
+def listener():
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        yield server.getsockname()[1]
+
+
+@pytest.fixture
+def closed_port():
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        port = server.getsockname()[1]
+    return port
+
+
+def test_open_port_is_answered(listener):
+    target = ("127.0.0.1", listener)
+    prober = PING.Prober([target], timeout=1.0, method="tcp")
+    stats = asyncio.run(prober.run(interval=0.01, count=3))[target]
+    assert (stats.sent, stats.received, stats.refused, stats.loss) == (3, 3, 0, 0.0)
+    assert 0 < stats.minimum <= stats.latency <= stats.maximum < 1000
+    assert stats.last is not None
+
+
+def test_closed_port_is_reported_refused(closed_port):
+    target = ("127.0.0.1", closed_port)
+    stats = asyncio.run(PING.Prober([target], method="tcp").round())[target]
+    assert stats.refused == 1
+    assert stats.received == 1
+
+
+def test_unresolvable_target_is_lost():
+    target = ("host.invalid", 80)
+    stats = asyncio.run(PING.Prober([target], method="tcp").round())[target]
+    assert (stats.received, stats.loss, stats.latency) == (0, 100.0, None)
+
+
+def test_window_keeps_latest_probes(listener):
+    target = ("127.0.0.1", listener)
+    prober = PING.Prober([target], window=2, method="tcp")
+    stats = asyncio.run(prober.run(interval=0, count=5))[target]
+    assert stats.sent == 2
+
+
+def test_blocking_probe(listener, closed_port):
+    assert PING.probe_blocking(("127.0.0.1", listener), method="tcp") > 0
+    assert PING.probe_blocking("127.0.0.1", method="tcp", port=closed_port) > 0
+    assert PING.probe_blocking(("host.invalid", 80), method="tcp") is None
+
+
+def test_blocking_probe_inside_event_loop(listener):
+    async def main():
+        return PING.probe_blocking(("127.0.0.1", listener), method="tcp")
+
+    assert asyncio.run(main()) > 0
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        PING.Prober(["127.0.0.1"], method="udp")
+
+
+def test_latency_stats_from_results():
+    stats = PING.LatencyStats.from_results("host", [10.0, None, 14.0, 12.0])
+    assert (stats.sent, stats.received, stats.loss) == (4, 3, 25.0)
+    assert stats.latency == 12.0
+    assert stats.jitter == 3.0
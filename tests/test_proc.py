@@ -0,0 +1,146 @@
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("psutil")
+
+from hwutils import PROC  # noqa: E402
+
+TICKS = PROC.CLOCK_TICKS
+
+
+def _write_process(root, pid: int, comm: str, cpu: int, starttime: int, cmdline=(), rss=100):
+    """Write /proc/[pid]/stat and cmdline, with `cpu` ticks split between utime and stime."""
+    directory = root / str(pid)
+    directory.mkdir(exist_ok=True)
+    utime, stime = cpu - cpu // 2, cpu // 2
+    fields = ["S", "1", pid, pid, 0, -1, 4194560, 0, 0, 0, 0, utime, stime, 0, 0, 20, 0, 1, 0]
+    fields += [starttime, 4096 * rss, rss]
+    stat = f"{pid} ({comm}) " + " ".join(map(str, fields)) + " 18446744073709551615 0 0\n"
+    (directory / "stat").write_text(stat)
+    (directory / "cmdline").write_bytes(b"".join(arg.encode() + b"\0" for arg in cmdline))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(PROC, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_cpu_percent_is_the_tick_delta_over_elapsed_time(tmp_path, clock):
+    _write_process(tmp_path, 10, "idle", cpu=500, starttime=100)
+    _write_process(tmp_path, 20, "tmux: server (1)", cpu=1000, starttime=200, cmdline=["tmux"])
+    scanner = PROC.ProcessScanner(top=2, root=str(tmp_path))
+
+    first = scanner.scan()
+    assert (first.processes, first.threads) == (2, 2)
+    assert [p.cpu_percent for p in first.top_cpu] == [0.0, 0.0]
+
+    clock[0] += 2.0
+    _write_process(tmp_path, 20, "tmux: server (1)", cpu=1000 + TICKS, starttime=200)
+    second = scanner.scan()
+    busy, idle = second.top_cpu
+    assert (busy.pid, busy.name, busy.cpu_percent) == (20, "tmux: server (1)", 50.0)
+    assert (idle.pid, idle.cpu_percent) == (10, 0.0)
+    # The command line was read once, when the process first made a top list
+    assert busy.cmdline == ("tmux",)
+    assert busy.started == scanner.boot_time + 200 / TICKS
+    assert busy.rss == 100 * PROC.PAGE_SIZE
+
+
+def test_reused_pid_starts_from_zero(tmp_path, clock):
+    _write_process(tmp_path, 30, "old", cpu=100, starttime=300, cmdline=["old"])
+    scanner = PROC.ProcessScanner(top=1, root=str(tmp_path))
+    assert scanner.scan().top_cpu[0].cmdline == ("old",)
+
+    # The pid now belongs to a new process, whose ticks must not be diffed with the old one's
+    clock[0] += 1.0
+    _write_process(tmp_path, 30, "new", cpu=100 + 5 * TICKS, starttime=900, cmdline=["new"])
+    reused = scanner.scan().top_cpu[0]
+    assert (reused.name, reused.cmdline, reused.cpu_percent) == ("new", ("new",), 0.0)
+
+    clock[0] += 1.0
+    _write_process(tmp_path, 30, "new", cpu=100 + 6 * TICKS, starttime=900, cmdline=["new"])
+    assert scanner.scan().top_cpu[0].cpu_percent == 100.0
+
+
+def test_exited_processes_are_forgotten(tmp_path, clock):
+    _write_process(tmp_path, 40, "short", cpu=10, starttime=400)
+    scanner = PROC.ProcessScanner(root=str(tmp_path))
+    scanner.scan()
+    for name in ("stat", "cmdline"):
+        (tmp_path / "40" / name).unlink()
+    (tmp_path / "40").rmdir()
+    assert scanner.scan().processes == 0
+    assert scanner._static == {} and scanner._ticks == {}
+
+
+def test_scan_sees_this_process():
+    scanner = PROC.ProcessScanner(top=100_000)
+    info = next(p for p in scanner.scan().top_memory if p.pid == os.getpid())
+    assert info.rss > 0 and info.threads >= 1
+
+
+IGNORE_SIGTERM = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN)"
+SLEEP = "print('ready', flush=True); time.sleep(60)"
+
+
+@pytest.fixture
+def spawn():
+    """Start Python children tagged with a marker argument unique to this test."""
+    marker = f"hwutils-test-{os.getpid()}-{uuid.uuid4().hex}"
+    children = []
+
+    def start(ignore_sigterm: bool = False) -> subprocess.Popen:
+        setup = IGNORE_SIGTERM if ignore_sigterm else "import time"
+        child = subprocess.Popen(
+            [sys.executable, "-c", f"{setup}; {SLEEP}", marker],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        children.append(child)
+        # Signal handlers are in place once the child prints
+        assert child.stdout.readline() == "ready\n"
+        return child
+
+    start.marker = marker
+    yield start
+    for child in children:
+        child.kill()
+        child.wait()
+        child.stdout.close()
+
+
+def test_find_matches_marker_argument(spawn):
+    children = [spawn(), spawn()]
+    assert sorted(PROC.find(spawn.marker)) == sorted(child.pid for child in children)
+    assert PROC.find(re.compile(re.escape(spawn.marker))) == PROC.find(spawn.marker)
+
+
+def test_terminate_sorts_cooperative_and_stubborn_processes(spawn):
+    cooperative = spawn()
+    stubborn = spawn(ignore_sigterm=True)
+    started = time.monotonic()
+    result = PROC.terminate(PROC.find(spawn.marker), grace=1.0, pattern=spawn.marker)
+    assert result.terminated == (cooperative.pid,)
+    assert result.killed == (stubborn.pid,)
+    assert result.failed == ()
+    assert cooperative.wait(5) == -signal.SIGTERM
+    assert stubborn.wait(5) == -signal.SIGKILL
+    assert time.monotonic() - started < 5
+
+
+def test_terminate_skips_pid_no_longer_matching(spawn):
+    child = spawn()
+    # As if the pid had been reused by another program between `find` and `terminate`
+    result = PROC.terminate([child.pid], grace=0.5, pattern=spawn.marker + "-other")
+    assert result == PROC.TerminateResult((), (), ())
+    assert child.poll() is None
@@ -0,0 +1,53 @@
+import math
+import os
+
+import pytest
+
+from hwutils.RECORDING import Reader, Writer
+
+METRICS = ["cpu.temp", "gpu.power"]
+
+
+def test_roundtrip(tmp_path):
+    path = str(tmp_path / "capture.hwrec")
+    with Writer(path, METRICS) as writer:
+        writer.append({"cpu.temp": 45.0, "gpu.power": 120.5}, timestamp_ns=1)
+        writer.append({"cpu.temp": 46.0}, timestamp_ns=2)
+    with Reader(path) as reader:
+        assert len(reader) == 2
+        assert list(reader.timestamps()) == [1, 2]
+        assert list(reader.column("cpu.temp")) == [45.0, 46.0]
+        power = list(reader.column("gpu.power"))
+        assert power[0] == 120.5 and math.isnan(power[1])
+
+
+def test_reader_recovers_uncommitted_tail(tmp_path):
+    path = str(tmp_path / "capture.hwrec")
+    writer = Writer(path, METRICS, sync_interval=3600)
+    for i in range(3):
+        writer.append({"cpu.temp": float(i)}, timestamp_ns=i + 1)
+    writer.sync()
+    for i in range(3, 5):
+        writer.append({"cpu.temp": float(i)}, timestamp_ns=i + 1)
+    # Crash: the last two records are in the file but not in the committed count
+    writer._map.close()
+    os.close(writer._fd)
+    with Reader(path) as reader:
+        assert len(reader) == 5
+        assert list(reader.timestamps()) == [1, 2, 3, 4, 5]
+        assert list(reader.column("cpu.temp")) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    # Reopening for append continues after the recovered tail
+    with Writer(path, METRICS) as writer:
+        assert writer.count == 5
+        writer.append({"cpu.temp": 5.0}, timestamp_ns=6)
+    with Reader(path) as reader:
+        assert list(reader.timestamps()) == [1, 2, 3, 4, 5, 6]
+
+
+def test_reopen_with_other_metrics_closes_file(tmp_path):
+    path = str(tmp_path / "capture.hwrec")
+    Writer(path, METRICS).close()
+    before = set(os.listdir("/proc/self/fd"))
+    with pytest.raises(ValueError):
+        Writer(path, ["cpu.temp"])
+    assert set(os.listdir("/proc/self/fd")) <= before
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+
+from hwutils.Sensor import SensorType, SystemStats, counter_delta
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _hang() -> dict:
+    time.sleep(30)
+    return {}
+
+
+def _temp() -> dict:
+    return {"cpu_temp": (SensorType.TEMP, 42)}
+
+
+def _fail() -> dict:
+    raise RuntimeError("sensor read failed")
+
+
+def test_update_keeps_deadline_and_marks_stale():
+    stats = SystemStats(deadline=0.2, collectors={"hang": _hang, "temp": _temp, "fail": _fail})
+    started = time.monotonic()
+    assert stats.update() == 1
+    assert time.monotonic() - started < 1
+    assert stats.cpu_temp.value == 42.0 and not stats.cpu_temp.stale
+
+    stats.collectors["temp"] = _fail
+    stats.update()
+    assert stats.cpu_temp.stale
+    # The hung collector is not started a second time
+    assert list(stats._pending) == ["hang"]
+    stats.close()
+
+
+def test_hung_collector_does_not_block_exit():
+    script = textwrap.dedent(
+        """
+        import time
+        from hwutils.Sensor import SystemStats
+
+        stats = SystemStats(deadline=0.1, collectors={"hang": lambda: time.sleep(30)})
+        stats.update()
+        """
+    )
+    started = time.monotonic()
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, timeout=20)
+    assert time.monotonic() - started < 10
+
+
+def test_counter_delta():
+    assert counter_delta(150, 100) == 50
+    # A 32 bit counter that wrapped
+    assert counter_delta(10, 2**32 - 10, bits=32) == 20
+    # A 64 bit counter below 2**32 that went backwards was reset, not wrapped
+    assert counter_delta(10, 2**32 - 10) == 0
+    assert counter_delta(5, 2**40) == 0
+
+
+def test_lost_ping_marks_reading_stale(monkeypatch):
+    from hwutils import PING
+    from hwutils.Sensor import _collect_ping
+
+    rtts = iter([12.345, None])
+    monkeypatch.setattr(PING, "probe_blocking", lambda destination: next(rtts))
+    stats = SystemStats(collectors={"ping": _collect_ping})
+    assert stats.update() == 1
+    assert stats.ping.value == 12.345 and not stats.ping.stale
+    assert stats.update() == 0
+    assert stats.ping.value == 12.345 and stats.ping.stale
@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("psutil")
+
+from hwutils import SYS  # noqa: E402
+
+MEMINFO = """\
+MemTotal:       16318412 kB
+MemFree:         1234568 kB
+MemAvailable:    9876544 kB
+Buffers:          345676 kB
+Cached:          7654320 kB
+SwapCached:            0 kB
+Shmem:            456788 kB
+Dirty:              1232 kB
+Writeback:             0 kB
+Slab:             812344 kB
+SReclaimable:     612344 kB
+SwapTotal:       8388604 kB
+SwapFree:        8388604 kB
+HugePages_Total:       4
+HugePages_Free:        3
+Hugepagesize:       2048 kB
+"""
+
+PRESSURE = """\
+some avg10=1.25 avg60=0.50 avg300=0.10 total=123456
+full avg10=0.00 avg60=0.02 avg300=0.00 total=4567
+"""
+
+KB = 1024
+
+
+@pytest.fixture
+def meminfo(tmp_path):
+    path = tmp_path / "meminfo"
+    path.write_text(MEMINFO)
+    return SYS._read_meminfo(str(path))
+
+
+def test_read_meminfo_converts_kb_and_keeps_counts(meminfo):
+    assert meminfo["MemTotal"] == 16318412 * KB
+    assert meminfo["Hugepagesize"] == 2048 * KB
+    # Huge page counts have no unit
+    assert meminfo["HugePages_Total"] == 4
+    assert meminfo["HugePages_Free"] == 3
+
+
+def test_memory_snapshot_matches_psutil_formulas(meminfo):
+    snapshot = SYS.MemorySnapshot.from_meminfo(meminfo)
+    assert snapshot.total == 16318412 * KB
+    assert snapshot.available == 9876544 * KB
+    assert snapshot.used == (16318412 - 9876544) * KB
+    assert snapshot.free == 1234568 * KB
+    assert snapshot.percent == 39.5
+    assert snapshot.cached == (7654320 + 612344) * KB
+    assert (snapshot.shared, snapshot.slab_reclaimable) == (456788 * KB, 612344 * KB)
+    assert (snapshot.hugepages_total, snapshot.hugepages_free) == (4, 3)
+
+
+def test_memory_snapshot_estimates_available_on_old_kernels():
+    meminfo = {"MemTotal": 1000, "MemFree": 100, "Buffers": 50, "Cached": 200}
+    snapshot = SYS.MemorySnapshot.from_meminfo(meminfo)
+    assert snapshot.available == 350
+    assert snapshot.used == 650
+    assert snapshot.percent == 65.0
+
+
+def test_pressure_stats_from_output():
+    stats = SYS.PressureStats.from_output(PRESSURE)
+    assert (stats.some_avg10, stats.some_avg60, stats.some_avg300) == (1.25, 0.5, 0.1)
+    assert stats.some_total == 123456
+    assert (stats.full_avg10, stats.full_avg60, stats.full_avg300) == (0.0, 0.02, 0.0)
+    assert stats.full_total == 4567